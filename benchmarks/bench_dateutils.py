@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Micro-benchmarks for the parsing and formatting helpers of `kivystart.utils.dateutils`.
+
+Compares the compiled format fast path (`parse_date`, `format_date`, `parse_many`, `format_many`) and the
+per-second memoized `gmt_date` against the previous implementations, which called strptime/strftime for
+every value and rebuilt the name lookups on every call:
+
+    python benchmarks/bench_dateutils.py
+    python benchmarks/bench_dateutils.py --rows 100000 --repeat 5
+"""
+import os
+import sys
+import time
+import click
+import random
+import datetime
+
+from typing import Callable, List
+
+BENCHMARKS_DIR = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from kivystart.utils import dateutils  # noqa: E402
+
+
+FORMATS = ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M", dateutils.ISO_8601)
+
+
+def legacy_parse_date(date_str: str, format_str: str) -> datetime.datetime:
+    return datetime.datetime.strptime(date_str, format_str)
+
+
+def legacy_format_date(date: datetime.datetime, format_str: str) -> str:
+    return date.strftime(format_str)
+
+
+def legacy_gmt_date() -> str:
+    timestamp = time.time()
+    weekdayname = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    monthname = [None, "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    year, month, day, hh, mm, ss, wd, y, z = time.gmtime(timestamp)
+    return f"{weekdayname[wd]}, {day:02d} {monthname[month]} {year:04d} {hh:02d}:{mm:02d}:{ss:02d} GMT"
+
+
+def best_time(func: Callable, repeat: int) -> float:
+    """
+    Returns the best wall time of func in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def random_dates(rows: int) -> List[datetime.datetime]:
+    start = datetime.datetime(2000, 1, 1)
+    return [start + datetime.timedelta(seconds=random.randrange(0, 10 ** 9)) for _ in range(rows)]
+
+
+def report(name: str, rows: int, legacy: float, fast: float):
+    click.echo(
+        f"{name:<42} legacy {legacy / rows * 1e6:>7.3f} us/row  fast {fast / rows * 1e6:>7.3f} us/row  "
+        f"speedup {legacy / fast:>5.1f}x"
+    )
+
+
+@click.command()
+@click.option("--rows", default=50000, help="Number of values parsed and formatted per format.")
+@click.option("--repeat", default=3, help="Number of runs, the best run is reported.")
+@click.option("--seed", default=0, help="Seed of the random dates.")
+def main(rows: int, repeat: int, seed: int):
+    random.seed(seed)
+    dates = random_dates(rows)
+
+    for format_str in FORMATS:
+        # ISO 8601 strings were previously parsed and formatted with the equivalent strptime format
+        legacy_format_str = "%Y-%m-%dT%H:%M:%S" if format_str == dateutils.ISO_8601 else format_str
+        strings = [date.strftime(legacy_format_str) for date in dates]
+        legacy_parse = lambda: [legacy_parse_date(value, legacy_format_str) for value in strings]
+        legacy_format = lambda: [legacy_format_date(date, legacy_format_str) for date in dates]
+
+        report(
+            f"parse_date '{format_str}'", rows,
+            best_time(legacy_parse, repeat),
+            best_time(lambda: [dateutils.parse_date(value, format_str) for value in strings], repeat),
+        )
+        report(
+            f"parse_many '{format_str}'", rows,
+            best_time(legacy_parse, repeat),
+            best_time(lambda: list(dateutils.parse_many(strings, format_str)), repeat),
+        )
+        report(
+            f"format_many '{format_str}'", rows,
+            best_time(legacy_format, repeat),
+            best_time(lambda: list(dateutils.format_many(dates, format_str)), repeat),
+        )
+
+    report(
+        "gmt_date", rows,
+        best_time(lambda: [legacy_gmt_date() for _ in range(rows)], repeat),
+        best_time(lambda: [dateutils.gmt_date() for _ in range(rows)], repeat),
+    )
+
+
+if __name__ == "__main__":
+    main()
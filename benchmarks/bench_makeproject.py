@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmarks for `MakeProjectCommand.makeproject`.
+
+Generates N projects for each combination of project count, output directory (tmpfs and disk),
+flavor (kivy and kivymd) and update mode, and records latency percentiles, I/O syscalls per
+project and peak RSS. Each combination runs in its own worker process so that peak RSS is
+measured per combination. External tools (buildozer, git and python for venv creation) are
+replaced by local fakes on the PATH, so no network or heavy subprocess is involved.
+
+Results are compared against a committed baseline and the script exits with a non-zero status
+if any metric regresses beyond the tolerance. Latency percentiles are only compared for runs of at
+least MIN_LATENCY_SAMPLES projects, a single generation is too noisy to gate on. Baselines are
+machine specific, record them on the agent running the benchmarks:
+
+    python benchmarks/bench_makeproject.py --write-baseline
+    python benchmarks/bench_makeproject.py --counts 1,100
+"""
+import os
+import sys
+import json
+import time
+import click
+import shutil
+import builtins
+import tempfile
+import resource
+import subprocess
+
+from typing import Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from kivystart.commands import MakeProjectCommand  # noqa: E402
+
+
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+
+# Metrics compared against the baseline, lower is better for all of them
+GATED_METRICS = ("p50_ms", "p90_ms", "p99_ms", "io_syscalls_per_project", "peak_rss_kb")
+
+LATENCY_METRICS = ("p50_ms", "p90_ms", "p99_ms")
+
+# Fewer generations than this only report the latency percentiles, syscalls and RSS are always compared
+MIN_LATENCY_SAMPLES = 20
+
+PYTHON_VERSION = "3.9"
+
+FAKE_BUILDOZER = """
+if [ "$1" = "init" ]; then
+    printf '[app]\\ntitle = My Application\\n' > buildozer.spec
+fi
+"""
+
+FAKE_GIT = """
+if [ "$1" = "init" ]; then
+    mkdir -p .git
+fi
+"""
+
+FAKE_PYTHON = """
+if [ "$1" = "-m" ] && [ "$2" = "venv" ] && [ -n "$3" ]; then
+    mkdir -p "$3/bin"
+fi
+"""
+
+
+def create_fake_tools(bin_dir: str):
+    """
+    Create fake buildozer, git and python executables in the provided directory.
+    """
+    fakes = {
+        "buildozer": FAKE_BUILDOZER,
+        "git": FAKE_GIT,
+        f"python{PYTHON_VERSION}": FAKE_PYTHON,
+    }
+    for name, code in fakes.items():
+        path = os.path.join(bin_dir, name)
+        with open(path, "w", encoding="utf-8") as fd:
+            fd.write(f"#!/bin/sh\n{code.lstrip()}exit 0\n")
+        os.chmod(path, 0o755)
+
+
+def io_syscalls() -> Optional[int]:
+    """
+    Returns the number of read and write syscalls made by this process, None if not supported.
+    """
+    try:
+        with open("/proc/self/io", "r") as fd:
+            counters = dict(line.split(":", 1) for line in fd.read().splitlines())
+        return int(counters["syscr"]) + int(counters["syscw"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def peak_rss_kb() -> int:
+    """
+    Returns the peak resident set size of this process in kilobytes.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Returns the percentile of values using linear interpolation.
+    """
+    values = sorted(values)
+    if not values:
+        return 0.0
+
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def generate_project(name: str, flavor: str, update: bool):
+    """
+    Generate a project in the current working directory.
+    """
+    MakeProjectCommand.makeproject(
+        name=name,
+        appname="BenchApp",
+        owner_name="Bench Mark",
+        owner_email="bench@example.com",
+        update=update,
+        no_kivymd=flavor == "kivy",
+        python_version=PYTHON_VERSION,
+        git_init=True,
+        license="mit",
+    )
+
+
+def run_worker(count: int, target_dir: str, flavor: str, update: bool) -> Dict:
+    """
+    Generate the projects and return the collected metrics.
+    """
+    # The generator sleeps for effect and asks for confirmation at the end
+    time.sleep = lambda *args: None
+    builtins.input = lambda *args: "n"
+
+    os.chdir(target_dir)
+    names = [f"project{index}" for index in range(count)]
+
+    if update:
+        # Projects to update are generated beforehand and not measured
+        for name in names:
+            generate_project(name, flavor, update=False)
+
+    latencies = []
+    syscalls_before = io_syscalls()
+
+    for name in names:
+        start = time.perf_counter()
+        generate_project(name, flavor, update=update)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    syscalls_after = io_syscalls()
+
+    return {
+        "projects": count,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "io_syscalls_per_project": (
+            round((syscalls_after - syscalls_before) / count, 1)
+            if syscalls_before is not None else None
+        ),
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def target_dirs(targets: List[str], disk_dir: Optional[str]) -> Dict[str, str]:
+    """
+    Returns the base directories to generate projects into, keyed by target name.
+    """
+    dirs = {}
+    for target in targets:
+        if target == "tmpfs":
+            if os.path.isdir("/dev/shm"):
+                dirs[target] = "/dev/shm"
+            else:
+                click.echo("Skipping tmpfs target, /dev/shm is not available", err=True)
+        else:
+            dirs[target] = disk_dir or tempfile.gettempdir()
+    return dirs
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Returns the regressions of results compared to the baseline.
+    """
+    regressions = []
+    for config, metrics in results.items():
+        for metric in GATED_METRICS:
+            expected = baseline.get(config, {}).get(metric)
+            actual = metrics.get(metric)
+
+            if expected is None or actual is None:
+                continue
+
+            if metric in LATENCY_METRICS and metrics.get("projects", 0) < MIN_LATENCY_SAMPLES:
+                continue
+
+            if actual > expected * (1 + tolerance):
+                regressions.append(
+                    f"{config}: {metric} {actual} > {expected} "
+                    f"(+{actual / expected - 1:.0%}, tolerance +{tolerance:.0%})"
+                )
+    return regressions
+
+
+@click.command()
+@click.option("--counts", default="1,100,1000", help="Comma-separated numbers of projects to generate.")
+@click.option("--targets", default="tmpfs,disk", help="Comma-separated output targets, 'tmpfs' and/or 'disk'.")
+@click.option("--flavors", default="kivy,kivymd", help="Comma-separated flavors, 'kivy' and/or 'kivymd'.")
+@click.option("--update-modes", default="create,update", help="Comma-separated modes, 'create' and/or 'update' (with --update).")
+@click.option("--disk-dir", default=None, help="Directory on disk to generate projects into. Defaults to the temp directory.")
+@click.option("--baseline", default=DEFAULT_BASELINE, help="Baseline file to compare against.")
+@click.option("--write-baseline", is_flag=True, default=False, help="Write the results as the new baseline.")
+@click.option("--tolerance", default=0.25, help="Allowed regression ratio before failing.")
+@click.option("--worker", default=None, hidden=True)
+@click.option("--result-file", default=None, hidden=True)
+def main(counts, targets, flavors, update_modes, disk_dir, baseline, write_baseline, tolerance, worker, result_file):
+    """
+    Benchmark project generation and compare against the baseline.
+    """
+    if worker:
+        # Worker process, generation output is discarded
+        config = json.loads(worker)
+        with open(os.devnull, "w") as devnull:
+            os.dup2(devnull.fileno(), 1)
+            result = run_worker(config["count"], config["target_dir"], config["flavor"], config["mode"] == "update")
+
+        with open(result_file, "w", encoding="utf-8") as fd:
+            json.dump(result, fd)
+        return
+
+    results = {}
+    fakes_dir = tempfile.mkdtemp(prefix="kivystart-bench-bin-")
+    create_fake_tools(fakes_dir)
+    env = {**os.environ, "PATH": fakes_dir + os.pathsep + os.environ.get("PATH", "")}
+
+    try:
+        for target, base_dir in target_dirs(targets.split(","), disk_dir).items():
+            for flavor in flavors.split(","):
+                for mode in update_modes.split(","):
+                    for count in (int(c) for c in counts.split(",")):
+                        config = f"{flavor}-{target}-{mode}-{count}"
+                        work_dir = tempfile.mkdtemp(prefix="kivystart-bench-", dir=base_dir)
+                        result_path = os.path.join(fakes_dir, f"{config}.json")
+
+                        try:
+                            subprocess.run([
+                                sys.executable, __file__,
+                                "--worker", json.dumps({"count": count, "target_dir": work_dir, "flavor": flavor, "mode": mode}),
+                                "--result-file", result_path,
+                            ], env=env, check=True)
+
+                            with open(result_path, "r", encoding="utf-8") as fd:
+                                results[config] = json.load(fd)
+                        finally:
+                            shutil.rmtree(work_dir, ignore_errors=True)
+
+                        metrics = results[config]
+                        click.echo(
+                            f"{config:<28} p50 {metrics['p50_ms']:>8.2f} ms  p90 {metrics['p90_ms']:>8.2f} ms  "
+                            f"p99 {metrics['p99_ms']:>8.2f} ms  io syscalls/project {metrics['io_syscalls_per_project']}  "
+                            f"peak rss {metrics['peak_rss_kb']} KB"
+                        )
+    finally:
+        shutil.rmtree(fakes_dir, ignore_errors=True)
+
+    if write_baseline:
+        with open(baseline, "w", encoding="utf-8") as fd:
+            json.dump(results, fd, indent=2, sort_keys=True)
+            fd.write("\n")
+        click.echo(f"Baseline written to '{baseline}'")
+        return
+
+    if not os.path.isfile(baseline):
+        click.echo(f"No baseline found at '{baseline}', run with --write-baseline first", err=True)
+        return
+
+    with open(baseline, "r", encoding="utf-8") as fd:
+        regressions = compare(results, json.load(fd), tolerance)
+
+    if regressions:
+        click.echo("Performance regressions:", err=True)
+        for regression in regressions:
+            click.echo(f"  {regression}", err=True)
+        sys.exit(1)
+    click.echo("No performance regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+KivyStart, a package for creating MVC-like Kivy projects.
+"""
+from kivystart.version import __version__
@@ -4,8 +4,11 @@ Module for creating project structures for a kivy project.
 """
 import re
 import os
+import sys
+import json
 import click
 import time
+import contextlib
 
 from typing import Optional, List
 
@@ -15,6 +18,11 @@ from kivystart.commands import (
 from kivystart.licenses import LICENSES
 from kivystart.ansi import art
 from kivystart.utils.base import click_echo
+from kivystart.registry import registry
+from kivystart.version import __version__ as kivystart_version
+
+# The modules of the other commands (server, bundles, bytecode, atlases...) are imported by the commands using
+# them, so that every command and --version only pay for the imports they need.
 
 
 @click.group(invoke_without_command=True)
@@ -25,7 +33,8 @@ def cli(ctx, version):
     KivyStart CLI - Manage your projects with ease.
     """
     # Add current directory to python path
-    if not version:
+    if not version and sys.stdout.isatty():
+        # No banner when the output is piped e.g. an archive or JSON metrics
         click_echo(art, prefix="", fg="red", bold=True)
         click_echo("🚀 KivyStart - Your Dynamic Kivy Project Generator 🚀", prefix="", bold=True, fg="red")
         click_echo("\n", prefix="")
@@ -44,7 +53,7 @@ def cli(ctx, version):
 @click.option('-nb', '--no-buildozer', is_flag=True, default=False, help="Condition on whether to create a buildozer file. Defaults to False.")
 @click.option('-U', '--update', is_flag=True, default=False, help="This updates an existing project with new data. This will recreate dynamic files and create static files if they don't exist.")
 @click.option('-nmd', "--no-kivymd", is_flag=True, default=False, help="Add this flag if you want strictly the Kivy version of the project (removing KivyMD support).")
-@click.option('-t', '--template', default='basic', type=click.Choice(["basic", "navigation", "game"]), help="The template for the project (e.g., 'basic', 'navigation', 'game'). Some templates will be coming soon.")
+@click.option('-t', '--template', default='basic', help="The template for the project (e.g., 'basic'). Run 'kivystart templates' to list the installed templates.")
 @click.option('-pkg', '--package-name', default=None, help="The package name for the project (e.g., 'com.example.myapp').")
 @click.option('-py', '--python-version', default='3.9', help="The Python version to use in the project (e.g., '3.10').")
 @click.option('-nv', '--no-venv', is_flag=True, default=False, help="Skip creation of a virtual environment.")
@@ -54,6 +63,19 @@ def cli(ctx, version):
 @click.option('-git', '--git-init', is_flag=True, default=False, help="Initialize a Git repository for the project.")
 @click.option('-l', '--license', default=None, help=f"Add a LICENSE file with the specified license. Available options are {tuple(LICENSES.keys())}.")
 @click.option('-kv', "--kivy-version", default=None, help="Minimum kivy version supported")
+@click.option('-bp', "--build-profile", default=None, type=click.Choice(["release"]), help="Build profile to apply to the buildozer.spec. The 'release' profile only packages the app sources and assets, without docs, tests and virtual environments.")
+@click.option('-kvb', "--kv-bundle", is_flag=True, default=False, help="Also combine the kv files into kv_files/bundle.kv, loaded in one parse at startup while it is newer than the kv files.")
+@click.option('-kvc', "--kv-compile", is_flag=True, default=False, help="Compile the kv rules into utils/kv_compiled.py, applied as widgets are created so no kv file is parsed at startup. The compiled rules are checked against the kv files under a headless Kivy mock.")
+@click.option('-sc', "--screens", default=None, help="Comma-separated list of screens to scaffold in components/screens (e.g., 'settings,profile'). Screens are built the first time they are shown and released when inactive.")
+@click.option('-pyc', "--compile-bytecode", is_flag=True, default=False, help="Compile the project sources into bytecode in parallel once generated, so the first launch on this machine or a CI runner doesn't compile them. Android packages are compiled by python-for-android.")
+@click.option("--profile", default=None, help="Record timings and I/O of each step, saved file, render and subprocess call into a Chrome trace / Perfetto JSON file and print a summary.")
+@click.option('-bc', "--build-cache", default=None, help="Shared build cache directory for buildozer, projects using the same directory reuse downloads and builds (e.g. '~/.cache/kivystart').")
+@click.option('-o', "--output-archive", default=None, help="Stream the project into a zip or tar.gz archive instead of a directory (e.g. 'project.zip', 'project.tar.gz' or '-' for stdout).")
+@click.option("--archive-format", default=None, type=click.Choice(["zip", "tar.gz"]), help="Format of the output archive, guessed from the --output-archive extension and 'zip' for stdout if not provided.")
+@click.option('-pc', "--project-cache", default=None, envvar="KIVYSTART_PROJECT_CACHE", help="Project cache directory, projects generated with the same options (apart from the names) are materialized from it. This can also be set using the KIVYSTART_PROJECT_CACHE environment variable.")
+@click.option("--project-cache-size", default=512, type=click.IntRange(min=0), help="Maximum size of the project cache in MB, least recently used projects are evicted first.")
+@click.option("--project-cache-link", default="reflink", type=click.Choice(["reflink", "copy"]), help="How files are materialized from the project cache, reflinked (copy on write, falls back to a copy) or copied.")
+@click.option("--server", default=None, envvar="KIVYSTART_SERVER", help="Socket of a running 'kivystart serve' to generate the project with, this can also be set using the KIVYSTART_SERVER environment variable.")
 def makeproject(
     name: str,
     appname: str,
@@ -71,6 +93,19 @@ def makeproject(
     git_init: bool,
     license: Optional[str],
     kivy_version: Optional[str],
+    build_cache: Optional[str],
+    build_profile: Optional[str],
+    compile_bytecode: bool,
+    screens: Optional[str],
+    kv_compile: bool,
+    kv_bundle: bool,
+    profile: Optional[str],
+    output_archive: Optional[str],
+    archive_format: Optional[str],
+    project_cache: Optional[str],
+    project_cache_size: int,
+    project_cache_link: str,
+    server: Optional[str],
 ):
     """
     Creates a Kivy startup project.
@@ -98,40 +133,344 @@ def makeproject(
         owner_name, owner_email = owner.split('<', 1)
         owner_name, owner_email = owner_name.strip(), owner_email.strip(">").strip()
     
-    kivy = "Kivy" if no_kivymd else "KivyMD"
-    click_echo(f"Creating your {kivy} Project!", fg="red", bold=True)
+    if server:
+        if profile or output_archive:
+            raise MakeProjectError("The profile and output archive options are not supported when generating with a server")
+        
+        from kivystart.api import GenerationOptions
+        from kivystart.server import GenerationServerError, generate_with_server
+        
+        options = GenerationOptions(
+            name = name,
+            appname = appname,
+            update = update,
+            template = template or "basic",
+            owner_name = owner_name,
+            owner_email = owner_email,
+            no_buildozer = no_buildozer,
+            no_kivymd = no_kivymd,
+            package_name = package_name,
+            python_version = python_version,
+            no_venv = no_venv,
+            dependencies = dependencies,
+            theme = theme,
+            default_screen = default_screen,
+            git_init = git_init,
+            license = license,
+            kivy_version = kivy_version,
+            build_cache = build_cache,
+            build_profile = build_profile,
+            compile_bytecode = compile_bytecode,
+            screens = screens,
+            kv_compile = kv_compile,
+            kv_bundle = kv_bundle,
+        )
+        try:
+            result = generate_with_server(server, options)
+        except GenerationServerError as e:
+            raise MakeProjectError(str(e))
+        
+        for message in result.messages:
+            click_echo(message, prefix="")
+        
+        for step, error in result.errors.items():
+            click_echo(f"{step} failed: {error}", fg="red")
+        
+        if not result.success:
+            raise SystemExit(1)
+        click_echo(f"Project created at '{result.destination_dir}' in {result.duration:.2f}s", fg="green", bold=True)
+        return
+    
+    # Messages go to stderr whilst the archive is streamed to stdout
+    to_stderr = contextlib.redirect_stdout(sys.stderr) if output_archive == "-" else contextlib.nullcontext()
+    
+    with to_stderr:
+        kivy = "Kivy" if no_kivymd else "KivyMD"
+        click_echo(f"Creating your {kivy} Project!", fg="red", bold=True)
+        
+        time.sleep(1)
+    
+        click_echo("I'm going to f*ck up your project 😤\n", fg="red", bold=True)
+        time.sleep(2)
+    
+        click_echo("Kidding, I'm going to create an awesome project 😇 ", fg="green", bold=True)
+        time.sleep(1.5)
+    
+        click_echo("Thanks to my creator @digreatbrian 🌟💫\n", fg="green", bold=True)
+        time.sleep(1.5)
+    
+        # Call the make project logic
+        MakeProjectCommand.main(
+            name = name,
+            appname = appname,
+            owner_name = owner_name,
+            owner_email = owner_email,
+            no_buildozer = no_buildozer,
+            update = update,
+            no_kivymd = no_kivymd,
+            template = template or "basic",
+            package_name = package_name,
+            python_version = python_version,
+            no_venv = no_venv,
+            dependencies = dependencies,
+            theme = theme,
+            default_screen = default_screen,
+            git_init = git_init,
+            license = license,
+            kivy_version = kivy_version,
+            build_cache = build_cache,
+            build_profile = build_profile,
+            compile_bytecode = compile_bytecode,
+            screens = screens,
+            kv_compile = kv_compile,
+            kv_bundle = kv_bundle,
+            output_archive = output_archive,
+            archive_format = archive_format,
+            project_cache = project_cache,
+            project_cache_size = project_cache_size * 1024 * 1024,
+            project_cache_link = project_cache_link,
+            profile = profile,
+        )
+
+
+@cli.command()
+def templates():
+    """
+    List the installed app templates.
+    """
+    for info in registry.discover().values():
+        click_echo(f"{info.name} ({info.version})", fg="cyan", bold=True)
+        if info.description:
+            click_echo(info.description, prefix="  ")
+        click_echo(f"Flavors: {', '.join(info.flavors) or '-'}", prefix="  ")
+        click_echo(f"Options: {', '.join(info.options) or '-'}", prefix="  ")
+        click_echo(f"Provided by: {info.value}\n", prefix="  ")
+
+
+@cli.command()
+@click.option("--socket", "socket_path", required=True, help="Path of the unix socket to listen on (e.g. '/run/kivystart.sock').")
+@click.option("-w", "--workers", default=4, type=click.IntRange(min=1), help="Number of projects generated concurrently.")
+@click.option("-q", "--max-queue", default=16, type=click.IntRange(min=1), help="Number of queued generations before new requests are rejected as busy.")
+def serve(socket_path: str, workers: int, max_queue: int):
+    """
+    Keep KivyStart warm and generate projects on requests sent to a unix socket.
+    
+    Use `kivystart makeproject --server SOCKET ...` or set KIVYSTART_SERVER to generate projects with the server.
+    """
+    import asyncio
+    
+    from kivystart.server import GenerationServer, GenerationServerError
+    
+    server = GenerationServer(socket_path, workers=workers, max_queue=max_queue)
+    
+    def on_ready(warm_up):
+        click_echo(f"Loaded app templates {warm_up['app_templates']}, {warm_up['templates']} template files and {warm_up['licenses']} licenses", fg="cyan")
+        for tool, path in warm_up["tools"].items():
+            click_echo(f"{tool}: {path or 'not installed'}", fg="cyan")
+        click_echo(f"Serving on '{socket_path}' with {workers} workers, press Ctrl+C to stop", fg="green", bold=True)
+    
+    try:
+        asyncio.run(server.serve_forever(on_ready=on_ready))
+    except GenerationServerError as e:
+        raise click.ClickException(str(e))
+    click_echo("Server stopped", fg="yellow")
+
+
+@cli.command("server-metrics")
+@click.option("--socket", "socket_path", required=True, envvar="KIVYSTART_SERVER", help="Path of the unix socket the server listens on.")
+def server_metrics(socket_path: str):
+    """
+    Print the queue depth, latencies and counters of a running server as JSON.
+    """
+    from kivystart.server import GenerationServerError, send_request
+    
+    try:
+        response = send_request(socket_path, {"action": "metrics"}, timeout=10)
+    except GenerationServerError as e:
+        raise click.ClickException(str(e))
+    click.echo(json.dumps(response["metrics"], indent=2))
+
+
+@cli.command()
+@click.argument("source_dir", type=click.Path(exists=True, file_okay=False))
+@click.argument("output", type=click.Path(dir_okay=False))
+@click.option("-n", "--name", default=None, help="Name of the template stored in the bundle metadata, defaults to the directory name.")
+def pack(source_dir: str, output: str, name: Optional[str]):
+    """
+    Pack a template directory into a single-file .kspack bundle.
+    
+    KivyStart loads 'kivystart/templates/basic.kspack' instead of the loose template files when it exists.
+    """
+    from kivystart.kspack import KsPackError, pack_directory
+    
+    name = name or os.path.basename(os.path.abspath(source_dir))
+    
+    try:
+        count = pack_directory(source_dir, output, metadata={"name": name})
+    except (KsPackError, OSError) as e:
+        raise click.ClickException(str(e))
+    click_echo(f"Packed {count} files into '{output}' ({os.path.getsize(output)} bytes)", fg="cyan")
+
+
+@cli.command()
+@click.argument("bundle", type=click.Path(exists=True, dir_okay=False))
+@click.argument("destination_dir", type=click.Path(file_okay=False))
+def unpack(bundle: str, destination_dir: str):
+    """
+    Extract the files of a .kspack bundle into a directory.
+    """
+    from kivystart.kspack import KsPack, KsPackError
+    
+    try:
+        with KsPack.open(bundle) as kspack:
+            corrupted = kspack.verify()
+            if corrupted:
+                raise click.ClickException(f"Corrupted files in '{bundle}': {', '.join(corrupted)}")
+            count = kspack.unpack(destination_dir)
+    except (KsPackError, OSError) as e:
+        raise click.ClickException(str(e))
+    click_echo(f"Extracted {count} files into '{destination_dir}'", fg="cyan")
+
+
+@cli.command("compile")
+@click.argument("project_dir", default=".", type=click.Path(exists=True, file_okay=False))
+@click.option("-O", "--optimize", "optimize_levels", multiple=True, default=[0], show_default=True, type=click.IntRange(0, 2), help="Optimization level to compile at, 0 for python, 1 for python -O and 2 for python -OO. Can be repeated.")
+@click.option("-j", "--workers", default=0, type=click.IntRange(min=0), help="Number of parallel workers, 0 for the number of cores.")
+@click.option("-f", "--force", is_flag=True, default=False, help="Recompile files whose bytecode is up to date.")
+@click.option("--patch-spec", is_flag=True, default=False, help="Patch the project buildozer.spec to exclude the host bytecode from the package when it packages every file extension, python-for-android compiles its own.")
+def compile_(project_dir: str, optimize_levels: List[int], workers: int, force: bool, patch_spec: bool):
+    """
+    Compile the Python files of a project into bytecode, in parallel.
+    
+    Bytecode is written to the __pycache__ directories, so modules are not compiled on the first launch on this
+    machine or a CI runner.
+    """
+    from kivystart.buildozer import BuildozerSpec, BuildozerSpecError
+    from kivystart.bytecode import BytecodeError, compile_project, bytecode_spec_fields
+    
+    try:
+        result = compile_project(project_dir, optimize_levels=optimize_levels, workers=workers, force=force)
+    except BytecodeError as e:
+        raise click.ClickException(str(e))
+    
+    click_echo(f"Compiled {len(result.sources)} Python files into {len(result.compiled)} bytecode files", fg="cyan")
+    
+    if patch_spec:
+        spec_path = os.path.join(project_dir, "buildozer.spec")
+        try:
+            spec = BuildozerSpec.read(spec_path)
+            fields = bytecode_spec_fields(spec)
+            if fields:
+                spec.update(fields)
+                spec.write(spec_path)
+        except (BuildozerSpecError, OSError) as e:
+            raise click.ClickException(f"Cannot patch '{spec_path}': {e}")
+        
+        if fields:
+            click_echo(f"Excluded the host bytecode from the package in fields: {list(fields.keys())}", fg="cyan")
+        else:
+            click_echo("Skipping buildozer.spec patch, the host bytecode is already kept out of the package.", fg="yellow")
+    
+    if result.failed:
+        click.echo(result.output, err=True)
+        raise click.ClickException(f"Failed to compile {', '.join(result.failed)}")
+
+
+@cli.group()
+def assets():
+    """
+    Build the assets of a generated project.
+    """
+
+
+@assets.command("build")
+@click.argument("project_dir", default=".", type=click.Path(exists=True, file_okay=False))
+@click.option("--page-size", default=None, type=click.IntRange(min=16), help="Maximum width and height of the atlas pages in pixels. Defaults to 1024.")
+@click.option("--padding", default=None, type=click.IntRange(min=0), help="Transparent pixels between the atlas regions. Defaults to 2.")
+@click.option("-j", "--workers", default=0, type=click.IntRange(min=0), help="Number of worker processes, 0 for the number of cores.")
+@click.option("-f", "--force", is_flag=True, default=False, help="Rebuild the atlases whose images didn't change.")
+def assets_build(project_dir: str, page_size: Optional[int], padding: Optional[int], workers: int, force: bool):
+    """
+    Pack the images of assets/images into Kivy texture atlases in assets/atlas.
+    
+    Each sub directory of assets/images becomes an atlas named after it, the images directly in it go into the
+    'images' atlas. Only the atlases whose images changed since the last build are rebuilt.
+    
+    The project buildozer.spec is patched to package the atlases instead of the images in assets/images.
+    """
+    from kivystart.atlas import AtlasError, atlas_spec_fields, build_atlases, DEFAULT_PAGE_SIZE, DEFAULT_PADDING
+    from kivystart.buildozer import BuildozerSpec, BuildozerSpecError
+    from kivystart.storage import bundled_templates_index, open_template_source
+    
+    page_size = DEFAULT_PAGE_SIZE if page_size is None else page_size
+    padding = DEFAULT_PADDING if padding is None else padding
+    
+    try:
+        result = build_atlases(project_dir, page_size=page_size, padding=padding, workers=workers or None, force=force)
+    except (AtlasError, OSError) as e:
+        raise click.ClickException(str(e))
+    
+    if result.built:
+        click_echo(f"Built atlases {result.built} with {result.regions} regions", fg="cyan")
+    if result.skipped:
+        click_echo(f"Skipped up to date atlases {result.skipped}", fg="cyan")
+    if result.removed:
+        click_echo(f"Removed atlases {result.removed}, their images no longer exist", fg="yellow")
+    if not (result.built or result.skipped or result.removed):
+        click_echo("No images found in assets/images", fg="yellow")
+    
+    spec_path = os.path.join(project_dir, "buildozer.spec")
+    if os.path.isfile(spec_path):
+        try:
+            spec = BuildozerSpec.read(spec_path)
+            fields = atlas_spec_fields(project_dir, spec)
+            if fields:
+                spec.update(fields)
+                spec.write(spec_path)
+        except (BuildozerSpecError, OSError) as e:
+            raise click.ClickException(f"Cannot patch '{spec_path}': {e}")
+        
+        if fields:
+            click_echo(f"Applied atlas packaging to fields: {list(fields.keys())}", fg="cyan")
+    
+    helper_path = os.path.join(project_dir, "utils", "atlas.py")
+    if not os.path.exists(helper_path):
+        # Projects generated before the helper existed
+        templates_dir = "basic.kspack" if "basic.kspack" in bundled_templates_index() else "basic"
+        os.makedirs(os.path.dirname(helper_path), exist_ok=True)
         
-    time.sleep(1)
-    
-    click_echo("I'm going to f*ck up your project 😤\n", fg="red", bold=True)
-    time.sleep(2)
-    
-    click_echo("Kidding, I'm going to create an awesome project 😇 ", fg="green", bold=True)
-    time.sleep(1.5)
-    
-    click_echo("Thanks to my creator @digreatbrian 🌟💫\n", fg="green", bold=True)
-    time.sleep(1.5)
-    
-    # Call the make project logic
-    MakeProjectCommand.main(
-        name = name,
-        appname = appname,
-        owner_name = owner_name,
-        owner_email = owner_email,
-        no_buildozer = no_buildozer,
-        update = update,
-        no_kivymd = no_kivymd,
-        template = template or "basic",
-        package_name = package_name,
-        python_version = python_version,
-        no_venv = no_venv,
-        dependencies = dependencies,
-        theme = theme,
-        default_screen = default_screen,
-        git_init = git_init,
-        license = license,
-        kivy_version = kivy_version,
+        with open(helper_path, "w", encoding="utf-8") as helper:
+            helper.write(open_template_source(f"{templates_dir}/base").read_text("utils/atlas.py"))
+        click_echo("Created utils/atlas.py to reference the atlas regions", fg="cyan")
+
+
+@cli.command("profile-app")
+@click.argument("reports", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("-n", "--top", default=10, type=click.IntRange(min=0), help="Number of the slowest imports to show.")
+@click.option("--json", "as_json", is_flag=True, default=False, help="Print the summary as JSON.")
+def profile_app(reports: List[str], top: int, as_json: bool):
+    """
+    Summarize the start-up reports of a generated app.
+    
+    Run the app with KIVYSTART_STARTUP_PROFILE=startup.json to record a report, timings of several reports are
+    aggregated by median.
+    """
+    from kivystart.startup_report import (
+        StartupReportError,
+        load_startup_report,
+        summarize_startup_reports,
+        format_startup_summary,
     )
+    
+    try:
+        summary = summarize_startup_reports([load_startup_report(path) for path in reports])
+    except StartupReportError as e:
+        raise click.ClickException(str(e))
+    
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+    else:
+        click.echo(format_startup_summary(summary, top=top))
 
 
 if __name__ == "__main__":
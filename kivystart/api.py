@@ -0,0 +1,296 @@
+"""
+Library API for generating projects.
+
+Unlike the CLI, the API never prints, prompts or exits, a `GenerationResult` is returned instead. Steps run
+in an executor so that file I/O doesn't block the event loop and external tools (git, venv, buildozer) run as
+asyncio subprocesses, many projects can be generated concurrently from one event loop.
+
+Example Usage:
+    options = GenerationOptions(name="demo", appname="DemoApp", destination="/srv/projects", no_venv=True)
+    result = await create_project_async(options)
+
+    if not result.success:
+        print(result.errors)
+
+    # Generate in memory, nothing is written to disk
+    project = create_virtual_project(GenerationOptions(name="demo", appname="DemoApp"))
+    print(project.text("main.py"))
+"""
+import os
+import time
+import asyncio
+import contextvars
+import subprocess
+
+from concurrent.futures import Executor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+from kivystart.commands import MakeProjectCommand, MakeProjectError
+from kivystart.profiler import profile_span
+from kivystart.output import ProjectOutput
+from kivystart.virtual import VirtualProject
+from kivystart.utils.base import (
+    joinpaths,
+    expand_exception,
+    set_echo_handler,
+    set_command_runner,
+)
+
+
+class GenerationCancelled(Exception):
+    """
+    Raised in a running step when its generation has been cancelled.
+    """
+
+
+@dataclass
+class GenerationOptions:
+    """
+    Options for generating a project, these match the makeproject command options.
+    """
+    name: str
+    appname: str
+    destination: Optional[str] = None  # Directory to create the project in, defaults to the current directory
+    update: bool = False
+    template: str = "basic"
+    owner_name: Optional[str] = None
+    owner_email: Optional[str] = None
+    no_buildozer: bool = False
+    no_kivymd: bool = False
+    package_name: Optional[str] = None
+    python_version: str = "3.11"
+    no_venv: bool = False
+    dependencies: List[str] = field(default_factory=list)
+    theme: Optional[str] = None
+    default_screen: Optional[str] = None
+    git_init: bool = False
+    license: Optional[str] = None
+    kivy_version: Optional[str] = None
+    build_cache: Optional[str] = None
+    build_profile: Optional[str] = None
+    compile_bytecode: bool = False
+    screens: Optional[str] = None
+    kv_compile: bool = False
+    kv_bundle: bool = False
+
+    @property
+    def destination_dir(self) -> str:
+        """
+        Returns the project directory.
+        """
+        return joinpaths(os.path.abspath(self.destination or "."), self.name)
+
+    def template_options(self) -> Dict:
+        """
+        Returns the keyword arguments for initializing the app template.
+        """
+        options = asdict(self)
+        for key in ("name", "destination", "update", "template"):
+            del options[key]
+        options["projectname"] = self.name
+        return options
+
+
+@dataclass
+class GenerationResult:
+    """
+    Result of generating a project.
+    """
+    destination_dir: str
+    success: bool = False
+    files: List[str] = field(default_factory=list)  # Saved files relative to destination_dir
+    messages: List[str] = field(default_factory=list)  # Messages the CLI would have printed
+    errors: Dict[str, str] = field(default_factory=dict)  # Errors keyed by step name
+    tracebacks: Dict[str, str] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)  # Step durations in seconds
+    duration: float = 0.0
+
+
+async def run_command_async(cmd: List[str], check: bool = False, processes: Optional[set] = None, **kwargs) -> subprocess.CompletedProcess:
+    """
+    Runs a command as an asyncio subprocess, this mirrors subprocess.run.
+
+    Args:
+        cmd (List[str]): The command to run.
+        check (bool): Whether to raise CalledProcessError on a non-zero exit status.
+        processes (set): Set in which the running process is kept, for killing it on cancellation.
+        **kwargs: Keyword arguments to parse to asyncio.create_subprocess_exec e.g. cwd, stdout, stderr
+    """
+    process = await asyncio.create_subprocess_exec(*cmd, **kwargs)
+
+    if processes is not None:
+        processes.add(process)
+    try:
+        stdout, stderr = await process.communicate()
+    finally:
+        if processes is not None:
+            processes.discard(process)
+
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def validate_options(options: GenerationOptions):
+    """
+    Validate generation options the same way the makeproject command does.
+    """
+    if not options.appname.endswith("App"):
+        raise MakeProjectError("The appname does not follow standard recommendations. App name must have a suffix 'App' e.g. (DemoApp)")
+
+
+async def create_project_async(
+    options: GenerationOptions,
+    executor: Optional[Executor] = None,
+    output: Optional[ProjectOutput] = None,
+) -> GenerationResult:
+    """
+    Generate a project asynchronously.
+
+    Steps are executed in order in the provided executor (the loop's default executor if None), a failing
+    step is recorded in the result and the remaining steps still run, except when the first step fails.
+
+    On cancellation, running subprocesses are killed, remaining steps are skipped and CancelledError is
+    raised. A step which is already running in the executor finishes in the background.
+
+    Args:
+        options (GenerationOptions): The generation options.
+        executor (Executor): Executor for running steps.
+        output (ProjectOutput): Output to save files to instead of the destination directory e.g. an
+            `ArchiveOutput` streaming into an HTTP response. The output is not closed.
+
+    Returns:
+        GenerationResult: The generation result.
+    """
+    validate_options(options)
+
+    loop = asyncio.get_running_loop()
+    result = GenerationResult(destination_dir=options.destination_dir)
+    processes = set()
+    cancelled = False
+
+    app_template = MakeProjectCommand.create_app_template(options.template, **options.template_options())
+    app_template.destination_dir = result.destination_dir
+    app_template.output = output
+
+    def run_command(cmd, **kwargs):
+        # Called from the executor, the subprocess itself is managed by the event loop
+        if cancelled:
+            raise GenerationCancelled(f"Generation of '{options.name}' was cancelled")
+        
+        # Output is captured rather than printed
+        kwargs.setdefault("stdout", subprocess.PIPE)
+        kwargs.setdefault("stderr", subprocess.PIPE)
+        future = asyncio.run_coroutine_threadsafe(run_command_async(cmd, processes=processes, **kwargs), loop)
+        return future.result()
+
+    def run_step(step):
+        with profile_span(step.__class__.__name__, "step"):
+            step.action()
+
+    # Steps run in their own context so that messages and subprocesses are handled per generation
+    context = contextvars.copy_context()
+    context.run(set_echo_handler, result.messages.append)
+    context.run(set_command_runner, run_command)
+
+    start = time.perf_counter()
+    steps = app_template.get_steps(update=options.update)
+
+    try:
+        for index, step in enumerate(steps):
+            name = step.__class__.__name__
+            step_start = time.perf_counter()
+
+            try:
+                await loop.run_in_executor(executor, context.run, run_step, step)
+            except Exception as e:
+                result.errors[name] = str(e)
+                result.tracebacks[name] = expand_exception(e)
+
+                if index == 0:
+                    # Other steps depend on the first step
+                    break
+            finally:
+                result.timings[name] = time.perf_counter() - step_start
+    except asyncio.CancelledError:
+        cancelled = True
+        for process in list(processes):
+            if process.returncode is None:
+                process.kill()
+        raise
+
+    result.files = list(app_template.saved_files)
+    result.success = not result.errors
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def create_project(options: GenerationOptions, output: Optional[ProjectOutput] = None) -> GenerationResult:
+    """
+    Generate a project synchronously, the synchronous counterpart of `create_project_async`.
+
+    Args:
+        options (GenerationOptions): The generation options.
+        output (ProjectOutput): Output to save files to instead of the destination directory.
+
+    Returns:
+        GenerationResult: The generation result.
+    """
+    validate_options(options)
+
+    result = GenerationResult(destination_dir=options.destination_dir)
+    app_template = MakeProjectCommand.create_app_template(options.template, **options.template_options())
+    app_template.destination_dir = result.destination_dir
+    app_template.output = output
+
+    def run_steps():
+        set_echo_handler(result.messages.append)
+
+        for index, step in enumerate(app_template.get_steps(update=options.update)):
+            name = step.__class__.__name__
+            step_start = time.perf_counter()
+
+            try:
+                with profile_span(name, "step"):
+                    step.action()
+            except Exception as e:
+                result.errors[name] = str(e)
+                result.tracebacks[name] = expand_exception(e)
+
+                if index == 0:
+                    # Other steps depend on the first step
+                    break
+            finally:
+                result.timings[name] = time.perf_counter() - step_start
+
+    start = time.perf_counter()
+    contextvars.copy_context().run(run_steps)
+
+    result.files = list(app_template.saved_files)
+    result.success = not result.errors
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def create_virtual_project(options: GenerationOptions, project: Optional[VirtualProject] = None) -> VirtualProject:
+    """
+    Generate a project in memory.
+
+    Args:
+        options (GenerationOptions): The generation options, the destination is not used.
+        project (VirtualProject): Existing project to generate into e.g. with `options.update`.
+
+    Returns:
+        VirtualProject: The generated project.
+
+    Raises:
+        MakeProjectError: If a step fails.
+    """
+    project = project if project is not None else VirtualProject()
+    result = create_project(options, output=project)
+
+    if not result.success:
+        step, error = next(iter(result.errors.items()))
+        raise MakeProjectError(f"Error executing step '{step}': {error}")
+    return project
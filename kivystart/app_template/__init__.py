@@ -4,10 +4,11 @@ Module containing the App Template class.
 import os
 
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 from kivystart.utils.base import joinpaths
-from kivystart.storage import kivystart_storage
+from kivystart.output import ProjectOutput, DirectoryOutput
+from kivystart.storage import kivystart_storage, open_template_source, TemplateSource
 from kivystart.renderer import KivyTemplateRenderer
 
 
@@ -20,6 +21,9 @@ class Step(ABC):
     """
     Class representing a step/action in project creation.
     """
+    # Whether the step needs the project in a directory on disk e.g. to run external tools in it
+    requires_directory = False
+    
     def __init__(self, app_template, update: bool = False):
         """
         Initialize a Step instance.
@@ -39,6 +43,11 @@ class Step(ABC):
         """
 
 class BaseAppTemplate(ABC):
+    # Template metadata, see `kivystart.registry`
+    description: str = ""
+    flavors: Tuple[str, ...] = ()  # e.g. ('kivy', 'kivymd')
+    options: Tuple[str, ...] = ()  # Supported makeproject options
+    
     def __init__(
         self,
         projectname: str,
@@ -56,6 +65,12 @@ class BaseAppTemplate(ABC):
         git_init: bool = False,
         license: Optional[str] = None,
         kivy_version: Optional[str] = None,
+        build_cache: Optional[str] = None,
+        build_profile: Optional[str] = None,
+        compile_bytecode: bool = False,
+        screens: Optional[str] = None,
+        kv_compile: bool = False,
+        kv_bundle: bool = False,
    ):
         """
         Initializes the base template with parameters for directory structure, project, and app name.
@@ -75,15 +90,62 @@ class BaseAppTemplate(ABC):
         self.git_init = git_init
         self.license = license
         self.kivy_version = kivy_version
+        self.build_cache = build_cache
+        self.build_profile = build_profile
+        self.compile_bytecode = compile_bytecode
+        self.screens = screens
+        self.kv_compile = kv_compile
+        self.kv_bundle = kv_bundle
+        self.destination_dir = None
+        self._output = None
+    
+    @property
+    def output(self) -> ProjectOutput:
+        """
+        Returns the output files are saved to, the destination_dir unless another output is set.
+        """
+        if self._output is None:
+            self._output = DirectoryOutput(self.destination_dir)
+        return self._output
+    
+    @output.setter
+    def output(self, output: Optional[ProjectOutput]):
+        self._output = output
+    
+    @property
+    def source_layers(self) -> Tuple[str, ...]:
+        """
+        Returns the template layers, files of later layers override the files of earlier layers.
+        Defaults to the source_dir only.
+        """
+        return (self.source_dir,)
+    
+    @property
+    def template_source(self) -> TemplateSource:
+        """
+        Returns the source template files are read from, the directories or `.kspack` bundles of the source_layers.
+        """
+        return open_template_source(*self.source_layers)
+    
+    @abstractmethod
+    def get_steps(self, update: bool = False) -> List[Step]:
+        """
+        Returns the steps for creating the project, arranged in order of execution.
+        
+        Args:
+            update (bool): Condition to update an existing project for the specified fields
+        """
     
     @abstractmethod
-    def create_project(self, destination_dir: str, update: bool = False):
+    def create_project(self, destination_dir: str, update: bool = False, output: Optional[ProjectOutput] = None, cache=None):
         """
         Create the project structure in the provided directory.
         
         Args:
             destination_dir (str): The destination directory to put the project into
             update (bool): Condition to update an existing project for the specified fields
+            output (ProjectOutput): Output to save files to instead of the destination directory e.g. an archive.
+            cache (ProjectCache): Project cache to generate the project from, templates not supporting it ignore it.
         """
 
 
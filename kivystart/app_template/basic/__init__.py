@@ -2,15 +2,15 @@
 Basic App Template
 """
 import os
+import re
 import click
 import time
 import sys
-import shutil
-import pathlib
+import tempfile
 import webbrowser
 import subprocess
 
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 from kivystart.app_template import (
     BaseAppTemplate,
@@ -22,13 +22,19 @@ from kivystart.utils.base import (
     joinpaths,
     expand_exception,
     click_echo,
+    run_command,
+    find_executable,
 )
 from kivystart.utils.dateutils import gmt_date
-from kivystart.storage import kivystart_storage
+from kivystart.storage import bundled_templates_index
+from kivystart.output import ProjectOutput, DirectoryOutput
 from kivystart.renderer import KivyTemplateRenderer
 from kivystart.app_template.basic.steps import (
+    ApplyBuildProfileStep,
+    CompileBytecodeStep,
     CreateAssetsStep,
     CreateComponentsStep,
+    CreateScreensStep,
     CreateControllersStep,
     CreateCodeOwnersStep,
     CreateKvFilesStep,
@@ -36,12 +42,20 @@ from kivystart.app_template.basic.steps import (
     FinalTouchesStep,
 )
 from kivystart.version import __version__
-from kivystart.buildozer import update_buildozer_spec
+from kivystart.profiler import profile_span, get_profiler
+from kivystart.buildozer import (
+    BuildozerSpec,
+    render_buildozer_spec,
+    build_cache_spec_fields,
+    BUILDOZER_SPEC_DEFAULTS,
+)
 
 
 # Initialize template renderer
 TemplateRenderer = KivyTemplateRenderer()
 
+SCREEN_NAME_PATTERN = re.compile(r"^[a-z][a-z0-9_]*$")
+
 
 class CreateRootFilesStep(Step):
     def create_license(self, license_heading, license_body):
@@ -49,20 +63,17 @@ class CreateRootFilesStep(Step):
         Create a LICENSE file.
         """
         template_content = ""
-        template = joinpaths(self.app_template.source_dir, "LICENSE.kivytemplate")
-        
-        with open(template, "r") as fd:
-            template_content = fd.read()
+        template_content = self.app_template.template_source.read_text("LICENSE.kivytemplate")
         
         # render license template
-        TemplateRenderer.set_context({
+        context = {
             "fullname": self.app_template.owner_name or "<Your Fullname here>",
             "license_heading": license_heading or "<License Heading here>",
             "license_body": license_body or "<License Body here>",
-        })
+        }
         
         # Render template
-        content = TemplateRenderer.render(template_content)
+        content = TemplateRenderer.render(template_content, context=context)
         
         # Save the LICENSE file
         mode = "x" if not self.update else "w"
@@ -73,10 +84,7 @@ class CreateRootFilesStep(Step):
         Create README.md file
         """
         readme_content = ""
-        readme = joinpaths(self.app_template.source_dir, "README.md")
-        
-        with open(readme, "r") as fd:
-            readme_content = fd.read()
+        readme_content = self.app_template.template_source.read_text("README.md")
             
         # No need for rendering this readme
         # Save the LICENSE file
@@ -88,13 +96,10 @@ class CreateRootFilesStep(Step):
         Create main.py file
         """
         main_py_content = ""
-        template = joinpaths(self.app_template.source_dir, "main.py.kivytemplate")
-        
-        with open(template, "r") as fd:
-            main_py_content = fd.read()
+        main_py_content = self.app_template.template_source.read_text("main.py.kivytemplate")
         
         # render main.py template
-        TemplateRenderer.set_context({
+        context = {
             "kivystart_version": __version__,
             "owner_name": self.app_template.owner_name,
             "owner_email": self.app_template.owner_email,
@@ -102,32 +107,25 @@ class CreateRootFilesStep(Step):
             "kivy_version": self.app_template.kivy_version,
             "owner_email": self.app_template.owner_email,
             "projectname": self.app_template.projectname,
-            "creation_date": gmt_date(),
-        })
+            "creation_date": self.app_template.creation_date,
+        }
         
         # Render template
-        content = TemplateRenderer.render(main_py_content)
+        content = TemplateRenderer.render(main_py_content, context=context)
         
         mode = "x" if not self.update else "w"
         self.app_template.save_file("main.py", content=content, mode=mode)
     
-    def create_buildozer_spec(self):
+    def buildozer_spec_fields(self) -> Dict:
         """
-        Create a buildozer.spec file
-        """
-        cmd = ["buildozer", "init"]
-        return subprocess.run(cmd)
-    
-    def apply_buildozer_spec_patches(self) -> Dict:
-        """
-        Updates the buildozer.spec file with the provided fields
+        Returns the buildozer.spec fields to fill or patch for this project
         
         Returns:
-            Dict: The updated fields
+            Dict: The fields and their values
         """
-        buildozer_spec_path = joinpaths(self.app_template.destination_dir, "buildozer.spec")
+        appname = self.app_template.appname
         fields = {
-            "title": self.app_template.appname.rstrip("App"),
+            "title": appname[:-len("App")] if appname.endswith("App") else appname,
             "requirements": "python3,kivy"
         }
         
@@ -143,13 +141,70 @@ class CreateRootFilesStep(Step):
         if self.app_template.python_version:
             fields["osx.python_version"] = self.app_template.python_version.split('.', 1)[0]
         
-        if self.app_template.no_kivymd:
+        if not self.app_template.no_kivymd:
             fields["requirements"] += ",kivymd"
         
         if self.app_template.dependencies:
             fields["requirements"] += "," + ",".join(self.app_template.dependencies)
         
-        content = update_buildozer_spec(buildozer_spec_path, fields, strict_fields=["title"])
+        if self.app_template.build_cache:
+            app_id = f"{BUILDOZER_SPEC_DEFAULTS['package.domain']}.{fields.get('package.name') or appname.lower()}"
+            fields.update(build_cache_spec_fields(self.app_template.build_cache, app_id))
+        return fields
+        
+    def create_buildozer_spec(self) -> Dict:
+        """
+        Create a buildozer.spec file by rendering the bundled buildozer.spec template.
+        
+        Returns:
+            Dict: The filled fields
+        """
+        fields = self.buildozer_spec_fields()
+        content = render_buildozer_spec(fields)
+        
+        mode = "x" if not self.update else "w"
+        self.app_template.save_file("buildozer.spec", content, mode=mode)
+        return fields
+    
+    def create_buildozer_spec_with_buildozer(self) -> Optional[str]:
+        """
+        Create a buildozer.spec file using `buildozer init`, this is only used as a fallback
+        if the bundled buildozer.spec template is not available.
+        
+        Returns:
+            str: The created buildozer.spec content or None if it wasn't created
+        """
+        # Run in a private directory so that concurrent generations never share a buildozer.spec
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cmd = ["buildozer", "init"]
+            result = run_command(cmd, cwd=tmpdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            spec_path = joinpaths(tmpdir, "buildozer.spec")
+            
+            if result.returncode != 0 or not os.path.isfile(spec_path):
+                return None
+            
+            with open(spec_path, "r", encoding="utf-8") as fd:
+                return fd.read()
+    
+    def apply_buildozer_spec_patches(self, content: Optional[str] = None) -> Dict:
+        """
+        Updates the buildozer.spec file with the provided fields
+        
+        Args:
+            content (str): The buildozer.spec content to patch, the existing buildozer.spec is read if None.
+        
+        Returns:
+            Dict: The updated fields
+        """
+        fields = self.buildozer_spec_fields()
+        
+        if content is None:
+            content = self.app_template.output.read("buildozer.spec").decode("utf-8")
+        
+        # Patch all fields in one pass
+        spec = BuildozerSpec.parse(content)
+        spec.update(fields, strict_fields=["title"])
+        content = spec.dumps()
         mode = "w"
                
         # Save new buildozer.spec file
@@ -161,18 +216,15 @@ class CreateRootFilesStep(Step):
         Create requirements.txt file
         """
         requirements_content = ""
-        template = joinpaths(self.app_template.source_dir, "requirements.txt.kivytemplate")
-        
-        with open(template, "r") as fd:
-            requirements_content = fd.read()
+        requirements_content = self.app_template.template_source.read_text("requirements.txt.kivytemplate")
         
         # render requirements.txt template
-        TemplateRenderer.set_context({
+        context = {
             "dependencies": "\n".join(self.app_template.dependencies)
-        })
+        }
         
         # Render template
-        content = TemplateRenderer.render(requirements_content)
+        content = TemplateRenderer.render(requirements_content, context=context)
         
         mode = "x" if not self.update else "w"
         self.app_template.save_file("requirements.txt", content=content, mode=mode)
@@ -182,18 +234,15 @@ class CreateRootFilesStep(Step):
         Create theme.py file
         """
         theme_content = ""
-        template = joinpaths(self.app_template.source_dir, "theme.py.kivytemplate")
-        
-        with open(template, "r") as fd:
-            theme_content = fd.read()
+        theme_content = self.app_template.template_source.read_text("theme.py.kivytemplate")
         
         # render theme.py template
-        TemplateRenderer.set_context({
+        context = {
             "theme": self.app_template.theme,
-        })
+        }
         
         # Render template
-        content = TemplateRenderer.render(theme_content)
+        content = TemplateRenderer.render(theme_content, context=context)
         
         mode = "x" if not self.update else "w"
         self.app_template.save_file("theme.py", content=content, mode=mode)
@@ -213,8 +262,7 @@ class CreateRootFilesStep(Step):
             click_echo("Skipped LICENSE creation, no license specified", fg="yellow")
         
         # Create README.md
-        readme_fullpath = joinpaths(self.app_template.destination_dir, "README.md")
-        if not os.path.isfile(readme_fullpath):
+        if not self.app_template.output.exists("README.md"):
             self.create_readme()
             click_echo("Created README.md successfully!", fg="cyan")
         else:
@@ -229,45 +277,51 @@ class CreateRootFilesStep(Step):
         
         # Create buildozer spec
         if not self.app_template.no_buildozer:
-            buildozer_success = False
-            try:
-                popen = subprocess.run(["buildozer"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                
-                if not os.path.isfile(joinpaths(self.app_template.destination_dir, "buildozer.spec")):
-                    if self.create_buildozer_spec().returncode == 0:
-                        click_echo("Successfully created buildozer.spec", fg="cyan")
-                    
-                    if os.path.isfile("buildozer.spec"):
-                        shutil.move("buildozer.spec", self.app_template.destination_dir)
-                        click_echo("Successfully moved buildozer.spec to correct directory", fg="cyan")
-                        buildozer_success = True
-                    else:
-                        click_echo("Skipped buildozer.spec move, it doesn't exist in current directory")
-                else:
-                    click_echo("Skipped buildozer init, buildozer.spec exists", fg="yellow")
-                
-            except FileNotFoundError:
-                # buildozer not installed
-                click_echo("Skipping buildozer.spec creation, buildozer is not installed.", fg="yellow")
-            
-            if buildozer_success:
-                try:
+            if self.app_template.output.exists("buildozer.spec"):
+                if self.update:
                     click_echo("Applying buildozer.spec patches", fg="cyan")
                     fields = self.apply_buildozer_spec_patches()
                     click_echo(f"Applied patches to fields: {list(fields.keys())}", fg="cyan")
+                else:
+                    click_echo("Skipped buildozer.spec creation, buildozer.spec exists", fg="yellow")
+            else:
+                try:
+                    fields = self.create_buildozer_spec()
+                    click_echo("Created buildozer.spec successfully!", fg="cyan")
+                    click_echo(f"Filled fields: {list(fields.keys())}", fg="cyan")
                     click_echo("Make sure to do a review on the buildozer.spec", fg="cyan")
                 except FileNotFoundError:
-                    click_echo("Skipping patches, buildozer spec file not found", fg="yellow")
+                    # Bundled template is missing, fallback to buildozer init
+                    click_echo("Bundled buildozer.spec template not found, falling back to buildozer init", fg="yellow")
+                    
+                    if not find_executable("buildozer"):
+                        click_echo("Skipping buildozer.spec creation, buildozer is not installed.", fg="yellow")
+                    else:
+                        content = self.create_buildozer_spec_with_buildozer()
+                        
+                        if content is None:
+                            click_echo("Skipping buildozer.spec creation, buildozer init failed.", fg="yellow")
+                        else:
+                            click_echo("Successfully created buildozer.spec", fg="cyan")
+                            click_echo("Applying buildozer.spec patches", fg="cyan")
+                            fields = self.apply_buildozer_spec_patches(content)
+                            click_echo(f"Applied patches to fields: {list(fields.keys())}", fg="cyan")
+                            click_echo("Make sure to do a review on the buildozer.spec", fg="cyan")
+            
+            if self.app_template.build_cache:
+                ccache_dir = joinpaths(os.path.abspath(os.path.expanduser(self.app_template.build_cache)), "ccache")
+                click_echo(f"Using shared build cache at '{self.app_template.build_cache}'", fg="cyan")
+                click_echo(f"Tip: export USE_CCACHE=1 CCACHE_DIR={ccache_dir} to also share compiled objects between builds", fg="cyan")
         else:
             click_echo("Skipping buildozer.spec creation, no_buildozer flag is enabled.", fg="yellow")
         
         # Create requirements.txt file
-        requirements_fullpath = joinpaths(self.app_template.destination_dir, "requirements.txt")
-        if not os.path.isfile(requirements_fullpath) or self.app_template.dependencies:
+        requirements_exists = self.app_template.output.exists("requirements.txt")
+        if not requirements_exists or self.app_template.dependencies:
             self.create_requirements_txt()
             click_echo("Created requirements.txt successfully!", fg="cyan")
         else:
-            if os.path.isfile(requirements_fullpath):
+            if requirements_exists:
                 click_echo("Skipped requirements.txt creation, already exists", fg="yellow")
             else:
                 click_echo("Skipped requirements.txt creation, no dependencies specified", fg="yellow")
@@ -279,24 +333,60 @@ class CreateRootFilesStep(Step):
 
 class BasicAppTemplate(BaseAppTemplate):
     # Basic app template with Kivy + KivyMD support 
+    description = "MVC-like Kivy project with components, controllers, models and kv files."
+    flavors = ("kivy", "kivymd")
+    options = (
+        "owner", "no_buildozer", "no_kivymd", "package_name", "python_version", "no_venv", "dependencies",
+        "theme", "git_init", "license", "kivy_version", "build_cache", "build_profile", "kv_bundle",
+        "kv_compile", "screens", "compile_bytecode",
+    )
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self.theme and self.theme not in ["dark", "light"]:
             raise AppTemplateError(f"Theme '{self.theme}' not supported for this app template, available themes: ['dark', 'light']")
+        for name in self.screen_names:
+            if not SCREEN_NAME_PATTERN.match(name) or name == "main":
+                raise AppTemplateError(f"Invalid screen name '{name}', screen names must be lowercase identifiers (e.g., 'settings', 'user_profile') other than 'main'")
+        self.saved_files = []  # Files saved in the destination_dir, relative to it
+        self.creation_date = gmt_date()  # Rendered into main.py
+        
+    @property
+    def screen_names(self) -> List[str]:
+        """
+        Returns the names of the screens to scaffold, from the comma-separated screens option.
+        """
+        names = [name.strip() for name in (self.screens or "").split(",")]
+        return list(dict.fromkeys(name for name in names if name))
+        
+    @property
+    def templates_dir(self) -> str:
+        """
+        Returns the resource name of the directory containing the template layers, the packed templates bundle
+        if KivyStart has been installed with one.
+        """
+        if "basic.kspack" in bundled_templates_index():
+            # Packed templates, see `kivystart pack`
+            return "basic.kspack"
+        return "basic"
         
     @property
     def source_dir(self) -> str:
         """
-        Returns the source/base directory for fetching project templates
+        Returns the source directory of the flavor overlay for fetching project templates.
         """
-        if self.no_kivymd:
-            return joinpaths(kivystart_storage, "templates/basic/kivy")
-        else:
-            return joinpaths(kivystart_storage, "templates/basic/kivymd")
+        return joinpaths(self.templates_dir, "kivy" if self.no_kivymd else "kivymd")
+        
+    @property
+    def source_layers(self) -> Tuple[str, ...]:
+        """
+        Returns the shared base layer and the flavor overlay, which only contains the files differing between flavors.
+        """
+        return (joinpaths(self.templates_dir, "base"), self.source_dir)
         
     def save_file(self, filepath: str, content: str, mode: str = "x", makedirs: bool = True):
         """
-        Saves a file in the current app template destination_dir under the provided filepath.
+        Saves a file in the current app template output (the destination_dir by default) under the provided filepath.
         
         Args:
             filepath (str): The filepath of file, provide only filepath if you want to save file in root directory of the destination_dir.
@@ -304,51 +394,75 @@ class BasicAppTemplate(BaseAppTemplate):
             mode (str): Mode for saving file. Defaults to 'x' for saving file if only it doesn't exist.
             makedirs (bool): Whether to create directories if they don't exist.
         """
-        final_file_fullpath = pathlib.Path(joinpaths(self.destination_dir, filepath))
-        final_file_dir = final_file_fullpath.parent
-        
-        if makedirs:
-            # create directories
-            os.makedirs(str(final_file_dir), exist_ok=True)
+        data = content.encode("utf-8")
          
         try:
-             with open(final_file_fullpath, mode, encoding="utf-8") as fd:
-                 fd.write(content)
+             with profile_span(filepath, "save_file") as span:
+                 self.output.write(filepath, data, mode=mode, makedirs=makedirs)
+                 
+                 if get_profiler():
+                     span.update(files=1, bytes=len(data))
+             self.saved_files.append(filepath)
         except FileExistsError:
              raise AppTemplateError(f"Cannot save file, it seems like file '{filepath}' already exists. Try to use --update flag to bypass this.")
              
-    def create_project(self, destination_dir: str, update):
+    def get_steps(self, update: bool = False) -> List[Step]:
         """
-        Create the project structure in the provided directory.
+        Returns the steps for creating the project, arranged in order of execution.
         
         Args:
-            destination_dir (str): The destination directory to put the project into
             update (bool): Condition to update an existing project for the specified fields
-         """
-        self.destination_dir = destination_dir
-        
-        if not os.path.isdir(destination_dir):
-            click_echo("Project destination directory doesn't exist, creating now!", fg="cyan")
-        
-        click_echo(f"Project directory: {destination_dir}", fg="cyan")
-        
-        steps = [
+        """
+        return [
             CreateRootFilesStep(self, update=update),
             CreateAssetsStep(self, update=update),
             CreateComponentsStep(self, update=update),
+            CreateScreensStep(self, update=update),
             CreateControllersStep(self, update=update),
             CreateCodeOwnersStep(self, update=update),
             CreateKvFilesStep(self, update=update),
             CreateModelsAndUtilsStep(self, update=update),
+            ApplyBuildProfileStep(self, update=update),
+            CompileBytecodeStep(self, update=update),
             FinalTouchesStep(self, update=update)
-        ] # steps to execute arranged in order at this point
+        ]
+        
+    def create_project(self, destination_dir: str, update, output: Optional[ProjectOutput] = None, cache=None):
+        """
+        Create the project structure in the provided directory.
+        
+        Args:
+            destination_dir (str): The destination directory to put the project into
+            update (bool): Condition to update an existing project for the specified fields
+            output (ProjectOutput): Output to save files to instead of the destination directory e.g. an archive.
+            cache (ProjectCache): Project cache to generate the project from.
+         """
+        self.destination_dir = destination_dir
+        self.output = output
+        
+        if output is not None and not isinstance(output, DirectoryOutput):
+            click_echo(f"Project output: {output.__class__.__name__}", fg="cyan")
+        else:
+            if not os.path.isdir(destination_dir):
+                click_echo("Project destination directory doesn't exist, creating now!", fg="cyan")
+            
+            click_echo(f"Project directory: {destination_dir}", fg="cyan")
+        
+        steps = self.get_steps(update=update) # steps to execute arranged in order at this point
+        
+        if cache is not None:
+            # Imported on use, generations without a project cache don't pay for it
+            from kivystart.project_cache import use_project_cache
+            
+            steps = use_project_cache(self, steps, cache, update=update)
         
         for step in steps:
             try:
                 if steps.index(step) == len(steps) - 1:
                     # Last step
                     click_echo("Doing some touchups, get ready 🚖", fg="cyan", bold=True)
-                    step.action() # Execute the step.
+                    with profile_span(step.__class__.__name__, "step"):
+                        step.action() # Execute the step.
                     click_echo(f"Completed and finalized the final step '{step.__class__.__name__}'\n", fg="green", bold=True)
                     
                     time.sleep(1.5)
@@ -384,7 +498,8 @@ class BasicAppTemplate(BaseAppTemplate):
                             click_echo("Bad choice, I'm going to f*ck up your projects next tym! 😡", fg="red", bold=True)
 
                 else:
-                    step.action() # Execute the step.
+                    with profile_span(step.__class__.__name__, "step"):
+                        step.action() # Execute the step.
                     click_echo(f"Completed and finalized step '{step.__class__.__name__}'\n", fg="green", bold=True)
             except Exception as e:
                 expanded_exc = expand_exception(e)
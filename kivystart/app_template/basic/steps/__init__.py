@@ -1,5 +1,8 @@
+from .apply_build_profile import ApplyBuildProfileStep
+from .compile_bytecode import CompileBytecodeStep
 from .create_assets import CreateAssetsStep
 from .create_components import CreateComponentsStep
+from .create_screens import CreateScreensStep
 from .create_controllers import CreateControllersStep
 from .create_codeowners import CreateCodeOwnersStep
 from .create_kv_files import CreateKvFilesStep
@@ -0,0 +1,65 @@
+"""
+Apply build profile step
+"""
+import os
+
+from kivystart.app_template import Step
+from kivystart.output import DirectoryOutput
+from kivystart.buildozer import (
+    BuildozerSpec,
+    estimate_payload_size,
+    release_profile_spec_fields,
+)
+from kivystart.utils.base import (
+    joinpaths,
+    click_echo,
+    format_size,
+)
+
+
+class ApplyBuildProfileStep(Step):
+    requires_directory = True
+    
+    def apply_release_profile(self):
+        """
+        Patch the buildozer.spec with the release build profile computed from the generated tree.
+
+        Returns:
+            Dict: The patched fields
+        """
+        buildozer_spec_path = joinpaths(self.app_template.destination_dir, "buildozer.spec")
+        fields = release_profile_spec_fields(self.app_template.destination_dir)
+
+        spec = BuildozerSpec.read(buildozer_spec_path)
+        spec.update(fields)
+        self.app_template.save_file("buildozer.spec", spec.dumps(), mode="w")
+        return fields
+
+    def estimate_payload(self, fields):
+        """
+        Print the projected size of the packaged application sources.
+        """
+        count, size, compressed_size = estimate_payload_size(
+            self.app_template.destination_dir,
+            include_exts=fields["source.include_exts"],
+            exclude_dirs=fields["source.exclude_dirs"],
+            exclude_patterns=fields["source.exclude_patterns"],
+        )
+        click_echo(f"Projected payload: {count} files, {format_size(size)} ({format_size(compressed_size)} compressed)", fg="cyan")
+
+    def action(self):
+        # Main entry point
+        buildozer_spec_path = joinpaths(self.app_template.destination_dir, "buildozer.spec")
+
+        if self.app_template.build_profile != "release":
+            click_echo("Skipping build profile, no build_profile provided.", fg="yellow")
+        elif not isinstance(self.app_template.output, DirectoryOutput):
+            click_echo("Skipping release build profile, project output is not a directory.", fg="yellow")
+        elif self.app_template.no_buildozer or not os.path.isfile(buildozer_spec_path):
+            click_echo("Skipping release build profile, buildozer.spec doesn't exist.", fg="yellow")
+        else:
+            fields = self.apply_release_profile()
+            click_echo(f"Applied release build profile to fields: {list(fields.keys())}", fg="cyan")
+            click_echo(f"Packaged file extensions: {', '.join(fields['source.include_exts'])}", fg="cyan")
+            click_echo("Add the extensions of other kinds of assets to source.include_exts to include them in release builds", fg="cyan")
+            self.estimate_payload(fields)
@@ -0,0 +1,37 @@
+"""
+Compile bytecode step
+"""
+from kivystart.app_template import Step
+from kivystart.output import DirectoryOutput
+from kivystart.utils.base import click_echo
+
+
+class CompileBytecodeStep(Step):
+    requires_directory = True
+    
+    def compile_bytecode(self):
+        """
+        Compile the project sources into bytecode, in parallel. The bytecode matches the Python running KivyStart,
+        it spares the first launch on this machine or a CI runner, python-for-android compiles its own for devices.
+        """
+        # Imported on use, compileall is only needed with the compile_bytecode flag
+        from kivystart.bytecode import BytecodeError, compile_project
+        
+        try:
+            result = compile_project(self.app_template.destination_dir)
+        except BytecodeError as e:
+            click_echo(f"Skipping bytecode compilation, {e}", fg="yellow")
+            return
+        
+        if result.failed:
+            click_echo(f"Failed to compile {', '.join(result.failed)}", fg="yellow")
+        click_echo(f"Compiled {len(result.sources)} Python files into {len(result.compiled)} bytecode files", fg="cyan")
+    
+    def action(self):
+        # Main entry point
+        if not self.app_template.compile_bytecode:
+            click_echo("Skipping bytecode compilation, compile_bytecode flag is not provided.", fg="yellow")
+        elif not isinstance(self.app_template.output, DirectoryOutput):
+            click_echo("Skipping bytecode compilation, project output is not a directory.", fg="yellow")
+        else:
+            self.compile_bytecode()
@@ -1,11 +1,8 @@
 """
 Create assets directory step.
 """
-import os
-import shutil
-
 from kivystart.app_template import Step
-from kivystart.utils.base import joinpaths, click_echo
+from kivystart.utils.base import click_echo
 
 
 class CreateAssetsStep(Step):
@@ -14,18 +11,12 @@ class CreateAssetsStep(Step):
         Create assets directory
         """
         # Create empty assets directory and sub directories
-        assets_destination = joinpaths(self.app_template.destination_dir, "assets")
-        
-        fonts = joinpaths(assets_destination, "fonts")
-        images = joinpaths(assets_destination, "images")
-        
-        os.makedirs(fonts, exist_ok=True)
-        os.makedirs(images, exist_ok=True)
+        self.app_template.output.makedirs("assets/fonts")
+        self.app_template.output.makedirs("assets/images")
     
     def action(self):
         # Main entry point
-        assets_destination = joinpaths(self.app_template.destination_dir, "assets")
-        if os.path.isdir(assets_destination):
+        if self.app_template.output.isdir("assets"):
             click_echo("Skipping assets creation, assets directory already exists", fg="yellow")
         else:
             self.create_assets()
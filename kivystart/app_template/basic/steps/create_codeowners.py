@@ -2,13 +2,11 @@
 Create CODEOWNERS step
 """
 import os
-import pathlib
 
 from kivystart.app_template import Step
 from kivystart.utils.base import (
     joinpaths,
     click_echo,
-    recursive_get_files,
 )
 from kivystart.renderer import KivyTemplateRenderer
 
@@ -21,19 +19,17 @@ class CreateCodeOwnersStep(Step):
         """
         Create the CODEOWNERS file
         """
-        codeowners_template = joinpaths(self.app_template.source_dir, "docs/CODEOWNERS.kivytemplate")
         template_content = ""
         
-        with open(codeowners_template, "r") as fd:
-            template_content = fd.read()
+        template_content = self.app_template.template_source.read_text("docs/CODEOWNERS.kivytemplate")
         
         # render CODEOWNERS template
-        TemplateRenderer.set_context({
+        context = {
             "owner_email": self.app_template.owner_email,
-        })
+        }
         
         # Render template
-        content = TemplateRenderer.render(template_content)
+        content = TemplateRenderer.render(template_content, context=context)
         
         # Save the CODEOWNERS file
         mode = "x" if not self.update else "w"
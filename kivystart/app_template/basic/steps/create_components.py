@@ -2,13 +2,11 @@
 Create components step
 """
 import os
-import pathlib
 
 from kivystart.app_template import Step
 from kivystart.utils.base import (
     joinpaths,
     click_echo,
-    recursive_get_files,
 )
 
 
@@ -17,24 +15,20 @@ class CreateComponentsStep(Step):
         """
         Create the components
         """
-        components_source_dir = joinpaths(self.app_template.source_dir, "components")
-        files = recursive_get_files(components_source_dir, "*.py")
+        template_source = self.app_template.template_source
+        files = template_source.list_files("components", "*.py")
         
-        for file in files:
-            relative_file = pathlib.Path(file).relative_to(self.app_template.source_dir)
-            
-            with open(file, "r", encoding="utf-8", ) as fd:
-                content = fd.read()
+        for relative_file in files:
+            content = template_source.read_text(relative_file)
             
             self.app_template.save_file(
-                str(relative_file),
+                relative_file,
                 content,
                 mode="w" if self.update else "x")
         
     def action(self):
         # Main entry point
-        components_destination = joinpaths(self.app_template.destination_dir, "components")
-        if os.path.isdir(components_destination):
+        if self.app_template.output.isdir("components"):
             if not self.update:
                 click_echo("Skipping components creation, components directory already exists and --update flag is not provided", fg="yellow")
             else:
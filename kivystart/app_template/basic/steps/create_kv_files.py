@@ -2,14 +2,12 @@
 Create kv files step
 """
 import os
-import pathlib
 
 from kivystart.app_template import Step
 from kivystart.renderer import KivyTemplateRenderer
 from kivystart.utils.base import (
     joinpaths,
     click_echo,
-    recursive_get_files,
 )
 
 # Initialize template renderer
@@ -21,21 +19,65 @@ class CreateKvFilesStep(Step):
         """
         Create the kv_files
         """
-        kv_files_source_dir = joinpaths(self.app_template.source_dir, "kv_files")
-        files = recursive_get_files(kv_files_source_dir, "*.kivytemplate")
+        template_source = self.app_template.template_source
+        files = template_source.list_files("kv_files", "*.kivytemplate")
         global_context = {
             "appname": self.app_template.appname,
         }
-        
-        TemplateRenderer.set_context(global_context)
+        rendered = {}
         
         for file in files:
-            relative_file = pathlib.Path(file).relative_to(self.app_template.source_dir)
-            relative_file = str(relative_file).split('.kivytemplate', 1)[0]
+            relative_file = file.split('.kivytemplate', 1)[0]
             
-            with open(file, "r") as fd:
-                content = TemplateRenderer.render(fd.read())
-                self.app_template.save_file(relative_file, content, mode="w" if self.update else "x")
+            content = TemplateRenderer.render(template_source.read_text(file), context=global_context)
+            self.app_template.save_file(relative_file, content, mode="w" if self.update else "x")
+            rendered[relative_file.rsplit("/", 1)[-1]] = content
+        
+        if self.app_template.kv_bundle:
+            self.create_kv_bundle(rendered)
+        
+        if self.app_template.kv_compile:
+            self.create_compiled_kv(rendered)
+    
+    def create_kv_bundle(self, rendered: dict):
+        """
+        Create kv_files/bundle.kv, the kv files combined so they are loaded in one parse by utils/kv_loader.py.
+        The bundle is saved after the kv files, it is only used while it is newer than them.
+        """
+        from kivystart.kvlang import KV_BUNDLE_FILES, KV_BUNDLE_NAME, bundle_kv
+        
+        files = [(name, rendered[name]) for name in KV_BUNDLE_FILES if name in rendered]
+        content = bundle_kv(files)
+        # Always rewritten, the bundle is derived from the kv files
+        self.app_template.save_file(joinpaths("kv_files", KV_BUNDLE_NAME), content, mode="w")
+        click_echo(f"Created kv_files/{KV_BUNDLE_NAME} from {len(files)} kv files", fg="cyan")
+    
+    def create_compiled_kv(self, rendered: dict):
+        """
+        Create utils/kv_compiled.py, the kv rules compiled into Python. The compiled rules are only saved if
+        the widgets they build under a headless Kivy mock match the ones built from the kv files.
+        """
+        from kivystart.kvlang import KV_BUNDLE_FILES, KvParseError, parse_kv
+        from kivystart.kvcompiler import KvCompileError, compile_kv
+        from kivystart.kvmock import verify_compiled
+        
+        sources = {name: rendered[name] for name in KV_BUNDLE_FILES if name in rendered}
+        
+        try:
+            documents = [parse_kv(content, name) for name, content in sources.items()]
+            source = compile_kv(documents, sources)
+        except (KvParseError, KvCompileError) as e:
+            click_echo(f"Skipping kv compilation, {e}", fg="yellow")
+            return
+        
+        differences = verify_compiled(documents, source)
+        if differences:
+            click_echo(f"Skipping kv compilation, compiled rules don't match the kv files: {differences[0]}", fg="yellow")
+            return
+        
+        # Always rewritten, the module is derived from the kv files
+        self.app_template.save_file(joinpaths("utils", "kv_compiled.py"), source, mode="w")
+        click_echo(f"Compiled the rules of {len(sources)} kv files into utils/kv_compiled.py", fg="cyan")
         
     def action(self):
         # Main entry point
@@ -2,10 +2,9 @@
 Create utils and models directories step.
 """
 import os
-import pathlib
 
 from kivystart.app_template import Step
-from kivystart.utils.base import joinpaths, click_echo, recursive_get_files
+from kivystart.utils.base import joinpaths, click_echo
 
 
 class CreateModelsAndUtilsStep(Step):
@@ -13,17 +12,14 @@ class CreateModelsAndUtilsStep(Step):
         """
         Create the models directory
         """
-        models_source_dir = joinpaths(self.app_template.source_dir, "models")
-        files = recursive_get_files(models_source_dir, "*.py")
+        template_source = self.app_template.template_source
+        files = template_source.list_files("models", "*.py")
         
-        for file in files:
-            relative_file = pathlib.Path(file).relative_to(self.app_template.source_dir)
-            
-            with open(file, "r", encoding="utf-8", errors="ignore") as fd:
-                content = fd.read()
+        for relative_file in files:
+            content = template_source.read_text(relative_file)
             
             self.app_template.save_file(
-                str(relative_file),
+                relative_file,
                 content,
                 mode="w" if self.update else "x")
                 
@@ -31,17 +27,14 @@ class CreateModelsAndUtilsStep(Step):
         """
         Create the utils directory
         """
-        utils_source_dir = joinpaths(self.app_template.source_dir, "utils")
-        files = recursive_get_files(utils_source_dir, "*.py")
+        template_source = self.app_template.template_source
+        files = template_source.list_files("utils", "*.py")
         
-        for file in files:
-            relative_file = pathlib.Path(file).relative_to(self.app_template.source_dir)
-            
-            with open(file, "r", encoding='utf-8') as fd:
-                content = fd.read()
+        for relative_file in files:
+            content = template_source.read_text(relative_file)
             
             self.app_template.save_file(
-                str(relative_file),
+                relative_file,
                 content,
                 mode="w" if self.update else "x")
         
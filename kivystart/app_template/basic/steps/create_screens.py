@@ -0,0 +1,143 @@
+"""
+Create screens step
+"""
+import ast
+
+from typing import Dict, Optional
+
+from kivystart.app_template import Step
+from kivystart.utils.base import (
+    joinpaths,
+    click_echo,
+)
+from kivystart.renderer import KivyTemplateRenderer
+
+
+TemplateRenderer = KivyTemplateRenderer()
+
+SCREENS_REGISTRY = "components/screens/__init__.py"
+
+
+def screen_entries(screens: Dict[str, str]) -> str:
+    """
+    Returns the SCREENS entries of screens, one per line.
+    """
+    return "".join(f'    "{name}": "components.screens.{name}_screen:{screen_class}",\n' for name, screen_class in screens.items())
+
+
+def merge_screens_registry(content: str, screens: Dict[str, str]) -> Optional[str]:
+    """
+    Returns the content of a screens registry with the screens missing from its SCREENS dict added at the end of
+    it. The other entries, comments and settings like MAX_SCREENS are kept as they are.
+    
+    Returns None if the registry can't be parsed or SCREENS isn't a dict literal.
+    """
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+    
+    registry = next(
+        (
+            node.value for node in tree.body
+            if isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict)
+            and any(isinstance(target, ast.Name) and target.id == "SCREENS" for target in node.targets)
+        ),
+        None,
+    )
+    if registry is None:
+        return None
+    
+    existing = {key.value for key in registry.keys if isinstance(key, ast.Constant)}
+    missing = {name: screen_class for name, screen_class in screens.items() if name not in existing}
+    
+    if not missing:
+        return content
+    
+    lines = content.splitlines(keepends=True)
+    
+    def offset(lineno: int, col_offset: int) -> int:
+        # ast column offsets are in UTF-8 bytes
+        line = lines[lineno - 1]
+        return sum(len(previous) for previous in lines[:lineno - 1]) + len(line.encode("utf-8")[:col_offset].decode("utf-8"))
+    
+    closing_brace = offset(registry.end_lineno, registry.end_col_offset) - 1
+    line_start = content.rfind("\n", 0, closing_brace) + 1
+    last_value = offset(registry.values[-1].end_lineno, registry.values[-1].end_col_offset) if registry.values else None
+    # Only a comma, blanks and comments can follow the last entry
+    needs_comma = last_value is not None and "," not in content[last_value:closing_brace].split("#", 1)[0]
+    
+    if content[line_start:closing_brace].strip():
+        # The brace follows an entry on the same line e.g. SCREENS = {"home": "..."}
+        content = content[:closing_brace] + "\n" + screen_entries(missing) + content[closing_brace:]
+    else:
+        content = content[:line_start] + screen_entries(missing) + content[line_start:]
+    
+    if needs_comma:
+        # The new entries are inserted after the last value, the offset is unchanged
+        content = content[:last_value] + "," + content[last_value:]
+    return content
+
+
+class CreateScreensStep(Step):
+    def create_screens_registry(self, screens: dict):
+        """
+        Create components/screens/__init__.py, listing the screens MainScreenManager builds lazily.
+        """
+        template_content = self.app_template.template_source.read_text("components/screens/__init__.py.kivytemplate")
+        content = TemplateRenderer.render(template_content, context={"screens": screen_entries(screens)})
+        self.app_template.save_file(SCREENS_REGISTRY, content, mode="x")
+    
+    def update_screens_registry(self, screens: dict):
+        """
+        Add the screens missing from the existing components/screens/__init__.py, keeping the screens and the
+        settings already in it.
+        """
+        content = self.app_template.output.read(SCREENS_REGISTRY).decode("utf-8")
+        merged = merge_screens_registry(content, screens)
+        
+        if merged is None:
+            click_echo(f"Skipping screens registry update, SCREENS in {SCREENS_REGISTRY} isn't a dict literal. Add the screens to it by hand.", fg="yellow")
+        elif merged != content:
+            self.app_template.save_file(SCREENS_REGISTRY, merged, mode="w")
+    
+    def create_screen(self, name: str, screen_class: str):
+        """
+        Create the module of a scaffolded screen, existing screens are kept as they are.
+        """
+        relative_file = joinpaths("components", "screens", f"{name}_screen.py")
+        
+        if self.app_template.output.exists(relative_file):
+            click_echo(f"Skipping {relative_file} creation, already exists", fg="yellow")
+            return
+        
+        template_content = self.app_template.template_source.read_text("components/screens/screen.py.kivytemplate")
+        context = {
+            "screen_class": screen_class,
+            "screen_title": name.replace("_", " ").title(),
+        }
+        content = TemplateRenderer.render(template_content, context=context)
+        self.app_template.save_file(relative_file, content, mode="x")
+        
+    def action(self):
+        # Main entry point
+        screens = {
+            name: "".join(part.capitalize() for part in name.split("_")) + "Screen"
+            for name in self.app_template.screen_names
+        }
+        
+        if not self.app_template.output.exists(SCREENS_REGISTRY):
+            self.create_screens_registry(screens)
+        elif screens:
+            self.update_screens_registry(screens)
+        else:
+            click_echo("Skipping screens registry creation, already exists and no screens provided", fg="yellow")
+            return
+        
+        for name, screen_class in screens.items():
+            self.create_screen(name, screen_class)
+        
+        if screens:
+            click_echo(f"Created screens {list(screens.keys())} successfully!", fg="cyan")
+        else:
+            click_echo("Created screens registry successfully!", fg="cyan")
@@ -0,0 +1,439 @@
+"""
+Texture atlases for the images of generated projects, see `kivystart assets build`.
+
+The images of assets/images are packed into Kivy `.atlas` files in assets/atlas, one atlas per sub directory
+of assets/images and an 'images' atlas for the images directly in it. Regions are packed with the MaxRects
+algorithm (best short side fit) into power of two pages, written as losslessly optimized PNGs.
+
+Builds are incremental: the hashes of the input images and the build options are kept in
+assets/atlas/manifest.json, and only atlases whose inputs changed are rebuilt, in parallel.
+
+The buildozer.spec of the project is patched to package the atlases instead of the images, see
+`atlas_spec_fields`.
+
+Example Usage:
+    result = build_atlases("path/to/project")
+    print(f"Built {result.built}, up to date {result.skipped}")
+"""
+import os
+import json
+import hashlib
+import concurrent.futures
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from kivystart.buildozer import BuildozerSpec
+from kivystart.png import (
+    Image,
+    PngError,
+    PILImage,
+    PNG_EXTENSIONS,
+    PIL_EXTENSIONS,
+    read_image,
+    write_png,
+)
+from kivystart.utils.base import joinpaths
+
+
+ATLAS_SOURCE_DIR = "assets/images"
+ATLAS_OUTPUT_DIR = "assets/atlas"
+ATLAS_MANIFEST = "manifest.json"
+ATLAS_MANIFEST_VERSION = 1
+
+# Atlas of the images directly in assets/images
+ROOT_ATLAS_NAME = "images"
+
+DEFAULT_PAGE_SIZE = 1024
+DEFAULT_PADDING = 2
+
+
+class AtlasError(Exception):
+    """
+    Raised when atlases can't be built.
+    """
+
+
+@dataclass
+class Rect:
+    x: int
+    y: int
+    width: int
+    height: int
+
+    def contains(self, other: "Rect") -> bool:
+        return (
+            self.x <= other.x and self.y <= other.y
+            and self.x + self.width >= other.x + other.width
+            and self.y + self.height >= other.y + other.height
+        )
+
+    def intersects(self, other: "Rect") -> bool:
+        return (
+            self.x < other.x + other.width and other.x < self.x + self.width
+            and self.y < other.y + other.height and other.y < self.y + self.height
+        )
+
+
+class MaxRectsPacker:
+    """
+    Packs rectangles into a page with the MaxRects algorithm, placing each rectangle in the free area leaving
+    the shortest side (best short side fit).
+    """
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.free: List[Rect] = [Rect(0, 0, width, height)]
+        self.used_width = 0
+        self.used_height = 0
+
+    def insert(self, width: int, height: int) -> Optional[Tuple[int, int]]:
+        """
+        Place a rectangle, returns its position or None if it doesn't fit.
+        """
+        best, best_fit = None, None
+
+        for free in self.free:
+            if free.width >= width and free.height >= height:
+                leftover = free.width - width, free.height - height
+                fit = (min(leftover), max(leftover))
+
+                if best_fit is None or fit < best_fit:
+                    best, best_fit = free, fit
+
+        if best is None:
+            return None
+
+        placed = Rect(best.x, best.y, width, height)
+        self.split(placed)
+        self.used_width = max(self.used_width, placed.x + width)
+        self.used_height = max(self.used_height, placed.y + height)
+        return placed.x, placed.y
+
+    def split(self, placed: Rect):
+        """
+        Replace the free areas overlapping a placed rectangle with the maximal areas around it.
+        """
+        free_rects = []
+
+        for free in self.free:
+            if not free.intersects(placed):
+                free_rects.append(free)
+                continue
+
+            if placed.x > free.x:
+                free_rects.append(Rect(free.x, free.y, placed.x - free.x, free.height))
+            if placed.x + placed.width < free.x + free.width:
+                right = placed.x + placed.width
+                free_rects.append(Rect(right, free.y, free.x + free.width - right, free.height))
+            if placed.y > free.y:
+                free_rects.append(Rect(free.x, free.y, free.width, placed.y - free.y))
+            if placed.y + placed.height < free.y + free.height:
+                bottom = placed.y + placed.height
+                free_rects.append(Rect(free.x, bottom, free.width, free.y + free.height - bottom))
+
+        # Drop the areas contained in other areas
+        self.free = [
+            rect for i, rect in enumerate(free_rects)
+            if not any(j != i and other.contains(rect) and (other != rect or j < i) for j, other in enumerate(free_rects))
+        ]
+
+
+def power_of_two(value: int) -> int:
+    size = 1
+    while size < value:
+        size *= 2
+    return size
+
+
+def pack_regions(sizes: Dict[str, Tuple[int, int]], page_size: int, padding: int) -> List[Tuple[Tuple[int, int], Dict[str, Tuple[int, int]]]]:
+    """
+    Pack regions into pages, larger regions first.
+
+    Args:
+        sizes (Dict[str, Tuple[int, int]]): The width and height of each region, by id.
+        page_size (int): The maximum width and height of a page.
+        padding (int): Transparent pixels between regions.
+
+    Returns:
+        List: The size of each page, shrunk to the smallest power of two holding its regions, and the positions
+            of its regions.
+
+    Raises:
+        AtlasError: If a region doesn't fit in a page.
+    """
+    pages: List[Tuple[MaxRectsPacker, Dict[str, Tuple[int, int]]]] = []
+    order = sorted(sizes, key=lambda region: (max(sizes[region]), sizes[region][0] * sizes[region][1], region), reverse=True)
+
+    for region in order:
+        width, height = sizes[region]
+
+        if width > page_size or height > page_size:
+            raise AtlasError(f"Image '{region}' ({width}x{height}) is larger than the atlas page size {page_size}")
+
+        for packer, positions in pages:
+            position = packer.insert(width + padding, height + padding)
+            if position is not None:
+                positions[region] = position
+                break
+        else:
+            # The padding of the regions at the right and bottom edges may go past the page
+            packer = MaxRectsPacker(page_size + padding, page_size + padding)
+            positions = {region: packer.insert(width + padding, height + padding)}
+            pages.append((packer, positions))
+
+    return [
+        ((power_of_two(packer.used_width - padding), power_of_two(packer.used_height - padding)), positions)
+        for packer, positions in pages
+    ]
+
+
+def image_extensions() -> Tuple[str, ...]:
+    """
+    Returns the file extensions of the images packed, PNGs only unless Pillow is installed.
+    """
+    return PIL_EXTENSIONS if PILImage is not None else PNG_EXTENSIONS
+
+
+def atlas_inputs(project_dir: str) -> Dict[str, List[str]]:
+    """
+    Returns the images of each atlas, relative to the project directory.
+    """
+    images_dir = joinpaths(project_dir, ATLAS_SOURCE_DIR)
+    extensions = image_extensions()
+    atlases: Dict[str, List[str]] = {}
+
+    for root, dirs, files in os.walk(images_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        relative_root = os.path.relpath(root, images_dir).replace(os.sep, "/")
+        name = ROOT_ATLAS_NAME if relative_root == "." else relative_root.split("/", 1)[0]
+
+        for file in sorted(files):
+            if not file.startswith(".") and os.path.splitext(file)[1].lower() in extensions:
+                atlases.setdefault(name, []).append(joinpaths(ATLAS_SOURCE_DIR, os.path.relpath(joinpaths(root, file), images_dir)).replace(os.sep, "/"))
+    return atlases
+
+
+def region_id(path: str) -> str:
+    """
+    Returns the atlas region id of an image e.g. 'play' for 'assets/images/buttons/play.png'.
+    """
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as image_file:
+        return hashlib.sha256(image_file.read()).hexdigest()
+
+
+def input_entries(project_dir: str, files: List[str], previous: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Returns the size, modification time and hash of each input file. Hashes are reused while the size and
+    modification time of a file are unchanged.
+    """
+    entries = {}
+
+    for file in files:
+        stat = os.stat(joinpaths(project_dir, file))
+        entry = previous.get(file)
+
+        if not entry or entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_digest(joinpaths(project_dir, file))}
+        entries[file] = entry
+    return entries
+
+
+def digests(inputs: Dict[str, Dict]) -> Dict[str, str]:
+    """
+    Returns the hash of each input file, files touched without changes don't make an atlas stale.
+    """
+    return {file: entry["sha256"] for file, entry in inputs.items()}
+
+
+def build_atlas(project_dir: str, name: str, files: List[str], page_size: int, padding: int) -> Dict:
+    """
+    Build an atlas, its pages and .atlas file are written to assets/atlas. Runs in a worker process.
+
+    Returns:
+        Dict: The written files ('outputs'), relative to the project directory, and the number of regions.
+    """
+    images: Dict[str, Image] = {}
+
+    for file in files:
+        region = region_id(file)
+        if region in images:
+            raise AtlasError(f"Duplicate image name '{region}' in atlas '{name}', region ids are the file names without extension")
+        images[region] = read_image(joinpaths(project_dir, file))
+
+    pages = pack_regions({region: (image.width, image.height) for region, image in images.items()}, page_size, padding)
+    output_dir = joinpaths(project_dir, ATLAS_OUTPUT_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    meta = {}
+    outputs = []
+
+    for index, ((width, height), positions) in enumerate(pages):
+        page_name = f"{name}-{index}.png"
+        page = Image.blank(width, height)
+        regions = meta[page_name] = {}
+
+        for region, (x, y) in sorted(positions.items()):
+            image = images[region]
+            page.paste(image, x, y)
+            # Kivy texture coordinates start at the bottom left
+            regions[region] = [x, height - y - image.height, image.width, image.height]
+
+        write_png(joinpaths(output_dir, page_name), page)
+        outputs.append(joinpaths(ATLAS_OUTPUT_DIR, page_name))
+
+    with open(joinpaths(output_dir, f"{name}.atlas"), "w", encoding="utf-8") as atlas_file:
+        json.dump(meta, atlas_file, indent=1, sort_keys=True)
+    outputs.insert(0, joinpaths(ATLAS_OUTPUT_DIR, f"{name}.atlas"))
+    return {"outputs": outputs, "regions": len(images)}
+
+
+def atlas_spec_fields(project_dir: str, spec: BuildozerSpec) -> Dict:
+    """
+    Returns buildozer.spec fields packaging the atlases of a project instead of the images they are built from.
+
+    The atlas and png extensions are added to source.include_exts when it is set (an empty value packages every
+    extension). assets/images is added to source.exclude_dirs once every file in it is packed into an atlas,
+    it is kept when it holds other files e.g. images in a format that can't be read without Pillow.
+
+    Args:
+        project_dir (str): The project directory, with its atlases built.
+        spec (BuildozerSpec): The current buildozer.spec, the included extensions and excluded directories are kept.
+
+    Returns:
+        Dict: The buildozer.spec fields to update, empty if the spec already packages the atlases.
+    """
+    def values(key: str) -> List[str]:
+        return [value.strip() for value in (spec.get(key) or "").split(",") if value.strip()]
+
+    fields = {}
+    include_exts = values("source.include_exts")
+
+    if include_exts and not {"atlas", "png"} <= set(include_exts):
+        fields["source.include_exts"] = include_exts + [ext for ext in ("atlas", "png") if ext not in include_exts]
+
+    atlased = {file for files in atlas_inputs(project_dir).values() for file in files}
+    images_dir = joinpaths(project_dir, ATLAS_SOURCE_DIR)
+    images = {
+        joinpaths(ATLAS_SOURCE_DIR, os.path.relpath(joinpaths(root, file), images_dir)).replace(os.sep, "/")
+        for root, dirs, files in os.walk(images_dir)
+        if not any(part.startswith(".") for part in os.path.relpath(root, images_dir).split(os.sep) if part != ".")
+        for file in files
+        if not file.startswith(".")
+    }
+    exclude_dirs = values("source.exclude_dirs")
+
+    if atlased and images <= atlased and ATLAS_SOURCE_DIR not in exclude_dirs:
+        fields["source.exclude_dirs"] = exclude_dirs + [ATLAS_SOURCE_DIR]
+    return fields
+
+
+@dataclass
+class AtlasBuildResult:
+    """
+    The outcome of building the atlases of a project.
+    """
+    built: List[str] = field(default_factory=list)  # Names of the rebuilt atlases
+    skipped: List[str] = field(default_factory=list)  # Names of the up to date atlases
+    removed: List[str] = field(default_factory=list)  # Names of the atlases removed with their images
+    regions: int = 0  # Number of regions of the rebuilt atlases
+
+
+def read_manifest(project_dir: str) -> Dict:
+    """
+    Returns the manifest of the last build, empty if there is none or it is from another version.
+    """
+    try:
+        with open(joinpaths(project_dir, ATLAS_OUTPUT_DIR, ATLAS_MANIFEST), encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("atlases", {}) if manifest.get("version") == ATLAS_MANIFEST_VERSION else {}
+
+
+def remove_outputs(project_dir: str, outputs: List[str]):
+    for output in outputs:
+        try:
+            os.remove(joinpaths(project_dir, output))
+        except FileNotFoundError:
+            pass
+
+
+def build_atlases(
+    project_dir: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    padding: int = DEFAULT_PADDING,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> AtlasBuildResult:
+    """
+    Build the atlases of a project whose images changed since the last build, in parallel.
+
+    Args:
+        project_dir (str): The project directory.
+        page_size (int): The maximum width and height of the atlas pages.
+        padding (int): Transparent pixels between regions.
+        workers (Optional[int]): Number of worker processes, defaults to the number of cores.
+        force (bool): Whether to rebuild up to date atlases.
+
+    Raises:
+        AtlasError: If an image can't be read or packed.
+    """
+    if not os.path.isdir(joinpaths(project_dir, ATLAS_SOURCE_DIR)):
+        raise AtlasError(f"Images directory '{joinpaths(project_dir, ATLAS_SOURCE_DIR)}' doesn't exist")
+
+    previous = read_manifest(project_dir)
+    options = {"page_size": page_size, "padding": padding, "extensions": list(image_extensions())}
+    manifest: Dict[str, Dict] = {}
+    stale: Dict[str, List[str]] = {}
+    result = AtlasBuildResult()
+
+    for name, files in sorted(atlas_inputs(project_dir).items()):
+        entry = previous.get(name, {})
+        inputs = input_entries(project_dir, files, entry.get("inputs", {}))
+        up_to_date = (
+            not force
+            and entry.get("options") == options
+            and digests(entry.get("inputs", {})) == digests(inputs)
+            and all(os.path.isfile(joinpaths(project_dir, output)) for output in entry.get("outputs", []))
+        )
+        manifest[name] = {"options": options, "inputs": inputs, "outputs": entry.get("outputs", [])}
+
+        if up_to_date:
+            result.skipped.append(name)
+        else:
+            stale[name] = files
+
+    for name in sorted(set(previous) - set(manifest)):
+        remove_outputs(project_dir, previous[name].get("outputs", []))
+        result.removed.append(name)
+
+    try:
+        if len(stale) > 1 and workers != 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    name: executor.submit(build_atlas, project_dir, name, files, page_size, padding)
+                    for name, files in stale.items()
+                }
+                built = {name: future.result() for name, future in futures.items()}
+        else:
+            built = {name: build_atlas(project_dir, name, files, page_size, padding) for name, files in stale.items()}
+    except PngError as e:
+        raise AtlasError(str(e))
+
+    for name, atlas in built.items():
+        # Pages of a previous build no longer written
+        remove_outputs(project_dir, [output for output in manifest[name]["outputs"] if output not in atlas["outputs"]])
+        manifest[name]["outputs"] = atlas["outputs"]
+        result.built.append(name)
+        result.regions += atlas["regions"]
+
+    output_dir = joinpaths(project_dir, ATLAS_OUTPUT_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(joinpaths(output_dir, ATLAS_MANIFEST), "w", encoding="utf-8") as manifest_file:
+        json.dump({"version": ATLAS_MANIFEST_VERSION, "atlases": manifest}, manifest_file, indent=1, sort_keys=True)
+    return result
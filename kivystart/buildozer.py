@@ -1,52 +1,481 @@
+"""
+Helpers for creating and patching buildozer.spec files.
+"""
+import os
 import re
+import zlib
+import fnmatch
 
-# Function to update buildozer.spec using regex with flexible context
-def update_buildozer_spec(spec_file_path, context, strict_fields=None) -> str:
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from kivystart.utils.base import joinpaths
+from kivystart.storage import read_bundled_template
+from kivystart.renderer import KivyTemplateRenderer
+from kivystart.version import __version__
+
+
+# Version of the bundled buildozer.spec template, bump this whenever the template
+# is synced with a newer `buildozer init` output.
+BUILDOZER_SPEC_TEMPLATE_VERSION = "1.5.0"
+
+# Path to the bundled buildozer.spec template
+BUILDOZER_SPEC_TEMPLATE = "buildozer.spec.kivytemplate"
+
+# Values used by the bundled template for fields which are not provided
+BUILDOZER_SPEC_DEFAULTS = {
+    "title": "My Application",
+    "package.name": "myapp",
+    "package.domain": "org.test",
+    "requirements": "python3,kivy",
+    "osx.python_version": "3",
+    "osx.kivy_version": "1.9.1",
+    "author": None,
+}
+
+
+def render_buildozer_spec(fields: Optional[Dict] = None) -> str:
     """
-    Update the buildozer.spec file by replacing the values of specific fields 
-    based on the provided context dictionary.
+    Render the bundled buildozer.spec template with the provided fields in a single pass,
+    this does not require buildozer to be installed.
     
     Args:
-    - spec_file_path (str): Path to the buildozer.spec file.
-    - context (dict): A dictionary containing the fields to be updated and their new values.
-    - strict_fields (list): A list of fields for which strict policy applies (uncommented fields only).
+    - fields (dict): Buildozer fields and their values e.g. {"package.name": "myapp"}.
     
     Returns:
-    - str: The updated content of the buildozer.spec file.
+    - str: The rendered content of the buildozer.spec file.
     """
+    context = {**BUILDOZER_SPEC_DEFAULTS, **(fields or {})}
+    
+    # Field names like `package.name` are not valid template variables
+    context = {field.replace(".", "_"): value for field, value in context.items()}
+    context.update({
+        "kivystart_version": __version__,
+        "spec_template_version": BUILDOZER_SPEC_TEMPLATE_VERSION,
+    })
     
-    # Read the content of the buildozer.spec file
-    with open(spec_file_path, "r", encoding="utf-8") as file:
-        file_content = file.read()
+    template_content = read_bundled_template(BUILDOZER_SPEC_TEMPLATE)
+    
+    renderer = KivyTemplateRenderer()
+    renderer.set_context(context)
+    
+    # Fields without a placeholder in the template are patched in
+    spec = BuildozerSpec.parse(renderer.render(template_content))
+    spec.update({field: value for field, value in (fields or {}).items() if value is not None})
+    return spec.dumps()
+
+
+# Directories, files and extensions never packaged by the release build profile
+RELEASE_EXCLUDE_DIRS = ("venv", "docs", "tests", "bin", "__pycache__")
+RELEASE_EXCLUDE_PATTERNS = ("*.kivytemplate", "test_*.py", "*/test_*.py", "*_test.py", "*/*_test.py", "assets/atlas/manifest.json")
+RELEASE_EXCLUDE_EXTS = ("spec", "md", "txt", "kivytemplate", "pyc", "pyo")
+
+# Extensions always packaged by the release build profile, so assets added after generation are packaged
+RELEASE_INCLUDE_EXTS = (
+    "py", "kv", "json", "atlas",
+    "png", "jpg", "jpeg", "gif", "webp", "svg",
+    "ttf", "otf",
+    "wav", "mp3", "ogg",
+    "mp4",
+)
+
+# Keys which live in the [buildozer] section rather than the [app] section
+BUILDOZER_SECTION_KEYS = ("log_level", "warn_on_root", "build_dir", "bin_dir")
+
+SECTION_REGEX = re.compile(r"^\[([^\]]+)\]\s*$")
+KEY_REGEX = re.compile(r"^([A-Za-z0-9_.@:-]+)\s*=\s?(.*)$")
+COMMENTED_KEY_REGEX = re.compile(r"^[#;]\s*([A-Za-z0-9_.@:-]+)\s*=\s?(.*)$")
 
-    # Default strict_fields to an empty list if not provided
-    strict_fields = strict_fields or []
 
-    # Iterate through each key-value pair in the context dictionary
-    for field, value in context.items():
-        # Escape special regex characters in the value
-        escaped_value = str(value)  # Ignore escaping for now
+class BuildozerSpecError(Exception):
+    """
+    Raised on buildozer.spec parsing or patching errors.
+    """
 
-        # Check if the current field is in the strict_fields list
-        if field in strict_fields:
-            # Strict mode: Only match uncommented fields (no leading # or spaces)
-            pattern = rf'^\s*{field} = .+'
+
+class BuildozerSpecLine:
+    """
+    A single line of a buildozer.spec file.
+    
+    Only lines holding a key (commented or not) carry a key and a value, every other line
+    (section headers, comments, blank lines, list items) is kept verbatim.
+    """
+    __slots__ = ("text", "key", "value", "commented", "continuations")
+    
+    def __init__(self, text: str, key: Optional[str] = None, value: Optional[str] = None, commented: bool = False):
+        self.text = text
+        self.key = key
+        self.value = value
+        self.commented = commented
+        self.continuations = []  # Indented lines continuing a multiline value
+    
+    def set(self, value):
+        """
+        Set a new value, this also uncomments the line.
+        """
+        self.value = format_spec_value(value)
+        self.commented = False
+        self.continuations = []
+        self.text = f"{self.key} = {self.value}"
+        
+    def dumps(self) -> str:
+        if self.continuations:
+            return "\n".join([self.text, *self.continuations])
+        return self.text
+
+
+def format_spec_value(value) -> str:
+    """
+    Formats a python value as a buildozer.spec value, lists and tuples are comma separated.
+    """
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    return str(value)
+
+
+class BuildozerSpec:
+    """
+    A comment preserving model of a buildozer.spec file.
+    
+    The spec is parsed in one pass into sections of lines with an index of keys, getting and
+    setting a key is O(1) and serializing an unmodified spec returns the original content.
+    
+    Example:
+        spec = BuildozerSpec.parse(content)
+        spec.update({"title": "Demo", "package.name": "demo"}, strict_fields=["title"])
+        content = spec.dumps()
+    """
+    def __init__(self):
+        self.sections: Dict[Optional[str], List[BuildozerSpecLine]] = {None: []}  # None for lines before the first section
+        self._keys: Dict[Tuple[str, str], BuildozerSpecLine] = {}
+        self._commented_keys: Dict[Tuple[str, str], BuildozerSpecLine] = {}
+        self._key_sections: Dict[str, str] = {}
+        self._commented_key_sections: Dict[str, str] = {}
+        self.trailing_newline = True
+    
+    @classmethod
+    def parse(cls, content: str) -> "BuildozerSpec":
+        """
+        Parse buildozer.spec content.
+        """
+        spec = cls()
+        section = None
+        lines = spec.sections[None]
+        last_key_line = None
+        
+        spec.trailing_newline = content.endswith("\n")
+        
+        for text in content.splitlines():
+            if last_key_line and text[:1] in (" ", "\t") and text.strip():
+                # Continuation of a multiline value
+                last_key_line.continuations.append(text)
+                continue
+            
+            last_key_line = None
+            section_match = SECTION_REGEX.match(text)
+            
+            if section_match:
+                section = section_match.group(1).strip()
+                lines = spec.sections.setdefault(section, [])
+                lines.append(BuildozerSpecLine(text))
+                continue
+            
+            key_match = KEY_REGEX.match(text)
+            
+            if key_match and section is not None:
+                line = BuildozerSpecLine(text, key_match.group(1), key_match.group(2).strip())
+                spec._index(section, line)
+                last_key_line = line
+            else:
+                commented_match = COMMENTED_KEY_REGEX.match(text.lstrip())
+                if commented_match and section is not None:
+                    line = BuildozerSpecLine(text, commented_match.group(1), commented_match.group(2).strip(), commented=True)
+                    spec._index(section, line)
+                else:
+                    line = BuildozerSpecLine(text)
+            lines.append(line)
+        return spec
+    
+    @classmethod
+    def read(cls, spec_file_path: str) -> "BuildozerSpec":
+        """
+        Read and parse a buildozer.spec file.
+        """
+        with open(spec_file_path, "r", encoding="utf-8") as fd:
+            return cls.parse(fd.read())
+    
+    def _index(self, section: str, line: BuildozerSpecLine):
+        """
+        Add a key line to the index, only the first occurrence of a key is indexed.
+        """
+        if line.commented:
+            self._commented_keys.setdefault((section, line.key), line)
+            self._commented_key_sections.setdefault(line.key, section)
         else:
-            # Non-strict mode: Match both uncommented and commented fields
-            pattern = rf'^\s*#?\s*{field} = .+'
+            self._keys.setdefault((section, line.key), line)
+            self._key_sections.setdefault(line.key, section)
+    
+    def section_for(self, key: str) -> str:
+        """
+        Returns the section holding the provided key, keys not found in the spec are
+        assigned to their default buildozer section.
+        """
+        return (
+            self._key_sections.get(key)
+            or self._commented_key_sections.get(key)
+            or ("buildozer" if key in BUILDOZER_SECTION_KEYS else "app")
+        )
+    
+    def get(self, key: str, default=None, section: Optional[str] = None) -> Optional[str]:
+        """
+        Returns the value of an uncommented key.
+        """
+        section = section or self._key_sections.get(key)
+        line = self._keys.get((section, key))
+        return line.value if line else default
+        
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_sections
+    
+    def __getitem__(self, key: str) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+    
+    def __setitem__(self, key: str, value):
+        self.set(key, value)
+    
+    def set(self, key: str, value, section: Optional[str] = None, strict: bool = False):
+        """
+        Set the value of a key.
         
-        replacement = f'{field} = {escaped_value}'
+        Args:
+            key (str): The key e.g. 'package.name'.
+            value: The new value, lists and tuples are comma separated.
+            section (str): The section for the key, guessed if not provided.
+            strict (bool): Whether to only update an uncommented key, a commented key is left as is
+                and a new key is added instead.
+        """
+        if section is None:
+            if strict:
+                section = self._key_sections.get(key) or ("buildozer" if key in BUILDOZER_SECTION_KEYS else "app")
+            else:
+                section = self.section_for(key)
         
-        # Perform the substitution if the pattern is found
-        file_content = re.sub(pattern, replacement, file_content, flags=re.MULTILINE)
+        line = self._keys.get((section, key))
+        if line:
+            line.set(value)
+            return
+        
+        line = self._commented_keys.get((section, key)) if not strict else None
+        if line:
+            # Uncomment the existing line in place
+            del self._commented_keys[(section, key)]
+            if self._commented_key_sections.get(key) == section:
+                del self._commented_key_sections[key]
+        else:
+            line = BuildozerSpecLine("", key)
+            self._append(section, line)
+        
+        line.set(value)
+        self._index(section, line)
     
-    # Optionally, if any fields do not exist in the file, add them at the end
-    for field, value in context.items():
-        if not re.search(rf'^\s*#?\s*{field} = ', file_content, flags=re.MULTILINE):
-            file_content += f'\n{field} = {re.escape(str(value))}'
+    def _append(self, section: str, line: BuildozerSpecLine):
+        """
+        Append a line at the end of a section, before its trailing blank lines.
+        """
+        lines = self.sections.get(section)
+        if lines is None:
+            lines = self.sections[section] = [BuildozerSpecLine(f"[{section}]")]
+            
+            previous_lines = list(self.sections.values())[-2]
+            if previous_lines and previous_lines[-1].text.strip():
+                # Keep sections separated by a blank line
+                previous_lines.append(BuildozerSpecLine(""))
+        
+        trailing = []
+        while len(lines) > 1 and not lines[-1].text.strip() and not lines[-1].key:
+            trailing.append(lines.pop())
+        lines.append(line)
+        lines.extend(trailing)
     
-    # Write the updated content back to the file
-    with open(spec_file_path, "w", encoding="utf-8") as file:
-        file.write(file_content)
+    def update(self, fields: Dict, strict_fields: Optional[List[str]] = None):
+        """
+        Apply a batch of patches in one pass.
+        
+        Args:
+            fields (dict): The keys to set and their new values.
+            strict_fields (list): Keys for which only uncommented occurrences are updated.
+        """
+        strict_fields = set(strict_fields or [])
+        for key, value in fields.items():
+            self.set(key, value, strict=key in strict_fields)
     
-    return file_content
+    def items(self, section: str = "app") -> List[Tuple[str, str]]:
+        """
+        Returns the uncommented keys and values of a section.
+        """
+        return [(line.key, line.value) for line in self.sections.get(section, []) if line.key and not line.commented]
+    
+    def dumps(self) -> str:
+        """
+        Serialize the spec, unmodified lines are written back as they were read.
+        """
+        content = "\n".join(line.dumps() for lines in self.sections.values() for line in lines)
+        return content + "\n" if self.trailing_newline and content else content
+    
+    def write(self, spec_file_path: str):
+        """
+        Write the spec to a file.
+        """
+        with open(spec_file_path, "w", encoding="utf-8") as fd:
+            fd.write(self.dumps())
+
+
+def build_cache_spec_fields(build_cache_dir: str, app_id: str) -> Dict:
+    """
+    Returns buildozer.spec fields for sharing one warm build cache between projects.
+    
+    The Android SDK and NDK are installed once in the cache and shared by every project. Each app gets its own
+    build directory in the cache, holding the python-for-android checkout, downloaded recipe packages and built
+    dists, so clones and CI checkouts of an app reuse them while the per-app buildozer state (state.db, the app
+    copy) of unrelated projects stays apart.
+    
+    Args:
+    - build_cache_dir (str): The shared build cache directory.
+    - app_id (str): Identifier of the app e.g. 'org.test.myapp', naming its build directory.
+    
+    Returns:
+    - dict: The buildozer.spec fields.
+    """
+    build_cache_dir = os.path.abspath(os.path.expanduser(build_cache_dir))
+    app_dir = re.sub(r"[^A-Za-z0-9_.-]", "_", app_id)
+    return {
+        "build_dir": joinpaths(build_cache_dir, "build", app_dir),
+        "android.sdk_path": joinpaths(build_cache_dir, "android", "sdk"),
+        "android.ndk_path": joinpaths(build_cache_dir, "android", "ndk"),
+        "android.skip_update": True,  # Don't check for sdk updates on every build
+        "android.accept_sdk_license": True,  # Builds on shared agents are not interactive
+    }
+
+
+def iter_build_source_files(
+    source_dir: str,
+    include_exts: Optional[List[str]] = None,
+    exclude_dirs: Optional[List[str]] = None,
+    exclude_patterns: Optional[List[str]] = None,
+) -> Iterator[Tuple[str, int]]:
+    """
+    Yields the files buildozer would package from the source directory, following the same
+    rules as buildozer for source.include_exts, source.exclude_dirs and source.exclude_patterns.
+    
+    Args:
+    - source_dir (str): The application source directory.
+    - include_exts (list): File extensions to include, all files are included if empty.
+    - exclude_dirs (list): Directories to exclude, relative to the source directory.
+    - exclude_patterns (list): Patterns of files to exclude, relative to the source directory.
+    
+    Yields:
+    - tuple: The relative file path and its size in bytes.
+    """
+    include_exts = set(include_exts or [])
+    exclude_dirs = set(d.strip("/") for d in exclude_dirs or [])
+    exclude_patterns = list(exclude_patterns or [])
+    
+    for root, dirs, files in os.walk(source_dir):
+        relative_root = os.path.relpath(root, source_dir)
+        relative_root = "" if relative_root == "." else relative_root.replace(os.sep, "/")
+        
+        # Buildozer never packages hidden directories, .buildozer and bin included
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith(".") and joinpaths(relative_root, d).strip("/") not in exclude_dirs
+        )
+        
+        for file in sorted(files):
+            if file.startswith("."):
+                continue
+            
+            relative_file = joinpaths(relative_root, file).strip("/")
+            ext = file.rsplit(".", 1)[-1] if "." in file else ""
+            
+            if include_exts and ext not in include_exts:
+                continue
+            
+            if any(fnmatch.fnmatch(relative_file, pattern) for pattern in exclude_patterns):
+                continue
+            yield relative_file, os.path.getsize(joinpaths(root, file))
+
+
+def estimate_payload_size(
+    source_dir: str,
+    include_exts: Optional[List[str]] = None,
+    exclude_dirs: Optional[List[str]] = None,
+    exclude_patterns: Optional[List[str]] = None,
+) -> Tuple[int, int, int]:
+    """
+    Estimates the size of the application payload packaged by buildozer.
+    
+    The compressed size is estimated by deflating every packaged file, as done when the
+    application sources are bundled into the APK.
+    
+    Returns:
+    - tuple: The number of files, their total size and the estimated compressed size in bytes.
+    """
+    count, size, compressed_size = 0, 0, 0
+    
+    for relative_file, file_size in iter_build_source_files(source_dir, include_exts, exclude_dirs, exclude_patterns):
+        with open(joinpaths(source_dir, relative_file), "rb") as fd:
+            compressed_size += len(zlib.compress(fd.read(), 6))
+        count += 1
+        size += file_size
+    return count, size, compressed_size
+
+
+def release_profile_spec_fields(source_dir: str) -> Dict:
+    """
+    Returns buildozer.spec fields for a size optimized release build of the application.
+    
+    The common source, image, font, sound and video extensions are always included, so assets
+    added after generation are packaged. Other extensions found in the application tree (outside
+    excluded directories) at generation time are included as well.
+    
+    Args:
+    - source_dir (str): The application source directory.
+    
+    Returns:
+    - dict: The buildozer.spec fields.
+    """
+    include_exts = set(RELEASE_INCLUDE_EXTS)
+    
+    for relative_file, _ in iter_build_source_files(source_dir, exclude_dirs=RELEASE_EXCLUDE_DIRS, exclude_patterns=RELEASE_EXCLUDE_PATTERNS):
+        name = relative_file.rsplit("/", 1)[-1]
+        ext = name.rsplit(".", 1)[-1] if "." in name else ""
+        
+        if ext and ext not in RELEASE_EXCLUDE_EXTS:
+            include_exts.add(ext)
+    
+    return {
+        "source.include_exts": sorted(include_exts),
+        "source.exclude_dirs": list(RELEASE_EXCLUDE_DIRS),
+        "source.exclude_patterns": list(RELEASE_EXCLUDE_PATTERNS),
+    }
+
+
+def update_buildozer_spec(spec_file_path, context, strict_fields=None) -> str:
+    """
+    Update the buildozer.spec file by replacing the values of specific fields 
+    based on the provided context dictionary.
+    
+    Args:
+    - spec_file_path (str): Path to the buildozer.spec file.
+    - context (dict): A dictionary containing the fields to be updated and their new values.
+    - strict_fields (list): A list of fields for which strict policy applies (uncommented fields only).
+    
+    Returns:
+    - str: The updated content of the buildozer.spec file.
+    """
+    spec = BuildozerSpec.read(spec_file_path)
+    spec.update(context, strict_fields=strict_fields)
+    spec.write(spec_file_path)
+    return spec.dumps()
@@ -0,0 +1,196 @@
+"""
+Bytecode precompilation of generated projects.
+
+The project sources are compiled with `compileall` in parallel, at one or more optimization levels, into the
+`__pycache__` directories Python reads them from. Compiled modules are not recompiled on the first launch on
+the same machine e.g. a desktop run or a CI test job, and CI spends a predictable time compiling.
+
+The bytecode only matches the Python version compiling it. Android packages don't use it, python-for-android
+compiles the packaged sources with the Python it builds for the device.
+
+Example Usage:
+    result = compile_project("path/to/project", optimize_levels=(0, 2))
+    print(f"{len(result.compiled)} bytecode files, {len(result.failed)} failures")
+"""
+import os
+import re
+import io
+import compileall
+import contextlib
+import importlib.util
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from kivystart.buildozer import BuildozerSpec, iter_build_source_files
+from kivystart.utils.base import joinpaths
+
+
+# Directories never compiled, relative to the project directory
+BYTECODE_EXCLUDE_DIRS = ("venv", "bin", "docs")
+
+DEFAULT_OPTIMIZE_LEVELS = (0,)
+
+
+class BytecodeError(Exception):
+    """
+    Raised when a project can't be compiled.
+    """
+
+
+@dataclass
+class BytecodeResult:
+    """
+    The outcome of compiling a project.
+    """
+    sources: List[str] = field(default_factory=list)  # Compiled source files, relative to the project directory
+    compiled: List[str] = field(default_factory=list)  # Bytecode files, relative to the project directory
+    failed: List[str] = field(default_factory=list)  # Source files that failed to compile
+    output: str = ""  # Errors of the failed files
+
+
+def project_sources(source_dir: str, exclude_dirs: Sequence[str] = BYTECODE_EXCLUDE_DIRS) -> List[str]:
+    """
+    Returns the Python files of a project, relative to the project directory. Hidden directories like .buildozer
+    and .git are skipped, like buildozer does when packaging.
+    """
+    return [
+        relative_file
+        for relative_file, _ in iter_build_source_files(source_dir, include_exts=["py"], exclude_dirs=list(exclude_dirs))
+    ]
+
+
+def exclude_regex(source_dir: str, exclude_dirs: Sequence[str]) -> "re.Pattern":
+    """
+    Returns the pattern of the paths compileall must skip, the excluded directories and hidden directories.
+    """
+    alternatives = [r"(?:[^\\/]+[\\/])*\.[^\\/]+"] + [re.escape(d.strip("/")) for d in exclude_dirs]
+    return re.compile(rf"^{re.escape(os.path.abspath(source_dir))}[\\/](?:{'|'.join(alternatives)})[\\/]")
+
+
+def bytecode_is_current(source_path: str, bytecode_path: str) -> bool:
+    """
+    Returns whether a bytecode file exists and was compiled from the current source by this Python version.
+    Bytecode left by a previous compilation is not current when the source failed to compile.
+    """
+    try:
+        with open(bytecode_path, "rb") as bytecode_file:
+            header = bytecode_file.read(16)
+        stat = os.stat(source_path)
+    except OSError:
+        return False
+
+    if len(header) < 16 or header[:4] != importlib.util.MAGIC_NUMBER:
+        return False
+
+    if int.from_bytes(header[4:8], "little") & 1:
+        # Hash based bytecode, checked against the source hash by the import system
+        return True
+    mtime, size = int.from_bytes(header[8:12], "little"), int.from_bytes(header[12:16], "little")
+    return mtime == int(stat.st_mtime) & 0xFFFFFFFF and size == stat.st_size & 0xFFFFFFFF
+
+
+def compile_error(source_path: str) -> str:
+    """
+    Returns the error compiling a source file.
+    """
+    try:
+        with open(source_path, "rb") as source_file:
+            compile(source_file.read(), source_path, "exec")
+    except (SyntaxError, ValueError) as e:
+        return f"{source_path}: {e}"
+    except OSError as e:
+        return f"{source_path}: {e.strerror}"
+    return f"{source_path}: bytecode not written"
+
+
+def compile_project(
+    source_dir: str,
+    optimize_levels: Sequence[int] = DEFAULT_OPTIMIZE_LEVELS,
+    workers: Optional[int] = None,
+    force: bool = False,
+    exclude_dirs: Sequence[str] = BYTECODE_EXCLUDE_DIRS,
+) -> BytecodeResult:
+    """
+    Compile the Python files of a project.
+
+    Args:
+        source_dir (str): The project directory.
+        optimize_levels (Sequence[int]): Optimization levels to compile at, 0 for plain `python`, 1 for
+            `python -O` and 2 for `python -OO`.
+        workers (Optional[int]): Number of parallel workers, defaults to the number of cores.
+        force (bool): Whether to recompile files whose bytecode is up to date.
+        exclude_dirs (Sequence[str]): Directories not to compile, relative to the project directory.
+
+    Returns:
+        BytecodeResult: The compiled sources and bytecode files.
+
+    Raises:
+        BytecodeError: If the project directory doesn't exist or an optimization level is invalid.
+    """
+    if not os.path.isdir(source_dir):
+        raise BytecodeError(f"Project directory '{source_dir}' doesn't exist")
+
+    optimize_levels = sorted(set(optimize_levels))
+    if not optimize_levels or any(level not in (0, 1, 2) for level in optimize_levels):
+        raise BytecodeError(f"Invalid optimization levels {optimize_levels}, levels are 0, 1 and 2")
+
+    # Parallel workers print their errors in their own process, failures are found from the bytecode files
+    with contextlib.redirect_stdout(io.StringIO()):
+        compileall.compile_dir(
+            os.path.abspath(source_dir),
+            rx=exclude_regex(source_dir, exclude_dirs),
+            force=force,
+            quiet=1,
+            optimize=optimize_levels,
+            workers=workers or 0,
+        )
+
+    result = BytecodeResult()
+    errors = []
+
+    for relative_file in project_sources(source_dir, exclude_dirs):
+        source_path = joinpaths(source_dir, relative_file)
+        bytecode_files = [
+            os.path.relpath(importlib.util.cache_from_source(source_path, optimization=level or ""), source_dir).replace(os.sep, "/")
+            for level in optimize_levels
+        ]
+
+        if all(bytecode_is_current(source_path, joinpaths(source_dir, file)) for file in bytecode_files):
+            result.sources.append(relative_file)
+            result.compiled.extend(bytecode_files)
+        else:
+            result.failed.append(relative_file)
+            errors.append(compile_error(source_path))
+    result.output = "\n".join(errors)
+    return result
+
+
+def bytecode_spec_fields(spec: BuildozerSpec) -> Dict:
+    """
+    Returns buildozer.spec fields keeping the host bytecode out of the package, for specs packaging every file
+    extension (an empty source.include_exts). Specs listing the included extensions and the release build
+    profile already keep it out.
+
+    Args:
+        spec (BuildozerSpec): The current buildozer.spec, the excluded extensions and directories are kept.
+
+    Returns:
+        Dict: The buildozer.spec fields to update, empty if the spec already keeps the host bytecode out.
+    """
+    def values(key: str) -> List[str]:
+        return [value.strip() for value in (spec.get(key) or "").split(",") if value.strip()]
+
+    if values("source.include_exts"):
+        return {}
+
+    fields = {}
+    exclude_exts = values("source.exclude_exts")
+    exclude_dirs = values("source.exclude_dirs")
+
+    if not {"pyc", "pyo"} <= set(exclude_exts):
+        fields["source.exclude_exts"] = exclude_exts + [ext for ext in ("pyc", "pyo") if ext not in exclude_exts]
+
+    if "__pycache__" not in exclude_dirs:
+        fields["source.exclude_dirs"] = exclude_dirs + ["__pycache__"]
+    return fields
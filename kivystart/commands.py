@@ -2,13 +2,18 @@
 Commands for the KivyStart CLI
 """
 import os
+import sys
+import contextlib
 
 from typing import Optional, List
 
 from kivystart.storage import kivystart_storage
 from kivystart.utils.dateutils import gmt_date
-from kivystart.utils.base import joinpaths
-from kivystart.app_template.basic import BasicAppTemplate
+from kivystart.utils.base import joinpaths, click_echo
+from kivystart.profiler import Profiler
+from kivystart.output import ArchiveOutput
+from kivystart.app_template import BaseAppTemplate
+from kivystart.registry import registry, TemplateNotFoundError
 
 
 class MakeProjectError(Exception):
@@ -19,7 +24,7 @@ class MakeProjectError(Exception):
 
 class MakeProjectCommand:
     # makeproject command
-    templates = {"basic": BasicAppTemplate}
+    registry = registry
     
     @classmethod
     def setup(cls):
@@ -46,27 +51,75 @@ class MakeProjectCommand:
         git_init: bool = False,
         license: Optional[str] = None,
         kivy_version: Optional[str] = None,
+        build_cache: Optional[str] = None,
+        build_profile: Optional[str] = None,
+        compile_bytecode: bool = False,
+        screens: Optional[str] = None,
+        kv_compile: bool = False,
+        kv_bundle: bool = False,
+        output_archive: Optional[str] = None,
+        archive_format: Optional[str] = None,
+        project_cache: Optional[str] = None,
+        project_cache_size: Optional[int] = None,
+        project_cache_link: str = "reflink",
+        profile: Optional[str] = None,
     ):
         cls.setup()
-        cls.makeproject(
-            name = name,
-            appname = appname,
-            owner_name = owner_name,
-            owner_email = owner_email,
-            no_buildozer = no_buildozer,
-            update = update,
-            no_kivymd = no_kivymd,
-            template = template,
-            package_name = package_name,
-            python_version = python_version,
-            no_venv = no_venv,
-            dependencies = dependencies,
-            theme = theme,
-            default_screen = default_screen,
-            git_init = git_init,
-            license = license,
-            kivy_version = kivy_version,
-        )
+        profiler = Profiler() if profile else None
+        
+        with profiler.activate() if profiler else contextlib.nullcontext():
+            try:
+                cls.makeproject(
+                    name = name,
+                    appname = appname,
+                    owner_name = owner_name,
+                    owner_email = owner_email,
+                    no_buildozer = no_buildozer,
+                    update = update,
+                    no_kivymd = no_kivymd,
+                    template = template,
+                    package_name = package_name,
+                    python_version = python_version,
+                    no_venv = no_venv,
+                    dependencies = dependencies,
+                    theme = theme,
+                    default_screen = default_screen,
+                    git_init = git_init,
+                    license = license,
+                    kivy_version = kivy_version,
+                    build_cache = build_cache,
+                    build_profile = build_profile,
+                    compile_bytecode = compile_bytecode,
+                    screens = screens,
+                    kv_compile = kv_compile,
+                    kv_bundle = kv_bundle,
+                    output_archive = output_archive,
+                    archive_format = archive_format,
+                    project_cache = project_cache,
+                    project_cache_size = project_cache_size,
+                    project_cache_link = project_cache_link,
+                )
+            finally:
+                if profiler:
+                    profiler.write_chrome_trace(profile)
+                    click_echo(f"\nProfile summary (trace written to '{profile}'):", prefix="", fg="cyan", bold=True)
+                    click_echo(profiler.summary_table(), prefix="")
+    
+    @classmethod
+    def create_app_template(cls, template: str, **options) -> BaseAppTemplate:
+        """
+        Returns the app template instance for the provided template name.
+        
+        Args:
+            template (str): The template name e.g. 'basic'.
+            **options: Keyword arguments for initializing the app template.
+        """
+        try:
+            # The template module is only imported once selected
+            app_template_cls = cls.registry.load(template)
+        except TemplateNotFoundError as e:
+            raise MakeProjectError(str(e))
+        return app_template_cls(**options)
     
     @classmethod     
     def makeproject(
@@ -87,17 +140,30 @@ class MakeProjectCommand:
         default_screen: Optional[str] = None,
         git_init: bool = False,
         license: Optional[str] = None,
-        kivy_version: Optional[str] = None
+        kivy_version: Optional[str] = None,
+        build_cache: Optional[str] = None,
+        build_profile: Optional[str] = None,
+        compile_bytecode: bool = False,
+        screens: Optional[str] = None,
+        kv_compile: bool = False,
+        kv_bundle: bool = False,
+        output_archive: Optional[str] = None,
+        archive_format: Optional[str] = None,
+        project_cache: Optional[str] = None,
+        project_cache_size: Optional[int] = None,
+        project_cache_link: str = "reflink",
     ):
         """
         Execute makeproject after all setups and pre-command actions.
-        """
-        app_template_cls = cls.templates.get(template)
         
-        if not app_template_cls:
-            raise MakeProjectError(f"App template '{template}' not supported, possible templates are {tuple(cls.templates.keys())}")
+        If output_archive is provided, the project is streamed into a zip or tar.gz archive at that path
+        ('-' for stdout) instead of being created in the current directory.
         
-        app_template = app_template_cls(
+        If project_cache is provided, the project is generated from the project cache in that directory,
+        see `kivystart.project_cache`. The cache is bounded by project_cache_size bytes, 512 MB by default.
+        """
+        app_template = cls.create_app_template(
+            template,
             projectname = name,
             appname = appname,
             owner_name = owner_name,
@@ -113,6 +179,33 @@ class MakeProjectCommand:
             git_init = git_init,
             license = license,
             kivy_version = kivy_version,
+            build_cache = build_cache,
+            build_profile = build_profile,
+            compile_bytecode = compile_bytecode,
+            screens = screens,
+            kv_compile = kv_compile,
+            kv_bundle = kv_bundle,
         )
         base_dir = joinpaths(os.path.abspath('.'), name)
-        app_template.create_project(base_dir, update=update)
+        
+        if not output_archive:
+            if not project_cache:
+                app_template.create_project(base_dir, update=update)
+                return
+            
+            # Imported on use, generations without a project cache don't pay for it
+            from kivystart.project_cache import ProjectCache, DEFAULT_MAX_SIZE
+            
+            cache = ProjectCache(project_cache, max_size=DEFAULT_MAX_SIZE if project_cache_size is None else project_cache_size, link_mode=project_cache_link)
+            app_template.create_project(base_dir, update=update, cache=cache)
+            return
+        
+        if update:
+            raise MakeProjectError("The update flag can't be used with an output archive, archives are always created from scratch")
+        
+        # Messages go to stderr whilst the archive is streamed to stdout
+        to_stderr = contextlib.redirect_stdout(sys.stderr) if output_archive == "-" else contextlib.nullcontext()
+        
+        with to_stderr:
+            with ArchiveOutput(output_archive, root=name, format=archive_format) as output:
+                app_template.create_project(base_dir, update=update, output=output)
@@ -0,0 +1,338 @@
+"""
+Packed single-file template bundles (.kspack).
+
+A bundle holds all files of a template in one file, with an index at the start of the file mapping every
+path to the offset, length, SHA-256 digest and flags of its content. Bundles are loaded with mmap, so reading
+a file is a slice of the mapping rather than an open, stat and read per file. Identical contents are stored
+once.
+
+Layout (integers are little endian):
+    magic        8 bytes   b"KSPACK\\x00\\x01"
+    entry_count  uint32
+    meta_length  uint32    Length of the JSON metadata following the header
+    metadata     bytes     JSON object e.g. {"name": "basic", "kivystart_version": "1.0.0"}
+    entries      entry_count times:
+        path_length  uint16
+        path         bytes    UTF-8, relative and '/' separated
+        offset       uint64   From the start of the file
+        length       uint64
+        digest       32 bytes SHA-256 of the content
+        flags        uint8    FLAG_TEMPLATE for files rendered by the template renderer
+    contents
+
+Example Usage:
+    pack_directory("kivystart/templates/basic", "basic.kspack", metadata={"name": "basic"})
+
+    with KsPack.open("basic.kspack") as pack:
+        content = pack.read_text("kivymd/main.py.kivytemplate")
+"""
+import os
+import io
+import json
+import mmap
+import struct
+import fnmatch
+
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from kivystart.utils.base import joinpaths
+from kivystart.version import __version__
+
+
+MAGIC = b"KSPACK\x00\x01"
+EXTENSION = ".kspack"
+
+# Files rendered by the template renderer, other files are copied as they are
+FLAG_TEMPLATE = 0x01
+
+TEMPLATE_SUFFIX = ".kivytemplate"
+
+# Files never packed
+IGNORED_DIRS = ("__pycache__",)
+IGNORED_PATTERNS = ("*.pyc", "*.pyo")
+
+_HEADER = struct.Struct("<8sII")
+_ENTRY = struct.Struct("<QQ32sB")
+_PATH_LENGTH = struct.Struct("<H")
+
+
+class KsPackError(Exception):
+    """
+    Raised on invalid or corrupted bundles.
+    """
+
+
+class KsPackEntry:
+    """
+    Index entry of a file in a bundle.
+    """
+    __slots__ = ("offset", "length", "digest", "flags")
+
+    def __init__(self, offset: int, length: int, digest: bytes, flags: int):
+        self.offset = offset
+        self.length = length
+        self.digest = digest
+        self.flags = flags
+
+    @property
+    def is_template(self) -> bool:
+        return bool(self.flags & FLAG_TEMPLATE)
+
+
+def iter_pack_files(source_dir: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yields the relative and full paths of the files to pack from a directory, sorted.
+    """
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+
+        for file in sorted(files):
+            if any(fnmatch.fnmatch(file, pattern) for pattern in IGNORED_PATTERNS):
+                continue
+            fullpath = joinpaths(root, file)
+            yield os.path.relpath(fullpath, source_dir).replace(os.sep, "/"), fullpath
+
+
+def pack_directory(source_dir: str, output: Union[str, BinaryIO], metadata: Optional[Dict] = None) -> int:
+    """
+    Pack the files of a directory into a bundle.
+
+    Args:
+        source_dir (str): The template directory.
+        output (str | BinaryIO): Path of the bundle or a writable binary stream.
+        metadata (Dict): JSON serializable metadata stored in the bundle.
+
+    Returns:
+        int: The number of packed files.
+    """
+    # Imported on use, reading templates from a bundle doesn't hash them
+    import hashlib
+
+    if not os.path.isdir(source_dir):
+        raise KsPackError(f"Cannot pack '{source_dir}', it is not a directory")
+
+    files = []
+    for relative_path, fullpath in iter_pack_files(source_dir):
+        with open(fullpath, "rb") as fd:
+            files.append((relative_path, fd.read()))
+
+    metadata = {"kivystart_version": __version__, **(metadata or {})}
+    meta_bytes = json.dumps(metadata, sort_keys=True).encode("utf-8")
+    encoded_paths = [path.encode("utf-8") for path, _ in files]
+
+    index_size = sum(_PATH_LENGTH.size + len(path) + _ENTRY.size for path in encoded_paths)
+    offset = _HEADER.size + len(meta_bytes) + index_size
+
+    # Identical contents are stored once
+    offsets = {}
+    index = io.BytesIO()
+    contents = io.BytesIO()
+
+    for (path, data), encoded_path in zip(files, encoded_paths):
+        digest = hashlib.sha256(data).digest()
+
+        if digest not in offsets:
+            offsets[digest] = offset + contents.tell()
+            contents.write(data)
+
+        flags = FLAG_TEMPLATE if path.endswith(TEMPLATE_SUFFIX) else 0
+        index.write(_PATH_LENGTH.pack(len(encoded_path)) + encoded_path)
+        index.write(_ENTRY.pack(offsets[digest], len(data), digest, flags))
+
+    def write(fd):
+        fd.write(_HEADER.pack(MAGIC, len(files), len(meta_bytes)))
+        fd.write(meta_bytes)
+        fd.write(index.getvalue())
+        fd.write(contents.getvalue())
+
+    if isinstance(output, str):
+        tmp_path = output + ".tmp"
+        with open(tmp_path, "wb") as fd:
+            write(fd)
+        os.replace(tmp_path, output)
+    else:
+        write(output)
+    return len(files)
+
+
+class KsPack:
+    """
+    A loaded bundle, contents are read from an mmap of the file or from an in-memory buffer.
+    """
+    def __init__(self, buffer, path: Optional[str] = None, _mmap: Optional[mmap.mmap] = None):
+        """
+        Use `KsPack.open` or `KsPack.from_bytes` instead.
+        """
+        self.path = path
+        self._buffer = memoryview(buffer)
+        self._mmap = _mmap
+        self.entries: Dict[str, KsPackEntry] = {}
+        self.metadata: Dict = {}
+        self._parse_index()
+
+    @classmethod
+    def open(cls, path: str) -> "KsPack":
+        """
+        Load a bundle from a file using mmap.
+        """
+        with open(path, "rb") as fd:
+            size = os.fstat(fd.fileno()).st_size
+
+            if size == 0:
+                raise KsPackError(f"'{path}' is not a KivyStart template bundle")
+            mapping = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapping, path=path, _mmap=mapping)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, path: Optional[str] = None) -> "KsPack":
+        """
+        Load a bundle from memory e.g. read from a zip archive.
+        """
+        return cls(data, path=path)
+
+    def _parse_index(self):
+        buffer = self._buffer
+
+        if len(buffer) < _HEADER.size:
+            raise KsPackError(f"'{self.path}' is not a KivyStart template bundle")
+
+        magic, count, meta_length = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise KsPackError(f"'{self.path}' is not a KivyStart template bundle")
+
+        position = _HEADER.size
+        try:
+            self.metadata = json.loads(bytes(buffer[position:position + meta_length]))
+            position += meta_length
+
+            for _ in range(count):
+                (path_length,) = _PATH_LENGTH.unpack_from(buffer, position)
+                position += _PATH_LENGTH.size
+                path = bytes(buffer[position:position + path_length]).decode("utf-8")
+                position += path_length
+
+                offset, length, digest, flags = _ENTRY.unpack_from(buffer, position)
+                position += _ENTRY.size
+
+                if offset + length > len(buffer):
+                    raise KsPackError(f"Entry '{path}' is out of bounds")
+                self.entries[path] = KsPackEntry(offset, length, digest, flags)
+        except (struct.error, ValueError) as e:
+            raise KsPackError(f"Corrupted bundle '{self.path}', {e}")
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def entry(self, path: str) -> KsPackEntry:
+        try:
+            return self.entries[path]
+        except KeyError:
+            raise FileNotFoundError(f"'{path}' not found in bundle '{self.path}'")
+
+    def read_view(self, path: str) -> memoryview:
+        """
+        Returns the content of a file as a view of the bundle, without copying. The view stays valid after the
+        bundle is closed, release it when done so that the mapping can be closed.
+
+        Raises:
+            ValueError: If the bundle is closed.
+        """
+        if self._buffer is None:
+            raise ValueError(f"Bundle '{self.path}' is closed")
+
+        entry = self.entry(path)
+        return self._buffer[entry.offset:entry.offset + entry.length]
+
+    def read(self, path: str) -> bytes:
+        """
+        Returns the content of a file.
+        """
+        with self.read_view(path) as view:
+            return bytes(view)
+
+    def read_text(self, path: str, encoding: str = "utf-8") -> str:
+        """
+        Returns the content of a file as text.
+        """
+        with self.read_view(path) as view:
+            return str(view, encoding)
+
+    def list(self, prefix: str = "", pattern: str = "*") -> List[str]:
+        """
+        Returns the sorted paths under a directory prefix whose file name matches the pattern.
+        """
+        prefix = prefix.strip("/")
+        prefix = prefix + "/" if prefix else ""
+        return sorted(
+            path for path in self.entries
+            if path.startswith(prefix) and fnmatch.fnmatch(path.rsplit("/", 1)[-1], pattern)
+        )
+
+    def isdir(self, path: str) -> bool:
+        """
+        Returns whether a directory exists in the bundle.
+        """
+        prefix = path.strip("/") + "/"
+        return any(p.startswith(prefix) for p in self.entries)
+
+    def verify(self) -> List[str]:
+        """
+        Returns the paths whose content doesn't match the digest in the index.
+        """
+        import hashlib
+
+        corrupted = []
+
+        for path, entry in self.entries.items():
+            with self.read_view(path) as view:
+                if hashlib.sha256(view).digest() != entry.digest:
+                    corrupted.append(path)
+        return corrupted
+
+    def unpack(self, destination_dir: str) -> int:
+        """
+        Extract all files into a directory.
+
+        Returns:
+            int: The number of extracted files.
+        """
+        for path in self.entries:
+            fullpath = os.path.join(destination_dir, *path.split("/"))
+            if os.path.isabs(path) or ".." in path.split("/"):
+                raise KsPackError(f"Refusing to extract '{path}' outside '{destination_dir}'")
+
+            os.makedirs(os.path.dirname(fullpath), exist_ok=True)
+            with open(fullpath, "wb") as fd, self.read_view(path) as view:
+                fd.write(view)
+        return len(self.entries)
+
+    def close(self):
+        """
+        Close the bundle, closing it again does nothing. The mapping is closed once the views returned by
+        read_view are released, or garbage collected, the views stay valid until then.
+        """
+        if self._buffer is None:
+            return
+
+        self._buffer.release()
+        self._buffer = None
+        mapping, self._mmap = self._mmap, None
+
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                # Views are still alive, they keep the mapping which is unmapped when the last one is released
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,493 @@
+"""
+Compiles the class rules of kv files into a Python module.
+
+Kivy parses every kv file when the app starts and interprets the rules each time a widget is created. The
+compiled module contains a function per class rule creating the children, canvas instructions, ids,
+property values, bindings and event handlers of the rule, in the order `Builder` applies them. Being a
+regular module it is bytecode-cached, so no kv parsing happens at run time.
+
+`install()` of the compiled module wraps `Widget.apply_class_lang_rules`, widgets get the kv rules loaded by
+Kivy (e.g. KivyMD's) followed by the compiled rules matching their class.
+
+Only class rules are compiled. Root widgets, dynamic classes ('<Name@Base>'), templates, rules ignoring
+previous rules ('<-Name>') and '#:include' raise `KvCompileError`. Like kv, a watched attribute chain
+e.g. 'self.parent.width' binds the last attribute of the object found when the rule is applied.
+
+Example Usage:
+    documents = [parse_kv(content, name) for name, content in kv_files]
+    source = compile_kv(documents)
+"""
+import ast
+import hashlib
+import builtins
+import keyword
+import textwrap
+
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from kivystart.kvlang import KvDocument, KvNode, KvProperty, is_literal, watched_chains
+from kivystart.version import __version__
+
+
+# Names of the generated module that kv names must not shadow
+RESERVED_NAMES = {"self", "root", "args", "kwargs", "RULES", "SOURCES", "install"}
+
+_BUILTINS = set(dir(builtins))
+
+_HEADER = '''\
+"""
+Compiled kv rules of {sources}, generated by KivyStart v{version}.
+
+utils/kv_loader.py applies these rules to widgets as they are created instead of loading the kv files, as
+long as the kv files match SOURCES. Don't edit this file, it is ignored once the kv files change, generate
+it again with the --kv-compile option.
+"""
+import sys as _sys
+import importlib as _importlib
+
+from kivy.event import EventDispatcher as _EventDispatcher, Observable as _Observable
+from kivy.factory import Factory as _Factory
+from kivy.lang.parser import global_idmap as _global_idmap
+from kivy.uix.widget import Widget as _Widget
+
+
+# SHA-256 digests of the compiled kv files
+SOURCES = {{
+{digests}
+}}
+
+_marked = set()
+
+
+def _kv_import(alias, package):
+    # '#: import alias package' directive
+    if package not in _sys.modules:
+        try:
+            module = _importlib.__import__(package)
+        except ImportError:
+            module = _importlib.__import__(".".join(package.split(".")[:-1]))
+        for part in package.split(".")[1:]:
+            module = getattr(module, part)
+    else:
+        module = _sys.modules[package]
+    _global_idmap[alias] = module
+    return module
+
+
+def _bind(base, keys, callback):
+    # Bind the last attribute of a watched chain e.g. self.size, returns whether it was bound
+    obj = getattr(base, "proxy_ref", base)
+    for key in keys[:-1]:
+        obj = getattr(obj, key, None)
+        if obj is None:
+            return False
+    if isinstance(obj, (_EventDispatcher, _Observable)):
+        return bool(obj.fbind(keys[-1], callback))
+    return False
+
+
+def _bind_event(widget, name, callback):
+    key = name if widget.is_event_type(name) else name[3:]
+    if not widget.fbind(key, callback):
+        raise AttributeError(key)
+
+
+def _create_missing(widget, rule, properties):
+    # Properties used by a rule but not defined by the widget class are created as ObjectProperty
+    cls = widget.__class__
+    if (rule, cls) in _marked:
+        return
+    _marked.add((rule, cls))
+    for name, value in properties:
+        if not hasattr(widget, name):
+            widget.create_property(name, value, default_value=False)
+'''
+
+_FOOTER = '''
+
+def install():
+    """
+    Apply the compiled rules to widgets as they are created, after the rules loaded by the Builder.
+    """
+    if getattr(_Widget.apply_class_lang_rules, "kv_compiled", False):
+        return
+    apply_kv_rules = _Widget.apply_class_lang_rules
+    matched = {}
+
+    def apply_class_lang_rules(self, root=None, ignored_consts=set(), rule_children=None):
+        apply_kv_rules(self, root=root, ignored_consts=ignored_consts, rule_children=rule_children)
+        cls = self.__class__
+        rules = matched.get(cls)
+
+        if rules is None:
+            names = {base.__name__ for base in cls.__mro__}
+            rules = matched[cls] = [rule for selectors, rule in RULES if names.intersection(selectors)]
+
+        for rule in rules:
+            rule(self, ignored_consts, rule_children)
+
+    apply_class_lang_rules.kv_compiled = True
+    _Widget.apply_class_lang_rules = apply_class_lang_rules
+'''
+
+
+class KvCompileError(Exception):
+    """
+    Raised when kv rules can't be compiled.
+    """
+
+
+def names_used(value: str, mode: str = "eval") -> Tuple[Set[str], Set[str]]:
+    """
+    Returns the names read and the names bound (assignments, arguments, comprehension targets) by Python code.
+    """
+    tree = ast.parse(value.strip() if mode == "eval" else value, mode=mode)
+    loaded, bound = set(), set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            (loaded if isinstance(node.ctx, ast.Load) else bound).add(node.id)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+    return loaded, bound
+
+
+class _Scope:
+    """
+    Names of a rule function, the ids and their Python names in the generated code.
+    """
+    def __init__(self):
+        self.ids: Dict[str, str] = {}
+
+
+class KvCompiler:
+    """
+    Generates the Python module of the class rules of kv documents.
+    """
+    def __init__(self, documents: Sequence[KvDocument]):
+        self.documents = documents
+        self.lines: List[str] = []
+        self.imports: Set[str] = set()  # Names defined by '#: import' and '#: set' directives
+        self.free_names: Set[str] = set()  # Names resolved from Kivy's global_idmap e.g. 'app' or 'dp'
+        self.rule_names: List[Tuple[List[str], str]] = []
+        self.directive_lines: List[str] = []
+        self.instruction_count = 0
+
+    def error(self, document: KvDocument, line: int, message: str) -> KvCompileError:
+        return KvCompileError(f"{document.filename}:{line}: {message}")
+
+    def emit(self, indent: int, line: str = ""):
+        self.lines.append("    " * indent + line if line else "")
+
+    def compile(self, sources: Optional[Dict[str, str]] = None) -> str:
+        """
+        Returns the source of the module.
+
+        Args:
+            sources (Dict[str, str]): Names and contents of the kv files, their digests are recorded in SOURCES.
+        """
+        for document in self.documents:
+            if document.root is not None:
+                raise self.error(document, document.root.line, "Root widgets can't be compiled, use a class rule")
+            self.compile_directives(document)
+
+        for document in self.documents:
+            for rule in document.rules:
+                self.compile_rule(document, rule.selectors, rule.node)
+
+        sources = sources or {}
+        digests = "\n".join(
+            f"    {name!r}: {hashlib.sha256(content.encode('utf-8')).hexdigest()!r},"
+            for name, content in sources.items()
+        )
+        header = _HEADER.format(
+            sources=", ".join(sources) or "kv files",
+            version=__version__,
+            digests=digests,
+        )
+        free_names = [
+            f"{name} = _global_idmap.get({name!r})"
+            for name in sorted(self.free_names - self.imports)
+        ]
+
+        rules = ",\n".join(f"    ({tuple(selectors)!r}, {function})" for selectors, function in self.rule_names)
+        sections = [header.strip("\n")]
+
+        if self.directive_lines:
+            sections.append("# Directives\n" + "\n".join(self.directive_lines))
+
+        if free_names:
+            sections.append("# Names of the kv global scope\n" + "\n".join(free_names))
+
+        if self.lines:
+            sections.append("\n".join(self.lines))
+
+        sections.append(f"# Selectors and functions of the rules, in load order\nRULES = [\n{rules}{',' if rules else ''}\n]")
+        sections.append(_FOOTER.strip("\n"))
+        return "\n\n\n".join(sections) + "\n"
+
+    def compile_directives(self, document: KvDocument):
+        """
+        Compile the '#: import', '#: set' and '#: kivy' directives into module level statements.
+        """
+        lines = self.directive_lines
+
+        for line, directive in document.directives:
+            command, _, arguments = directive.partition(" ")
+            arguments = arguments.strip()
+
+            if command == "import":
+                parts = arguments.split()
+                if len(parts) != 2:
+                    raise self.error(document, line, f"Invalid import directive '{directive}'")
+                alias, package = parts
+                self.check_name(document, line, alias)
+                statement = f"{alias} = _kv_import({alias!r}, {package!r})"
+
+                # kv files commonly import the same names
+                if statement not in lines:
+                    lines.append(statement)
+                self.imports.add(alias)
+
+            elif command == "set":
+                name, _, value = arguments.partition(" ")
+                if not value.strip():
+                    raise self.error(document, line, f"Invalid set directive '{directive}'")
+                self.check_name(document, line, name)
+                self.check_expression(document, line, value)
+                lines.append(f"{name} = _global_idmap[{name!r}] = {value.strip()}")
+                self.imports.add(name)
+
+            elif command == "kivy":
+                lines.append(f"__import__('kivy').require({arguments!r})")
+            else:
+                raise self.error(document, line, f"Directive '#:{directive}' can't be compiled")
+
+    def check_name(self, document: KvDocument, line: int, name: str):
+        if not name.isidentifier() or keyword.iskeyword(name):
+            raise self.error(document, line, f"Invalid name '{name}'")
+
+        if name in RESERVED_NAMES or (name.startswith("_") and name != "_"):
+            raise self.error(document, line, f"Name '{name}' is reserved in compiled kv rules")
+
+    def check_expression(self, document: KvDocument, line: int, value: str, mode: str = "eval") -> Set[str]:
+        """
+        Returns the free names of a value, registering those resolved from the kv global scope.
+        """
+        loaded, bound = names_used(value, mode)
+
+        for name in loaded - bound:
+            if name.startswith("_") and name != "_":
+                raise self.error(document, line, f"Name '{name}' is reserved in compiled kv rules")
+        return loaded - bound
+
+    def register_free_names(self, names: Set[str], scope: _Scope, local_names: Set[str]):
+        for name in names:
+            if name not in local_names and name not in scope.ids and name not in _BUILTINS:
+                self.free_names.add(name)
+
+    def compile_rule(self, document: KvDocument, selectors: List[str], node: KvNode):
+        """
+        Compile a class rule into a function applying it to a widget.
+        """
+        for selector in selectors:
+            if not selector.isidentifier():
+                raise self.error(document, node.line, f"Rule '<{', '.join(selectors)}>' can't be compiled")
+
+        function = f"_rule_{len(self.rule_names)}_{selectors[0]}"
+        self.rule_names.append((selectors, function))
+
+        # Number the widgets in creation order, widget 0 is the widget the rule is applied to
+        widgets: List[KvNode] = []
+
+        def number(widget: KvNode):
+            widgets.append(widget)
+            for child in widget.children:
+                number(child)
+        number(node)
+
+        scope = _Scope()
+        for index, widget in enumerate(widgets):
+            if widget.id is not None:
+                self.check_name(document, widget.line, widget.id)
+
+                if widget.id in self.imports or widget.id == "app":
+                    raise self.error(document, widget.line, f"Id '{widget.id}' shadows a global kv name")
+                if widget.id in scope.ids:
+                    raise self.error(document, widget.line, f"Duplicate id '{widget.id}'")
+                scope.ids[widget.id] = f"_p{index}"
+
+        if self.lines:
+            self.emit(0)
+            self.emit(0)
+        self.emit(0, f"def {function}(_widget, _ignored_consts, _rule_children):")
+        self.emit(1, f"# <{', '.join(selectors)}> of {document.filename}, line {node.line}")
+        self.emit(1, "_w0 = _widget")
+        self.emit(1, "_p0 = root = _w0.proxy_ref")
+
+        self.compile_widget(document, scope, widgets, 0, parent=None)
+
+        # Properties are set once the widget tree exists, the deepest widgets first as Kivy does
+        for index in reversed(range(len(widgets))):
+            for prop in widgets[index].properties.values():
+                self.compile_property(document, scope, index, prop)
+
+        for index, widget in enumerate(widgets):
+            for handler in widget.handlers:
+                self.compile_handler(document, scope, index, handler)
+
+    def compile_widget(self, document: KvDocument, scope: _Scope, widgets: List[KvNode], index: int, parent: Optional[int]):
+        widget = widgets[index]
+        indexes = {id(node): node_index for node_index, node in enumerate(widgets)}
+
+        if parent is not None:
+            self.emit(1, f"_w{index} = _Factory.{widget.name}(__no_builder=True)")
+            self.emit(1, f"_w{parent}.add_widget(_w{index})")
+            self.emit(1, f"_w{index}.apply_class_lang_rules(root=_p0, rule_children=_rule_children)")
+            self.emit(1, f"_p{index} = _w{index}.proxy_ref")
+
+        if widget.id is not None:
+            self.emit(1, f"{widget.id} = _p{index}")
+            if index:
+                self.emit(1, f"_w0.ids[{widget.id!r}] = _p{index}")
+
+        if widget.properties:
+            missing = ", ".join(
+                f"({name!r}, {prop.value.strip() if is_literal(prop.value) else None})"
+                for name, prop in widget.properties.items()
+            )
+            self.emit(1, f"_create_missing(_w{index}, {function_key(document, widget)!r}, ({missing},))")
+
+        for group, instructions in widget.canvas_groups():
+            self.emit(1, f"with _w{index}.{group}:")
+
+            for instruction in instructions:
+                self.compile_instruction(document, scope, index, instruction)
+
+        for child in widget.children:
+            self.compile_widget(document, scope, widgets, indexes[id(child)], parent=index)
+
+        if parent is not None:
+            self.emit(1, "if _rule_children is not None:")
+            self.emit(2, f"_rule_children.append(_w{index})")
+
+    def compile_instruction(self, document: KvDocument, scope: _Scope, widget_index: int, instruction: KvNode):
+        if instruction.children or instruction.handlers or instruction.id or instruction.canvas_groups():
+            raise self.error(document, instruction.line, f"Canvas instruction '{instruction.name}' can only have properties")
+
+        self.instruction_count += 1
+        number = self.instruction_count
+        self.emit(2, f"_i{number} = _Factory.{instruction.name}()")
+
+        if not all(is_literal(prop.value) for prop in instruction.properties.values()):
+            self.emit(2, f"_q{number} = _i{number}.proxy_ref")
+
+        for prop in instruction.properties.values():
+            if is_literal(prop.value):
+                self.emit(2, f"_i{number}.{prop.name} = {prop.value.strip()}")
+                continue
+            # Canvas expressions are evaluated with the widget as 'self'
+            self.compile_setter(document, scope, 2, f"_q{number}", f"_p{widget_index}", f"i{number}", prop)
+            self.emit(2, f"_set_i{number}_{prop.name}()")
+
+    def compile_setter(
+        self,
+        document: KvDocument,
+        scope: _Scope,
+        indent: int,
+        target: str,
+        self_name: str,
+        key: str,
+        prop: KvProperty,
+        track_bound: bool = False,
+    ):
+        """
+        Emit the function setting a property from its expression and the bindings of its watched chains.
+        With track_bound, `_bound` tells whether anything was bound.
+        """
+        names = self.check_expression(document, prop.line, prop.value)
+        self.register_free_names(names, scope, {"self", "root"})
+        value = prop.value.strip()
+
+        if "\n" in value:
+            value = "(\n" + textwrap.indent(value, "    " * (indent + 2)) + "\n" + "    " * (indent + 1) + ")"
+
+        setter = f"_set_{key}_{prop.name}"
+        self.emit(indent, f"def {setter}(*args, self={self_name}):")
+        self.emit(indent + 1, f"{target}.{prop.name} = {value}")
+
+        if track_bound:
+            self.emit(indent, "_bound = False")
+
+        for chain in watched_chains(prop.value):
+            base = chain[0]
+
+            if base == "self":
+                base = self_name
+            elif base == "root":
+                base = "_p0"
+            elif base in scope.ids:
+                base = scope.ids[base]
+            elif base not in self.imports and base not in self.free_names:
+                # Not in the kv scope e.g. a builtin or a comprehension variable, nothing to bind
+                continue
+            bind = f"_bind({base}, {tuple(chain[1:])!r}, {setter})"
+            self.emit(indent, f"_bound = {bind} or _bound" if track_bound else bind)
+
+    def compile_property(self, document: KvDocument, scope: _Scope, index: int, prop: KvProperty):
+        if index == 0:
+            # Constants of the widget the rule is applied to don't override the values passed to its constructor
+            if is_literal(prop.value):
+                self.emit(1, f"if {prop.name!r} not in _ignored_consts:")
+                self.emit(2, f"_p0.{prop.name} = {prop.value.strip()}")
+                return
+
+            self.compile_setter(document, scope, 1, "_p0", "_p0", "0", prop, track_bound=True)
+            self.emit(1, f"if _bound or {prop.name!r} not in _ignored_consts:")
+            self.emit(2, f"_set_0_{prop.name}()")
+            return
+
+        if is_literal(prop.value):
+            self.emit(1, f"_p{index}.{prop.name} = {prop.value.strip()}")
+            return
+
+        self.compile_setter(document, scope, 1, f"_p{index}", f"_p{index}", str(index), prop)
+        self.emit(1, f"_set_{index}_{prop.name}()")
+
+    def compile_handler(self, document: KvDocument, scope: _Scope, index: int, handler: KvProperty):
+        names = self.check_expression(document, handler.line, handler.value, mode="exec")
+        self.register_free_names(names, scope, {"self", "root", "args"})
+        function = f"_{handler.name}_{index}"
+
+        self.emit(1, f"def {function}(*args, self=_p{index}, **kwargs):")
+        for line in textwrap.dedent(handler.value).splitlines():
+            self.emit(2 if line.strip() else 0, line.rstrip())
+
+        self.emit(1, f"_bind_event(_p{index}, {handler.name!r}, {function})")
+
+        if handler.name == "on_parent":
+            self.emit(1, f"_Factory.Widget.parent.dispatch(_w{index})")
+
+
+def function_key(document: KvDocument, node: KvNode) -> str:
+    """
+    Returns a key identifying a rule node, used for creating missing properties once per class.
+    """
+    return f"{document.filename}:{node.line}"
+
+
+def compile_kv(documents: Sequence[KvDocument], sources: Optional[Dict[str, str]] = None) -> str:
+    """
+    Compile the class rules of kv documents into the source of a Python module.
+
+    Args:
+        documents (Sequence[KvDocument]): The parsed kv files, in load order.
+        sources (Dict[str, str]): Names and contents of the kv files, recorded in SOURCES of the module.
+
+    Raises:
+        KvCompileError: If the rules use kv features that can't be compiled.
+    """
+    source = KvCompiler(documents).compile(sources)
+    # Generated code must always be valid Python
+    compile(source, "kv_compiled.py", "exec")
+    return source
@@ -0,0 +1,379 @@
+"""
+Helpers for the kv language files of generated projects.
+
+Besides bundling, this module parses kv files into a tree of rules (`parse_kv`), used by `kivystart.kvcompiler`
+to compile the rules into Python. The parser follows the kv language as parsed by Kivy's `Parser`: directives,
+class rules, widget children, properties, event handlers and canvas instructions.
+"""
+import io
+import re
+import ast
+import tokenize
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# The kv files of the basic template in load order, rules used by other rules come first. This must match
+# KV_FILES in the generated utils/kv_loader.py.
+KV_BUNDLE_FILES = (
+    "main_container.kv",
+    "main_toolbar.kv",
+    "root_container.kv",
+)
+
+KV_BUNDLE_NAME = "bundle.kv"
+
+CANVAS_GROUPS = ("canvas.before", "canvas", "canvas.after")
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class KvParseError(Exception):
+    """
+    Raised on invalid kv content.
+    """
+    def __init__(self, filename: str, line: int, message: str):
+        super().__init__(f"{filename}:{line}: {message}")
+        self.filename = filename
+        self.line = line
+
+
+@dataclass
+class KvProperty:
+    """
+    A property or an event handler (name starting with 'on_') of a kv rule.
+    """
+    name: str
+    value: str  # Python source, an expression or statements for event handlers
+    line: int
+
+
+@dataclass
+class KvNode:
+    """
+    A class rule, a widget child of a rule or a canvas instruction.
+    """
+    name: str
+    line: int
+    id: Optional[str] = None
+    properties: Dict[str, KvProperty] = field(default_factory=dict)
+    handlers: List[KvProperty] = field(default_factory=list)
+    canvas_before: List["KvNode"] = field(default_factory=list)
+    canvas: List["KvNode"] = field(default_factory=list)
+    canvas_after: List["KvNode"] = field(default_factory=list)
+    children: List["KvNode"] = field(default_factory=list)
+
+    def canvas_groups(self) -> List[Tuple[str, List["KvNode"]]]:
+        """
+        Returns the non empty canvas groups in the order Kivy builds them.
+        """
+        groups = zip(CANVAS_GROUPS, (self.canvas_before, self.canvas, self.canvas_after))
+        return [(group, instructions) for group, instructions in groups if instructions]
+
+
+@dataclass
+class KvRule:
+    """
+    A class rule e.g. '<MainContainer>:', applied to the widgets of the classes matching its selectors.
+    """
+    selectors: List[str]
+    node: KvNode
+
+
+@dataclass
+class KvDocument:
+    """
+    A parsed kv file.
+    """
+    filename: str
+    directives: List[Tuple[int, str]] = field(default_factory=list)  # e.g. (2, "import Theme theme.Theme")
+    rules: List[KvRule] = field(default_factory=list)
+    root: Optional[KvNode] = None  # Root widget of the file, if any
+
+
+def is_directive(line: str) -> bool:
+    """
+    Returns whether a kv line is a directive e.g. '#: import Theme theme.Theme'.
+    """
+    return line.lstrip().startswith("#:")
+
+
+def bundle_kv(files: Iterable[Tuple[str, str]]) -> str:
+    """
+    Combine kv files into one bundle, directives are moved to the top once and the rules of each file
+    follow in order.
+
+    Args:
+        files (Iterable[Tuple[str, str]]): The names and contents of the kv files, in load order.
+
+    Returns:
+        str: The bundle content.
+    """
+    directives: List[str] = []
+    rules: List[str] = []
+
+    for name, content in files:
+        rules.append(f"# {name}")
+
+        for line in content.splitlines():
+            if is_directive(line):
+                directive = " ".join(line.split())
+                if directive not in directives:
+                    directives.append(directive)
+            else:
+                rules.append(line)
+        rules.append("")
+    return "\n".join(directives + [""] + rules)
+
+
+def strip_comment(value: str) -> str:
+    """
+    Returns a single line Python value without its trailing comment e.g. '[1, 1, 1, 1]  # White'.
+    """
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(value).readline):
+            if token.type == tokenize.COMMENT:
+                return value[:token.start[1]].rstrip()
+    except (tokenize.TokenError, SyntaxError):
+        pass
+    return value
+
+
+def is_literal(value: str) -> bool:
+    """
+    Returns whether a property value is a constant e.g. '[1, .1]' or '"horizontal"'.
+    """
+    try:
+        ast.literal_eval(value.strip())
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return False
+    return True
+
+
+def watched_chains(value: str) -> List[List[str]]:
+    """
+    Returns the attribute chains a property value depends on e.g. [['self', 'size']] for 'self.size[0] * 2'.
+
+    Like Kivy, a rule binds the last attribute of every chain so the property is updated when it changes.
+    """
+    chains: List[List[str]] = []
+
+    def visit(node: ast.AST):
+        if isinstance(node, ast.Attribute):
+            chain = []
+            while isinstance(node, ast.Attribute):
+                chain.append(node.attr)
+                node = node.value
+
+            if isinstance(node, ast.Name):
+                chain.append(node.id)
+                chain.reverse()
+                if chain not in chains:
+                    chains.append(chain)
+                return
+
+        for child in ast.iter_child_nodes(node):
+            visit(child)
+
+    visit(ast.parse(value.strip(), mode="eval"))
+    return chains
+
+
+class _Line:
+    """
+    A non empty, non comment line and the lines indented under it.
+    """
+    __slots__ = ("number", "indent", "content", "raw", "children")
+
+    def __init__(self, number: int, indent: int, content: str, raw: str):
+        self.number = number
+        self.indent = indent
+        self.content = content
+        self.raw = raw
+        self.children: List["_Line"] = []
+
+    def block(self) -> List["_Line"]:
+        """
+        Returns the lines indented under this line, in order.
+        """
+        lines = []
+        for child in self.children:
+            lines.append(child)
+            lines.extend(child.block())
+        return lines
+
+
+class KvParser:
+    """
+    Parses the content of a kv file into a `KvDocument`.
+    """
+    def __init__(self, content: str, filename: str = "<kv>"):
+        self.content = content
+        self.filename = filename
+
+    def error(self, line: int, message: str) -> KvParseError:
+        return KvParseError(self.filename, line, message)
+
+    def parse(self) -> KvDocument:
+        document = KvDocument(filename=self.filename)
+
+        for line in self.read_lines(document):
+            content = line.content
+
+            if not content.endswith(":"):
+                raise self.error(line.number, f"Invalid rule '{content}', rules end with ':'")
+
+            if content.startswith("<"):
+                if not content.endswith(">:"):
+                    raise self.error(line.number, f"Invalid rule '{content}'")
+                selectors = [selector.strip() for selector in content[1:-2].split(",")]
+
+                if not all(selectors):
+                    raise self.error(line.number, f"Invalid rule '{content}'")
+                node = KvNode(name=selectors[0], line=line.number)
+                self.parse_node(node, line)
+                document.rules.append(KvRule(selectors=selectors, node=node))
+
+            elif content.startswith("["):
+                raise self.error(line.number, "Templates are not supported, use dynamic classes instead")
+            else:
+                if document.root is not None:
+                    raise self.error(line.number, "Only one root widget is allowed")
+                document.root = KvNode(name=content[:-1].strip(), line=line.number)
+                self.parse_node(document.root, line)
+        return document
+
+    def read_lines(self, document: KvDocument) -> List[_Line]:
+        """
+        Returns the top level lines with their indented lines, directives are added to the document.
+        """
+        top_level: List[_Line] = []
+        stack: List[_Line] = []
+
+        for number, raw in enumerate(self.content.splitlines(), start=1):
+            stripped = raw.strip()
+
+            if not stripped:
+                continue
+            elif stripped.startswith("#:"):
+                document.directives.append((number, stripped[2:].strip()))
+                continue
+            elif stripped.startswith("#"):
+                continue
+
+            indentation = raw[:len(raw) - len(raw.lstrip())]
+            if "\t" in indentation:
+                raise self.error(number, "Tabs are not allowed for indentation, use spaces")
+
+            line = _Line(number, len(indentation), stripped, raw.rstrip())
+
+            while stack and stack[-1].indent >= line.indent:
+                stack.pop()
+
+            siblings = stack[-1].children if stack else top_level
+            if siblings and siblings[0].indent != line.indent:
+                raise self.error(number, "Invalid indentation, must be a multiple of the previous indentation")
+
+            if not stack and line.indent:
+                raise self.error(number, "Invalid indentation, top level rules can't be indented")
+
+            siblings.append(line)
+            stack.append(line)
+        return top_level
+
+    def parse_node(self, node: KvNode, line: _Line):
+        """
+        Parse the ids, properties, handlers, canvas groups and children of a rule or widget.
+        """
+        for child in line.children:
+            name, separator, value = child.content.partition(":")
+            name, value = name.strip(), value.strip()
+
+            if not separator:
+                raise self.error(child.number, f"Invalid line '{child.content}', expected 'name: value'")
+
+            if name in CANVAS_GROUPS:
+                if value:
+                    raise self.error(child.number, f"'{name}' doesn't take a value")
+                instructions = getattr(node, name.replace(".", "_"))
+                instructions.extend(self.parse_instructions(child))
+
+            elif name[:1].isupper():
+                if value:
+                    raise self.error(child.number, f"Widget '{name}' doesn't take a value")
+                widget = KvNode(name=name, line=child.number)
+                self.parse_node(widget, child)
+                node.children.append(widget)
+
+            elif name == "id":
+                node.id = value.split("#", 1)[0].strip()
+
+                if not _IDENTIFIER.match(node.id):
+                    raise self.error(child.number, f"Invalid id '{node.id}'")
+
+            else:
+                prop = self.parse_property(name, value, child)
+
+                if name.startswith("on_"):
+                    node.handlers.append(prop)
+                else:
+                    node.properties[name] = prop
+
+    def parse_instructions(self, line: _Line) -> List[KvNode]:
+        """
+        Parse the instructions of a canvas group.
+        """
+        instructions = []
+
+        for child in line.children:
+            name, separator, value = child.content.partition(":")
+            name = name.strip()
+
+            if not separator or value.strip() or not name[:1].isupper():
+                raise self.error(child.number, f"Invalid canvas instruction '{child.content}'")
+            instruction = KvNode(name=name, line=child.number)
+
+            for prop_line in child.children:
+                prop_name, separator, prop_value = prop_line.content.partition(":")
+                if not separator:
+                    raise self.error(prop_line.number, f"Invalid line '{prop_line.content}', expected 'name: value'")
+
+                prop = self.parse_property(prop_name.strip(), prop_value.strip(), prop_line)
+                instruction.properties[prop.name] = prop
+            instructions.append(instruction)
+        return instructions
+
+    def parse_property(self, name: str, value: str, line: _Line) -> KvProperty:
+        """
+        Parse a property or handler, values can continue on the indented lines under it.
+        """
+        if not _IDENTIFIER.match(name):
+            raise self.error(line.number, f"Invalid property name '{name}'")
+
+        if line.children:
+            # The value continues on the indented lines e.g. the statements of a handler
+            block = line.block()
+            indent = min(block_line.indent for block_line in block)
+            value = "\n".join(([value] if value else []) + [block_line.raw[indent:] for block_line in block])
+        elif value:
+            value = strip_comment(value)
+        else:
+            raise self.error(line.number, f"Property '{name}' has no value")
+
+        mode = "exec" if name.startswith("on_") else "eval"
+        try:
+            ast.parse(value if mode == "exec" else value.strip(), mode=mode)
+        except SyntaxError as e:
+            raise self.error(line.number, f"Invalid value for '{name}', {e.msg}")
+        return KvProperty(name=name, value=value, line=line.number)
+
+
+def parse_kv(content: str, filename: str = "<kv>") -> KvDocument:
+    """
+    Parse the content of a kv file.
+
+    Raises:
+        KvParseError: If the content is not valid kv.
+    """
+    return KvParser(content, filename).parse()
@@ -0,0 +1,536 @@
+"""
+Headless mock of the parts of Kivy used by kv rules, for checking compiled kv rules without Kivy.
+
+`verify_compiled` builds the widget of every class rule twice under the mock: once with a reference
+interpreter of the parsed kv tree following `Builder._apply_rule`, once with the compiled module. It then
+compares the widget trees: classes, ids, property values, canvas instructions and bindings. Every bound
+property and event is then changed or dispatched and the trees are compared again, which checks that the
+bindings update the same properties.
+
+Values the mock doesn't know, e.g. `self.texture_size` or `Theme.text_color`, are symbolic `MockValue`s
+so expressions evaluate to comparable values.
+"""
+import sys
+import types
+import contextlib
+
+from typing import Callable, Dict, Iterator, List, Sequence
+
+from kivystart.kvlang import KvDocument, KvNode, KvProperty, watched_chains
+
+
+# Canvas instructions, other names are widgets
+GRAPHICS_INSTRUCTIONS = {
+    "Bezier", "BorderImage", "Callback", "ClearBuffers", "ClearColor", "Color", "Ellipse", "Line", "Mesh",
+    "Point", "PopMatrix", "PushMatrix", "Quad", "Rectangle", "Rotate", "RoundedRectangle", "Scale",
+    "SmoothLine", "StencilPop", "StencilPush", "StencilUnUse", "StencilUse", "Translate", "Triangle",
+}
+
+# Maximum number of reported differences
+MAX_DIFFERENCES = 20
+
+
+class MockValue:
+    """
+    A symbolic value, operations on it return new symbolic values named after the operation.
+    """
+    __slots__ = ("_name",)
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_name", name)
+
+    def __repr__(self) -> str:
+        return f"<{self._name}>"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MockValue) and other._name == self._name
+
+    def __hash__(self) -> int:
+        return hash(self._name)
+
+    def __getattr__(self, name: str) -> "MockValue":
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return MockValue(f"{self._name}.{name}")
+
+    def __setattr__(self, name: str, value):
+        # Assignments in event handlers e.g. 'app.root.current = "home"' are ignored
+        pass
+
+    def __getitem__(self, key) -> "MockValue":
+        return MockValue(f"{self._name}[{key!r}]")
+
+    def __call__(self, *args, **kwargs) -> "MockValue":
+        arguments = [repr(arg) for arg in args] + [f"{key}={value!r}" for key, value in kwargs.items()]
+        return MockValue(f"{self._name}({', '.join(arguments)})")
+
+    def __iter__(self):
+        return iter(())
+
+    def __bool__(self) -> bool:
+        return True
+
+
+def _operator(symbol: str, reflected: bool = False):
+    def operation(self, other):
+        if reflected:
+            return MockValue(f"({other!r} {symbol} {self!r})")
+        return MockValue(f"({self!r} {symbol} {other!r})")
+    return operation
+
+
+for _name, _symbol in (
+    ("add", "+"), ("sub", "-"), ("mul", "*"), ("truediv", "/"), ("floordiv", "//"), ("mod", "%"), ("pow", "**"),
+):
+    setattr(MockValue, f"__{_name}__", _operator(_symbol))
+    setattr(MockValue, f"__r{_name}__", _operator(_symbol, reflected=True))
+
+MockValue.__neg__ = lambda self: MockValue(f"-{self!r}")
+MockValue.__lt__ = MockValue.__le__ = MockValue.__gt__ = MockValue.__ge__ = lambda self, other: False
+
+
+def create_mock_kivy() -> types.SimpleNamespace:
+    """
+    Returns a fresh mock of the Kivy classes used by kv rules, classes are not shared between mocks.
+    """
+    canvas_stack = []
+
+    class Observable:
+        pass
+
+    class EventDispatcher(Observable):
+        def __init__(self, **kwargs):
+            object.__setattr__(self, "_observers", {})
+            for key, value in kwargs.items():
+                setattr(self, key, value)
+
+        def __getattr__(self, name: str):
+            if name.startswith("_"):
+                raise AttributeError(name)
+            return MockValue(f"{type(self).__name__}.{name}")
+
+        def __setattr__(self, name: str, value):
+            object.__setattr__(self, name, value)
+            for callback, largs in list(self._observers.get(name, ())):
+                callback(*largs, self, value)
+
+        @property
+        def proxy_ref(self):
+            return self
+
+        def fbind(self, name: str, callback: Callable, *largs) -> int:
+            observers = self._observers.setdefault(name, [])
+            observers.append((callback, largs))
+            return len(observers)
+
+        def bind(self, **kwargs):
+            for name, callback in kwargs.items():
+                self.fbind(name, callback)
+
+        def is_event_type(self, name: str) -> bool:
+            return name.startswith("on_")
+
+        def dispatch(self, name: str, *args):
+            for callback, largs in list(self._observers.get(name, ())):
+                callback(*largs, self, *args)
+
+        def create_property(self, name: str, value=None, default_value: bool = True):
+            setattr(self, name, value)
+
+    class InstructionGroup:
+        def __init__(self):
+            self.children = []
+
+        def __enter__(self):
+            canvas_stack.append(self)
+            return self
+
+        def __exit__(self, *exc_info):
+            canvas_stack.pop()
+
+    class Canvas(InstructionGroup):
+        def __init__(self):
+            super().__init__()
+            self.before = InstructionGroup()
+            self.after = InstructionGroup()
+
+    class Instruction:
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+            if canvas_stack:
+                canvas_stack[-1].children.append(self)
+
+        def __getattr__(self, name: str):
+            if name.startswith("_"):
+                raise AttributeError(name)
+            return MockValue(f"{type(self).__name__}.{name}")
+
+        @property
+        def proxy_ref(self):
+            return self
+
+    class ParentProperty:
+        def dispatch(self, widget):
+            widget.dispatch("parent", widget.parent)
+
+    class Widget(EventDispatcher):
+        parent = ParentProperty()
+
+        def __init__(self, **kwargs):
+            no_builder = kwargs.pop("__no_builder", False)
+            object.__setattr__(self, "_observers", {})
+            self.canvas = Canvas()
+            self.children = []
+            self.ids = {}
+            self.parent = None
+            super().__init__(**kwargs)
+
+            if not no_builder:
+                rule_children = []
+                self.apply_class_lang_rules(ignored_consts=set(kwargs), rule_children=rule_children)
+                for widget in rule_children:
+                    widget.dispatch("on_kv_post", self)
+                self.dispatch("on_kv_post", self)
+
+        def add_widget(self, widget):
+            self.children.insert(0, widget)
+            widget.parent = self
+
+        def apply_class_lang_rules(self, root=None, ignored_consts=set(), rule_children=None):
+            # No kv rules loaded by the Builder
+            pass
+
+    class App(EventDispatcher):
+        pass
+
+    class Factory:
+        def __init__(self):
+            self.classes = {"Widget": Widget}
+
+        def get(self, name: str) -> type:
+            if name not in self.classes:
+                base = Instruction if name in GRAPHICS_INSTRUCTIONS else Widget
+                self.classes[name] = type(name, (base,), {})
+            return self.classes[name]
+
+        def __getattr__(self, name: str) -> type:
+            if name.startswith("_"):
+                raise AttributeError(name)
+            return self.get(name)
+
+    app = App()
+    return types.SimpleNamespace(
+        Observable=Observable,
+        EventDispatcher=EventDispatcher,
+        Instruction=Instruction,
+        Widget=Widget,
+        Factory=Factory(),
+        app=app,
+        # Kivy's kv global scope, metrics functions are symbolic
+        global_idmap={"app": app, **{unit: MockValue(unit) for unit in ("pt", "inch", "cm", "mm", "dp", "sp")}},
+    )
+
+
+@contextlib.contextmanager
+def mock_kivy(packages: Sequence[str] = ()) -> Iterator[types.SimpleNamespace]:
+    """
+    Install a mock of Kivy in sys.modules, the packages imported by kv directives are symbolic values.
+    The previous modules are restored on exit.
+    """
+    kivy = create_mock_kivy()
+    modules = {
+        "kivy": types.ModuleType("kivy"),
+        "kivy.event": types.ModuleType("kivy.event"),
+        "kivy.factory": types.ModuleType("kivy.factory"),
+        "kivy.lang": types.ModuleType("kivy.lang"),
+        "kivy.lang.parser": types.ModuleType("kivy.lang.parser"),
+        "kivy.uix": types.ModuleType("kivy.uix"),
+        "kivy.uix.widget": types.ModuleType("kivy.uix.widget"),
+    }
+    modules["kivy"].require = lambda version: None
+    modules["kivy.event"].EventDispatcher = kivy.EventDispatcher
+    modules["kivy.event"].Observable = kivy.Observable
+    modules["kivy.factory"].Factory = kivy.Factory
+    modules["kivy.lang.parser"].global_idmap = kivy.global_idmap
+    modules["kivy.uix.widget"].Widget = kivy.Widget
+
+    for package in packages:
+        modules[package] = MockValue(package)
+
+    saved = {name: sys.modules[name] for name in modules if name in sys.modules}
+    sys.modules.update(modules)
+    try:
+        yield kivy
+    finally:
+        for name in modules:
+            if name in saved:
+                sys.modules[name] = saved[name]
+            else:
+                sys.modules.pop(name, None)
+
+
+class KvInterpreter:
+    """
+    Reference implementation of kv class rules for the mock, applying the parsed tree as Kivy's Builder does.
+    """
+    def __init__(self, kivy: types.SimpleNamespace, documents: Sequence[KvDocument]):
+        self.kivy = kivy
+        self.rules = []
+        self.rulectx: Dict[int, Dict] = {}
+
+        for document in documents:
+            self.execute_directives(document)
+            self.rules.extend((set(rule.selectors), rule.node) for rule in document.rules)
+
+    def execute_directives(self, document: KvDocument):
+        idmap = self.kivy.global_idmap
+
+        for _, directive in document.directives:
+            command, _, arguments = directive.partition(" ")
+
+            if command == "import":
+                alias, package = arguments.split()
+                idmap[alias] = sys.modules[package]
+            elif command == "set":
+                name, value = arguments.strip().split(" ", 1)
+                idmap[name] = eval(value, idmap)
+
+    def install(self):
+        interpreter = self
+
+        def apply_class_lang_rules(self, root=None, ignored_consts=set(), rule_children=None):
+            interpreter.apply(self, ignored_consts, rule_children)
+
+        self.kivy.Widget.apply_class_lang_rules = apply_class_lang_rules
+
+    def apply(self, widget, ignored_consts, rule_children):
+        names = {cls.__name__ for cls in type(widget).__mro__}
+
+        for selectors, node in self.rules:
+            if names & selectors:
+                self.apply_rule(widget, node, node, ignored_consts, rule_children)
+
+    def apply_rule(self, widget, rule: KvNode, rootrule: KvNode, ignored_consts=frozenset(), rule_children=None):
+        if rule is rootrule:
+            self.rulectx[id(rootrule)] = {"ids": {"root": widget.proxy_ref}, "set": [], "hdl": []}
+        rctx = self.rulectx[id(rootrule)]
+
+        if rule.id:
+            rctx["ids"][rule.id] = widget.proxy_ref
+            root = rctx["ids"]["root"]
+            for key, value in rctx["ids"].items():
+                if key != "root" and value is not root:
+                    root.ids[key] = value
+
+        for name, prop in rule.properties.items():
+            if not hasattr(widget, name):
+                widget.create_property(name, None, default_value=False)
+
+        for group, instructions in rule.canvas_groups():
+            canvas = widget.canvas if group == "canvas" else getattr(widget.canvas, group.split(".")[1])
+            with canvas:
+                self.build_canvas(widget, instructions, rootrule)
+
+        for child_rule in rule.children:
+            child = self.kivy.Factory.get(child_rule.name)(**{"__no_builder": True})
+            widget.add_widget(child)
+            child.apply_class_lang_rules(root=rctx["ids"]["root"], rule_children=rule_children)
+            self.apply_rule(child, child_rule, rootrule, rule_children=rule_children)
+
+            if rule_children is not None:
+                rule_children.append(child)
+
+        if rule.properties:
+            rctx["set"].append((widget.proxy_ref, list(rule.properties.values())))
+        if rule.handlers:
+            rctx["hdl"].append((widget.proxy_ref, rule.handlers))
+
+        if rule is not rootrule:
+            return
+
+        for widget_set, properties in reversed(rctx["set"]):
+            for prop in properties:
+                value, bound = self.create_handler(widget_set, widget_set, prop, rctx["ids"])
+                if widget_set is not widget or bound or prop.name not in ignored_consts:
+                    setattr(widget_set, prop.name, value)
+
+        for widget_set, handlers in rctx["hdl"]:
+            for handler in handlers:
+                key = handler.name if widget_set.is_event_type(handler.name) else handler.name[3:]
+                idmap = dict(self.kivy.global_idmap)
+                idmap.update(rctx["ids"])
+                idmap["self"] = widget_set.proxy_ref
+                widget_set.fbind(key, self.custom_callback, handler, idmap)
+
+                if handler.name == "on_parent":
+                    self.kivy.Widget.parent.dispatch(widget_set)
+
+        del self.rulectx[id(rootrule)]
+
+    def build_canvas(self, widget, instructions: List[KvNode], rootrule: KvNode):
+        ids = dict(self.rulectx[id(rootrule)]["ids"])
+
+        for instruction_rule in instructions:
+            instruction = self.kivy.Factory.get(instruction_rule.name)()
+            for prop in instruction_rule.properties.values():
+                value, _ = self.create_handler(widget, instruction.proxy_ref, prop, ids)
+                setattr(instruction, prop.name, value)
+
+    def create_handler(self, iself, element, prop: KvProperty, ids: Dict):
+        idmap = dict(ids)
+        idmap.update(self.kivy.global_idmap)
+        idmap["self"] = iself.proxy_ref
+        code = compile(prop.value.strip(), "<kv>", "eval")
+
+        def call_fn(*args):
+            setattr(element, prop.name, eval(code, idmap))
+
+        bound = False
+        for keys in watched_chains(prop.value):
+            obj = idmap.get(keys[0])
+            if obj is None:
+                continue
+
+            for key in keys[1:-1]:
+                obj = getattr(obj, key, None)
+                if obj is None:
+                    break
+
+            if isinstance(obj, (self.kivy.EventDispatcher, self.kivy.Observable)):
+                bound = bool(obj.fbind(keys[-1], call_fn)) or bound
+        return eval(code, idmap), bound
+
+    @staticmethod
+    def custom_callback(handler: KvProperty, idmap: Dict, *largs, **kwargs):
+        idmap["args"] = largs
+        exec(compile(handler.value, "<kv>", "exec"), idmap)
+
+
+def walk(widget, path: str) -> Iterator:
+    """
+    Yields the path and widget of a widget and its descendants.
+    """
+    yield path, widget
+    for index, child in enumerate(widget.children):
+        yield from walk(child, f"{path}/{index}:{type(child).__name__}")
+
+
+def snapshot(kivy: types.SimpleNamespace, widget) -> Dict:
+    """
+    Returns a comparable description of a widget tree and the bindings of the app.
+    """
+    paths = {id(obj): path for path, obj in walk(widget, type(widget).__name__)}
+    paths[id(kivy.app)] = "app"
+
+    def describe(value):
+        if id(value) in paths:
+            return paths[id(value)]
+        elif isinstance(value, (list, tuple)):
+            return [describe(item) for item in value]
+        elif isinstance(value, (kivy.EventDispatcher, kivy.Instruction)):
+            return f"<{type(value).__name__} outside the tree>"
+        return repr(value)
+
+    def attributes(obj, skip=()):
+        return {
+            key: describe(value) for key, value in sorted(vars(obj).items())
+            if not key.startswith("_") and key not in skip
+        }
+
+    def observers(obj):
+        return {name: len(callbacks) for name, callbacks in sorted(obj._observers.items()) if callbacks}
+
+    tree = {}
+    for path, obj in walk(widget, type(widget).__name__):
+        canvas = {
+            group: [(type(instruction).__name__, attributes(instruction)) for instruction in instructions.children]
+            for group, instructions in (
+                ("canvas.before", obj.canvas.before), ("canvas", obj.canvas), ("canvas.after", obj.canvas.after),
+            )
+        }
+        tree[path] = {
+            "properties": attributes(obj, skip=("canvas", "children", "ids")),
+            "ids": {key: describe(value) for key, value in sorted(obj.ids.items())},
+            "canvas": canvas,
+            "bindings": observers(obj),
+        }
+    tree["app"] = {"bindings": observers(kivy.app)}
+    return tree
+
+
+def poke(kivy: types.SimpleNamespace, widget):
+    """
+    Change every bound property and dispatch every bound event of a widget tree and of the app.
+    """
+    targets = list(walk(widget, type(widget).__name__)) + [("app", kivy.app)]
+
+    for path, obj in targets:
+        for name in sorted(obj._observers):
+            if name.startswith("on_"):
+                obj.dispatch(name)
+            elif name != "parent":
+                setattr(obj, name, MockValue(f"changed {path}.{name}"))
+
+
+def build_trees(documents: Sequence[KvDocument], setup: Callable) -> Dict[str, Dict]:
+    """
+    Build the widget of every class rule under the mock after `setup(kivy)` installed the rules, returns the
+    snapshots of the trees when built and after poking their bindings.
+    """
+    packages = [
+        directive.split()[2] for document in documents for _, directive in document.directives
+        if directive.startswith("import ") and len(directive.split()) == 3
+    ]
+    trees = {}
+
+    with mock_kivy(packages) as kivy:
+        setup(kivy)
+
+        for document in documents:
+            for rule in document.rules:
+                for selector in rule.selectors:
+                    widget = kivy.Factory.get(selector)()
+                    built = snapshot(kivy, widget)
+                    poke(kivy, widget)
+                    trees[selector] = {"built": built, "changed": snapshot(kivy, widget)}
+    return trees
+
+
+def differences(expected, actual, path: str = "") -> List[str]:
+    """
+    Returns the differences between two snapshots.
+    """
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        found = []
+        for key in list(expected) + [key for key in actual if key not in expected]:
+            if key not in actual:
+                found.append(f"{path}/{key}: missing from the compiled rules")
+            elif key not in expected:
+                found.append(f"{path}/{key}: not in the kv rules")
+            else:
+                found.extend(differences(expected[key], actual[key], f"{path}/{key}"))
+        return found
+
+    if expected != actual:
+        return [f"{path}: expected {expected!r}, got {actual!r}"]
+    return []
+
+
+def verify_compiled(documents: Sequence[KvDocument], compiled_source: str) -> List[str]:
+    """
+    Check compiled kv rules against the kv tree under the mock.
+
+    Returns:
+        List[str]: The differences between the widgets built by the kv rules and by the compiled rules, empty if
+            they match.
+    """
+    def setup_interpreter(kivy):
+        KvInterpreter(kivy, documents).install()
+
+    def setup_compiled(kivy):
+        module = types.ModuleType("kv_compiled")
+        exec(compile(compiled_source, "kv_compiled.py", "exec"), module.__dict__)
+        module.install()
+
+    found = differences(build_trees(documents, setup_interpreter), build_trees(documents, setup_compiled))
+    return found[:MAX_DIFFERENCES]
@@ -0,0 +1,294 @@
+"""
+Output backends for generated projects.
+
+App templates save files through an output backend rather than the filesystem directly. `DirectoryOutput`
+writes the project into a directory, `ArchiveOutput` streams every saved file straight into a zip or
+tar.gz archive (a file or any writable binary stream e.g. stdout or an HTTP response) without a
+temporary directory.
+
+Example Usage:
+    with ArchiveOutput("demo.zip", root="demo") as output:
+        app_template.create_project(destination_dir, output=output)
+"""
+import os
+import io
+import sys
+import time
+
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional, Set, Union
+
+from kivystart.utils.base import joinpaths
+
+
+ARCHIVE_FORMATS = ("zip", "tar.gz")
+
+# Permissions of archive entries
+FILE_MODE = 0o644
+DIR_MODE = 0o755
+
+
+class ProjectOutputError(Exception):
+    """
+    Raised when an output backend can't perform an operation.
+    """
+
+
+def normalize_path(path: str) -> str:
+    """
+    Returns a relative project path using forward slashes, without leading or trailing slashes.
+    """
+    path = path.replace(os.sep, "/").strip("/")
+    parts = [part for part in path.split("/") if part not in ("", ".")]
+
+    if ".." in parts:
+        raise ProjectOutputError(f"Path '{path}' is outside the project")
+    return "/".join(parts)
+
+
+def archive_format(target: str) -> str:
+    """
+    Returns the archive format for the target path, archives streamed to stdout ('-') are zip files.
+    """
+    if target == "-" or target.endswith(".zip"):
+        return "zip"
+    elif target.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    raise ProjectOutputError(f"Unsupported archive '{target}', supported formats are {ARCHIVE_FORMATS}")
+
+
+class ProjectOutput(ABC):
+    """
+    Destination of the files of a generated project, paths are relative to the project root.
+    """
+    # Whether external tools (git, venv, buildozer) can run in the project directory
+    supports_commands = False
+
+    @abstractmethod
+    def exists(self, path: str) -> bool:
+        """
+        Returns whether a file or directory exists at the path.
+        """
+
+    @abstractmethod
+    def isdir(self, path: str) -> bool:
+        """
+        Returns whether a directory exists at the path.
+        """
+
+    @abstractmethod
+    def read(self, path: str) -> bytes:
+        """
+        Returns the content of a file.
+        """
+
+    @abstractmethod
+    def write(self, path: str, data: bytes, mode: str = "x", makedirs: bool = True):
+        """
+        Write a file.
+
+        Args:
+            path (str): The file path.
+            data (bytes): The file content.
+            mode (str): 'x' to only create a new file or 'w' to overwrite an existing one.
+            makedirs (bool): Whether to create parent directories if they don't exist.
+
+        Raises:
+            FileExistsError: If mode is 'x' and the file already exists.
+        """
+
+    @abstractmethod
+    def makedirs(self, path: str):
+        """
+        Create a directory and its parents if they don't exist.
+        """
+
+    def close(self):
+        """
+        Flush and release the output.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DirectoryOutput(ProjectOutput):
+    """
+    Writes the project into a directory.
+    """
+    supports_commands = True
+
+    def __init__(self, destination_dir: str):
+        self.destination_dir = destination_dir
+
+    def path(self, path: str) -> str:
+        """
+        Returns the full path on disk.
+        """
+        return joinpaths(self.destination_dir, normalize_path(path))
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(self.path(path))
+
+    def isdir(self, path: str) -> bool:
+        return os.path.isdir(self.path(path))
+
+    def read(self, path: str) -> bytes:
+        with open(self.path(path), "rb") as fd:
+            return fd.read()
+
+    def write(self, path: str, data: bytes, mode: str = "x", makedirs: bool = True):
+        fullpath = self.path(path)
+
+        if makedirs:
+            os.makedirs(os.path.dirname(fullpath), exist_ok=True)
+
+        if mode == "w" and os.path.isfile(fullpath) and os.stat(fullpath).st_nlink > 1:
+            # Hardlinked e.g. from the project cache, never write through to the other links
+            os.unlink(fullpath)
+
+        with open(fullpath, mode + "b") as fd:
+            fd.write(data)
+
+    def makedirs(self, path: str):
+        os.makedirs(self.path(path), exist_ok=True)
+
+
+class ArchiveOutput(ProjectOutput):
+    """
+    Streams the project into a zip or tar.gz archive.
+
+    Every file is written to the archive as soon as it is saved and only entry names are kept in memory,
+    the archive can be written to a non-seekable stream. Files can't be rewritten once streamed.
+    """
+    def __init__(
+        self,
+        target: Union[str, BinaryIO],
+        root: Optional[str] = None,
+        format: Optional[str] = None,
+    ):
+        """
+        Args:
+            target (str | BinaryIO): Path of the archive, '-' for stdout or a writable binary stream.
+            root (str): Directory all entries are put in e.g. the project name.
+            format (str): The archive format, 'zip' or 'tar.gz'. Guessed from the target path if not provided.
+        """
+        if format is None:
+            if not isinstance(target, str):
+                raise ProjectOutputError("The archive format is required when streaming to a file object")
+            format = archive_format(target)
+
+        if format not in ARCHIVE_FORMATS:
+            raise ProjectOutputError(f"Unsupported archive format '{format}', supported formats are {ARCHIVE_FORMATS}")
+
+        self.format = format
+        self.root = normalize_path(root) if root else ""
+        self.mtime = time.time()
+        self.files: Set[str] = set()
+        self.dirs: Set[str] = set()
+        self._owned_stream = None
+
+        if target == "-":
+            # Anything already printed must come before the archive
+            sys.stdout.flush()
+            stream = os.fdopen(os.dup(1), "wb")
+            self._owned_stream = stream
+        elif isinstance(target, str):
+            stream = open(target, "wb")
+            self._owned_stream = stream
+        else:
+            stream = target
+
+        # Imported on use, projects written to a directory don't need the archive modules
+        import tarfile
+        import zipfile
+
+        if format == "zip":
+            self.archive = zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self.archive = tarfile.open(fileobj=stream, mode="w|gz")
+
+    def entry_name(self, path: str) -> str:
+        """
+        Returns the archive entry name for a project path.
+        """
+        path = normalize_path(path)
+        return joinpaths(self.root, path).strip("/") if self.root else path
+
+    def exists(self, path: str) -> bool:
+        path = normalize_path(path)
+        return path in self.files or path in self.dirs
+
+    def isdir(self, path: str) -> bool:
+        return normalize_path(path) in self.dirs
+
+    def read(self, path: str) -> bytes:
+        raise ProjectOutputError(f"Cannot read '{path}', archive outputs are write only")
+
+    def _add_dir(self, path: str):
+        import tarfile
+        import zipfile
+
+        if not path or path in self.dirs:
+            return
+
+        parent = path.rsplit("/", 1)[0] if "/" in path else ""
+        self._add_dir(parent)
+        self.dirs.add(path)
+        name = self.entry_name(path) + "/"
+
+        if self.format == "zip":
+            info = zipfile.ZipInfo(name, date_time=time.localtime(self.mtime)[:6])
+            info.external_attr = (0o40000 | DIR_MODE) << 16 | 0x10
+            self.archive.writestr(info, b"")
+        else:
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.DIRTYPE
+            info.mode = DIR_MODE
+            info.mtime = self.mtime
+            self.archive.addfile(info)
+
+    def write(self, path: str, data: bytes, mode: str = "x", makedirs: bool = True):
+        import tarfile
+        import zipfile
+
+        path = normalize_path(path)
+
+        if path in self.files:
+            if mode == "x":
+                raise FileExistsError(f"File '{path}' already exists")
+            raise ProjectOutputError(f"Cannot overwrite '{path}', it has already been streamed to the archive")
+
+        parent = path.rsplit("/", 1)[0] if "/" in path else ""
+        if parent not in self.dirs and parent:
+            if not makedirs:
+                raise FileNotFoundError(f"Directory '{parent}' doesn't exist")
+            self._add_dir(parent)
+
+        name = self.entry_name(path)
+
+        if self.format == "zip":
+            info = zipfile.ZipInfo(name, date_time=time.localtime(self.mtime)[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = (0o100000 | FILE_MODE) << 16
+            self.archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = FILE_MODE
+            info.mtime = self.mtime
+            self.archive.addfile(info, io.BytesIO(data))
+        self.files.add(path)
+
+    def makedirs(self, path: str):
+        self._add_dir(normalize_path(path))
+
+    def close(self):
+        self.archive.close()
+
+        if self._owned_stream:
+            self._owned_stream.close()
+            self._owned_stream = None
@@ -0,0 +1,329 @@
+"""
+A small PNG reader and writer in pure Python, used to build texture atlases without extra dependencies.
+
+Images are handled as 8-bit RGBA pixels. All non interlaced PNG color types and bit depths are read, 16-bit
+samples are reduced to 8 bits. Images are written losslessly with the smallest color type holding their pixels
+(RGB when fully opaque) and the row filters giving the smallest output.
+
+Pillow is used instead when installed, it also reads interlaced PNGs and other formats like JPEG.
+"""
+import zlib
+import struct
+
+from dataclasses import dataclass
+from typing import List, Tuple
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Channels per pixel of each color type
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+# File extensions of the images that can be read
+PNG_EXTENSIONS = (".png",)
+PIL_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tga", ".webp")
+
+
+class PngError(Exception):
+    """
+    Raised on unsupported or corrupted images.
+    """
+
+
+@dataclass
+class Image:
+    """
+    An image as rows of 8-bit RGBA pixels, top row first.
+    """
+    width: int
+    height: int
+    pixels: bytearray  # width * height * 4 bytes
+
+    @classmethod
+    def blank(cls, width: int, height: int) -> "Image":
+        """
+        Returns a fully transparent image.
+        """
+        return cls(width, height, bytearray(width * height * 4))
+
+    def paste(self, image: "Image", x: int, y: int):
+        """
+        Copy an image into this one, its top left corner at (x, y).
+        """
+        row_size = image.width * 4
+
+        for row in range(image.height):
+            start = ((y + row) * self.width + x) * 4
+            self.pixels[start:start + row_size] = image.pixels[row * row_size:(row + 1) * row_size]
+
+
+def read_chunks(data: bytes) -> List[Tuple[bytes, bytes]]:
+    """
+    Returns the type and data of the chunks of a PNG file, checking their CRC.
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise PngError("Not a PNG file")
+
+    chunks = []
+    position = len(PNG_SIGNATURE)
+
+    while position < len(data):
+        if position + 8 > len(data):
+            raise PngError("Truncated PNG file")
+
+        length, chunk_type = struct.unpack(">I4s", data[position:position + 8])
+        chunk_data = data[position + 8:position + 8 + length]
+        crc = data[position + 8 + length:position + 12 + length]
+
+        if len(chunk_data) != length or len(crc) != 4:
+            raise PngError("Truncated PNG file")
+
+        if struct.unpack(">I", crc)[0] != zlib.crc32(chunk_type + chunk_data):
+            raise PngError(f"Corrupted PNG chunk {chunk_type.decode('latin-1')}")
+        chunks.append((chunk_type, chunk_data))
+        position += 12 + length
+
+        if chunk_type == b"IEND":
+            break
+    return chunks
+
+
+def unfilter(raw: bytes, width: int, height: int, bits_per_pixel: int) -> List[bytearray]:
+    """
+    Returns the rows of a PNG image with the row filters reversed.
+    """
+    bpp = max(1, bits_per_pixel // 8)  # Bytes per complete pixel, 1 for bit depths below 8
+    stride = (width * bits_per_pixel + 7) // 8
+    rows = []
+    previous = bytearray(stride)
+    position = 0
+
+    for _ in range(height):
+        filter_type = raw[position]
+        row = bytearray(raw[position + 1:position + 1 + stride])
+        position += 1 + stride
+
+        if len(row) != stride:
+            raise PngError("Truncated PNG image data")
+
+        if filter_type == 1:
+            for i in range(bpp, stride):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif filter_type == 2:
+            for i in range(stride):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif filter_type == 3:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif filter_type == 4:
+            for i in range(stride):
+                a = row[i - bpp] if i >= bpp else 0
+                b = previous[i]
+                c = previous[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + paeth(a, b, c)) & 0xFF
+        elif filter_type != 0:
+            raise PngError(f"Invalid PNG filter type {filter_type}")
+
+        rows.append(row)
+        previous = row
+    return rows
+
+
+def paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def samples(row: bytearray, width: int, channels: int, bit_depth: int) -> List[int]:
+    """
+    Returns the samples of a row as 8-bit values, except palette indexes which are kept as they are.
+    """
+    count = width * channels
+
+    if bit_depth == 8:
+        return list(row[:count])
+    elif bit_depth == 16:
+        return list(row[0:count * 2:2])
+
+    mask = (1 << bit_depth) - 1
+    values = []
+
+    for byte in row:
+        for shift in range(8 - bit_depth, -1, -bit_depth):
+            values.append((byte >> shift) & mask)
+    return values[:count]
+
+
+def decode_png(data: bytes) -> Image:
+    """
+    Decode a PNG file into 8-bit RGBA pixels.
+
+    Raises:
+        PngError: If the file is not a valid or supported PNG.
+    """
+    chunks = read_chunks(data)
+
+    if not chunks or chunks[0][0] != b"IHDR":
+        raise PngError("Missing PNG header")
+
+    width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", chunks[0][1])
+
+    if color_type not in CHANNELS or bit_depth not in (1, 2, 4, 8, 16):
+        raise PngError(f"Invalid PNG color type {color_type} or bit depth {bit_depth}")
+
+    if interlace:
+        raise PngError("Interlaced PNGs are only supported with Pillow installed")
+
+    palette, transparency = b"", b""
+    compressed = bytearray()
+
+    for chunk_type, chunk_data in chunks:
+        if chunk_type == b"PLTE":
+            palette = chunk_data
+        elif chunk_type == b"tRNS":
+            transparency = chunk_data
+        elif chunk_type == b"IDAT":
+            compressed += chunk_data
+
+    try:
+        raw = zlib.decompress(bytes(compressed))
+    except zlib.error as e:
+        raise PngError(f"Corrupted PNG image data, {e}")
+
+    channels = CHANNELS[color_type]
+    rows = unfilter(raw, width, height, channels * bit_depth)
+    pixels = bytearray()
+    scale = 255 // ((1 << bit_depth) - 1) if bit_depth < 8 and color_type != 3 else 1
+
+    # Transparent color of grayscale and RGB images, as 8-bit values
+    key = None
+    if transparency and color_type in (0, 2):
+        values = struct.unpack(f">{len(transparency) // 2}H", transparency)
+        key = tuple(value >> 8 if bit_depth == 16 else value * scale for value in values)
+
+    for row in rows:
+        values = samples(row, width, channels, bit_depth)
+
+        if color_type == 0:
+            for value in values:
+                value *= scale
+                pixels += bytes((value, value, value, 0 if key == (value,) else 255))
+        elif color_type == 2:
+            for i in range(0, len(values), 3):
+                rgb = tuple(values[i:i + 3])
+                pixels += bytes(rgb + (0 if key == rgb else 255,))
+        elif color_type == 3:
+            for index in values:
+                if index * 3 + 3 > len(palette):
+                    raise PngError("Invalid PNG palette index")
+                alpha = transparency[index] if index < len(transparency) else 255
+                pixels += palette[index * 3:index * 3 + 3] + bytes((alpha,))
+        elif color_type == 4:
+            for i in range(0, len(values), 2):
+                pixels += bytes((values[i], values[i], values[i], values[i + 1]))
+        else:
+            pixels += bytes(values)
+    return Image(width, height, pixels)
+
+
+def read_image(path: str) -> Image:
+    """
+    Read an image file into 8-bit RGBA pixels, with Pillow if it is installed.
+
+    Raises:
+        PngError: If the image can't be read.
+    """
+    if PILImage is not None:
+        try:
+            with PILImage.open(path) as image:
+                image = image.convert("RGBA")
+                return Image(image.width, image.height, bytearray(image.tobytes()))
+        except (OSError, ValueError) as e:
+            raise PngError(f"Cannot read image '{path}': {e}")
+
+    try:
+        with open(path, "rb") as image_file:
+            return decode_png(image_file.read())
+    except OSError as e:
+        raise PngError(f"Cannot read image '{path}': {e.strerror}")
+    except PngError as e:
+        raise PngError(f"Cannot read image '{path}': {e}")
+
+
+def filter_rows(rows: List[bytes], bpp: int, adaptive: bool) -> bytes:
+    """
+    Returns the filtered rows, each prefixed by its filter type. Adaptive filtering picks the filter with the
+    smallest sum of absolute differences for every row, otherwise no filter is applied.
+    """
+    output = bytearray()
+    previous = bytes(len(rows[0])) if rows else b""
+
+    for row in rows:
+        if not adaptive:
+            output.append(0)
+            output += row
+            continue
+
+        candidates = [
+            (0, row),
+            (1, bytes((row[i] - (row[i - bpp] if i >= bpp else 0)) & 0xFF for i in range(len(row)))),
+            (2, bytes((row[i] - previous[i]) & 0xFF for i in range(len(row)))),
+            (3, bytes((row[i] - (((row[i - bpp] if i >= bpp else 0) + previous[i]) >> 1)) & 0xFF for i in range(len(row)))),
+            (4, bytes(
+                (row[i] - paeth(row[i - bpp] if i >= bpp else 0, previous[i], previous[i - bpp] if i >= bpp else 0)) & 0xFF
+                for i in range(len(row))
+            )),
+        ]
+        # Differences are signed, small negative values are as cheap to compress as small positive ones
+        filter_type, filtered = min(candidates, key=lambda candidate: sum(min(value, 256 - value) for value in candidate[1]))
+        output.append(filter_type)
+        output += filtered
+        previous = row
+    return bytes(output)
+
+
+def chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def encode_png(image: Image, level: int = 9) -> bytes:
+    """
+    Encode an image as a PNG file, losslessly. Fully opaque images are written as RGB and both unfiltered and
+    adaptively filtered image data are tried, the smallest output is returned.
+    """
+    opaque = all(alpha == 255 for alpha in image.pixels[3::4])
+    channels = 3 if opaque else 4
+    color_type = 2 if opaque else 6
+    row_size = image.width * 4
+
+    rows = []
+    for row in range(image.height):
+        pixels = image.pixels[row * row_size:(row + 1) * row_size]
+        if opaque:
+            del pixels[3::4]
+        rows.append(bytes(pixels))
+
+    data = min(
+        (zlib.compress(filter_rows(rows, channels, adaptive), level) for adaptive in (False, True)),
+        key=len,
+    )
+    header = struct.pack(">IIBBBBB", image.width, image.height, 8, color_type, 0, 0, 0)
+    return PNG_SIGNATURE + chunk(b"IHDR", header) + chunk(b"IDAT", data) + chunk(b"IEND", b"")
+
+
+def write_png(path: str, image: Image, level: int = 9):
+    """
+    Write an image as an optimized PNG file.
+    """
+    with open(path, "wb") as png_file:
+        png_file.write(encode_png(image, level))
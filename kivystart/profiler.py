@@ -0,0 +1,171 @@
+"""
+Timing and I/O instrumentation for project generation.
+
+Spans are recorded only while a profiler is active, otherwise `profile_span` is a no-op. Recorded spans
+can be exported as a Chrome trace (viewable in chrome://tracing or https://ui.perfetto.dev) and summarized
+as a table.
+
+Example Usage:
+    profiler = Profiler()
+    with profiler.activate():
+        with profile_span("MyStep", "step"):
+            ...
+
+    profiler.write_chrome_trace("trace.json")
+    print(profiler.summary_table())
+"""
+import os
+import json
+import time
+import threading
+import contextvars
+
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+# Counters propagated from a span to its parent span e.g. bytes written by save_file to the step
+PROPAGATED_COUNTERS = ("bytes", "files")
+
+_active_profiler = contextvars.ContextVar("kivystart_profiler", default=None)
+_current_span = contextvars.ContextVar("kivystart_profiler_span", default=None)
+
+
+class Profiler:
+    """
+    Records timed spans of work e.g. steps, saved files, renders and subprocess calls.
+    """
+    def __init__(self):
+        self.events: List[Dict] = []
+        self.start_time = time.perf_counter()
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """
+        Activate the profiler for the current context.
+        """
+        token = _active_profiler.set(self)
+        try:
+            yield self
+        finally:
+            _active_profiler.reset(token)
+
+    @contextmanager
+    def span(self, name: str, category: str, **args):
+        """
+        Record a span, the yielded args can be updated with counters like `bytes` and `files`.
+        """
+        parent = _current_span.get()
+        token = _current_span.set(args)
+        start = time.perf_counter()
+
+        try:
+            yield args
+        finally:
+            duration = time.perf_counter() - start
+            _current_span.reset(token)
+
+            if parent is not None:
+                for counter in PROPAGATED_COUNTERS:
+                    if counter in args:
+                        parent[counter] = parent.get(counter, 0) + args[counter]
+
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((start - self.start_time) * 1e6, 3),
+                "dur": round(duration * 1e6, 3),
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def summary(self) -> List[Dict]:
+        """
+        Returns the recorded spans aggregated by category and name for steps and by category for
+        everything else, in order of first occurrence.
+        """
+        rows = {}
+        for event in sorted(self.events, key=lambda e: e["ts"]):
+            key = (event["cat"], event["name"] if event["cat"] == "step" else "*")
+            row = rows.setdefault(key, {"category": key[0], "name": key[1], "count": 0, "time": 0.0, "files": 0, "bytes": 0})
+            row["count"] += 1
+            row["time"] += event["dur"] / 1000
+            row["files"] += event["args"].get("files", 0)
+            row["bytes"] += event["args"].get("bytes", 0)
+        return list(rows.values())
+
+    def summary_table(self) -> str:
+        """
+        Returns the summary as a text table.
+        """
+        header = ("Category", "Name", "Count", "Time (ms)", "Files", "Bytes")
+        lines = [header]
+
+        for row in self.summary():
+            lines.append((
+                row["category"],
+                row["name"],
+                str(row["count"]),
+                f"{row['time']:.2f}",
+                str(row["files"]),
+                str(row["bytes"]),
+            ))
+
+        widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+        table = []
+
+        for index, line in enumerate(lines):
+            table.append("  ".join(
+                value.ljust(width) if i < 2 else value.rjust(width)
+                for i, (value, width) in enumerate(zip(line, widths))
+            ))
+            if index == 0:
+                table.append("  ".join("-" * width for width in widths))
+        return "\n".join(table)
+
+    def chrome_trace(self) -> Dict:
+        """
+        Returns the recorded spans in Chrome trace event format.
+        """
+        with self._lock:
+            events = list(self.events)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str):
+        """
+        Write the recorded spans as a Chrome trace / Perfetto JSON file.
+        """
+        with open(path, "w", encoding="utf-8") as fd:
+            json.dump(self.chrome_trace(), fd, indent=1)
+
+
+def get_profiler() -> Optional[Profiler]:
+    """
+    Returns the active profiler if any.
+    """
+    return _active_profiler.get()
+
+
+@contextmanager
+def profile_span(name: str, category: str, **args):
+    """
+    Record a span with the active profiler, this does nothing if profiling is not active.
+
+    Args:
+        name (str): Name of the span e.g. the step class name or saved file path.
+        category (str): Category of the span e.g. 'step', 'save_file', 'render' or 'subprocess'.
+        **args: Extra information recorded with the span.
+    """
+    profiler = _active_profiler.get()
+
+    if profiler is None:
+        yield args
+    else:
+        with profiler.span(name, category, **args) as span_args:
+            yield span_args
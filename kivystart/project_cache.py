@@ -0,0 +1,469 @@
+"""
+Content-addressed cache of generated projects.
+
+Generations with the same options (template, flavor, theme, license, dependencies...) produce the same
+files, apart from the files depending on the project and app names. The cache keys generated projects by a
+normalized hash of the app template options without the names and the version of the template set.
+
+On a miss the project is generated in memory together with a probe project with other names and creation
+date, the files which differ between them depend on the names. These are stored as generated for the probe
+and every other file is stored as generated, each content once as a blob. On a hit nothing is generated or
+rendered, the probe values in the name dependent files are substituted with the names of the project and all
+other files are materialized from the blobs by reflink (copy on write, falls back to a copy), so repeated
+generation is mostly metadata operations. Files are never hardlinked to the blobs, writes to a generated
+project would change the cached contents of every later project. Projects whose name dependent files can't be
+reproduced by substituting the names (e.g. a name rendered in another case) are generated without the cache.
+
+The cache is bounded by size, least recently used entries are evicted first and blobs no longer used by
+any entry are removed.
+
+Layout:
+    <cache_dir>/entries/<key>.json    Manifest of a cached project, its mtime is the last use
+    <cache_dir>/blobs/<ab>/<digest>   File contents keyed by their SHA-256 digest
+"""
+import os
+import re
+import copy
+import json
+import shutil
+import hashlib
+import tempfile
+import functools
+import itertools
+import contextvars
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from kivystart.app_template import Step, BaseAppTemplate
+from kivystart.output import DirectoryOutput
+from kivystart.virtual import VirtualProject
+from kivystart.storage import bundled_templates_index
+from kivystart.profiler import profile_span
+from kivystart.utils.base import (
+    joinpaths,
+    click_echo,
+    format_size,
+    set_echo_handler,
+)
+from kivystart.version import __version__
+
+
+LINK_MODES = ("reflink", "copy")
+
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+# Version of the entries layout, part of the cache key
+CACHE_FORMAT = 2
+
+# Options which don't change the cached files, they are substituted into the files depending on them
+SUBSTITUTED_OPTIONS = ("projectname", "appname", "creation_date")
+
+# Values of the substituted options in the probe project, used to find and substitute the name dependent files
+PROBE_OPTIONS = {
+    "projectname": "kivystartcacheprobe",
+    "appname": "KivyStartCacheProbeApp",
+    "creation_date": "KivyStartCacheProbeDate",
+}
+
+# ioctl request for cloning a file on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+
+@functools.lru_cache(maxsize=None)
+def template_set_version() -> str:
+    """
+    Returns a digest of the KivyStart version and all bundled template files, changes to any template
+    invalidate the cached projects.
+    """
+    sha = hashlib.sha256(__version__.encode("utf-8"))
+
+    for name, resource in bundled_templates_index().items():
+        sha.update(name.encode("utf-8") + b"\0")
+        sha.update(hashlib.sha256(resource.read_bytes()).digest())
+    return sha.hexdigest()
+
+
+def template_options(app_template: BaseAppTemplate) -> Dict:
+    """
+    Returns the normalized options of an app template, without the names.
+    """
+    options = {
+        key: value for key, value in vars(app_template).items()
+        if not key.startswith("_") and key not in SUBSTITUTED_OPTIONS and key not in ("destination_dir", "saved_files")
+    }
+    options["template"] = f"{type(app_template).__module__}.{type(app_template).__qualname__}"
+    return options
+
+
+def substitutions(app_template: BaseAppTemplate) -> Dict[bytes, bytes]:
+    """
+    Returns the probe values in the name dependent files and their replacements for an app template. App names
+    are replaced without their 'App' suffix, so names derived by dropping it (e.g. the buildozer.spec title)
+    are replaced too.
+    """
+    values = {PROBE_OPTIONS[option]: str(getattr(app_template, option, "")) for option in SUBSTITUTED_OPTIONS}
+    probe_appname = PROBE_OPTIONS["appname"]
+    appname = values.pop(probe_appname)
+
+    if appname.endswith("App"):
+        values[probe_appname[:-len("App")]] = appname[:-len("App")]
+    else:
+        values[probe_appname] = appname
+    return {probe.encode("utf-8"): value.encode("utf-8") for probe, value in values.items()}
+
+
+def substitute(data: bytes, replacements: Dict[bytes, bytes]) -> bytes:
+    """
+    Returns the data with the probe values replaced, longer values are matched first.
+    """
+    pattern = re.compile(b"|".join(re.escape(probe) for probe in sorted(replacements, key=len, reverse=True)))
+    return pattern.sub(lambda match: replacements[match.group(0)], data)
+
+
+def entry_blobs(entry: Dict) -> Iterator[Dict]:
+    """
+    Returns the blobs of an entry, of the cached files and of the name dependent files.
+    """
+    return itertools.chain(entry["files"].values(), entry["dependent"].values())
+
+
+def reflink(src: str, dst: str):
+    """
+    Clone a file using copy on write.
+
+    Raises:
+        OSError: If the filesystem or platform doesn't support it.
+    """
+    import fcntl  # Not available on Windows
+
+    with open(src, "rb") as src_fd, open(dst, "xb") as dst_fd:
+        try:
+            fcntl.ioctl(dst_fd.fileno(), FICLONE, src_fd.fileno())
+        except OSError:
+            dst_fd.close()
+            os.unlink(dst)
+            raise
+
+
+class ProjectCache:
+    """
+    Content-addressed store of generated projects.
+    """
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_SIZE, link_mode: str = "reflink"):
+        """
+        Args:
+            cache_dir (str): Directory of the store.
+            max_size (int): Maximum size of the stored blobs in bytes.
+            link_mode (str): How files are materialized, 'reflink' (copy on write, falls back to a copy) or 'copy'.
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unsupported link mode '{link_mode}', supported modes are {LINK_MODES}")
+
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.max_size = max_size
+        self.link_mode = link_mode
+        self.entries_dir = joinpaths(self.cache_dir, "entries")
+        self.blobs_dir = joinpaths(self.cache_dir, "blobs")
+        self._reflink_supported = link_mode == "reflink"
+
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+
+    def key(self, app_template: BaseAppTemplate) -> str:
+        """
+        Returns the cache key of an app template.
+        """
+        options = template_options(app_template)
+        data = json.dumps([CACHE_FORMAT, template_set_version(), options], sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return joinpaths(self.entries_dir, f"{key}.json")
+
+    def blob_path(self, digest: str) -> str:
+        return joinpaths(self.blobs_dir, digest[:2], digest)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """
+        Returns the entry for the key or None, a found entry is marked as recently used. Entries with missing
+        blobs are not found.
+        """
+        path = self.entry_path(key)
+
+        try:
+            with open(path, "r", encoding="utf-8") as fd:
+                entry = json.load(fd)
+
+            for blob in entry_blobs(entry):
+                if os.path.getsize(self.blob_path(blob["digest"])) != blob["size"]:
+                    return None
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return entry
+
+    def _write_atomic(self, path: str, data: bytes, mode: int):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _store_blob(self, data: bytes, mode: int) -> Dict:
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self.blob_path(digest)
+
+        if not os.path.isfile(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            # Blobs are read-only, they are only replaced as a whole
+            self._write_atomic(blob_path, data, 0o444)
+        return {"digest": digest, "mode": mode, "size": len(data)}
+
+    def store(self, key: str, project: VirtualProject, probe: VirtualProject, dependent: List[str]) -> Dict:
+        """
+        Store the files of a project, the name dependent files are stored as generated for the probe project.
+        Then evict entries if the cache is too large.
+
+        Returns:
+            Dict: The stored entry.
+        """
+        files, dependent_files = {}, {}
+
+        for path in project:
+            if path in dependent:
+                dependent_files[path] = self._store_blob(probe[path], probe.mode(path))
+            else:
+                files[path] = self._store_blob(project[path], project.mode(path))
+
+        entry = {
+            "format": CACHE_FORMAT,
+            "key": key,
+            "template_set_version": template_set_version(),
+            "files": files,
+            "dirs": sorted(project.dirs),
+            "dependent": dependent_files,
+        }
+        self._write_atomic(self.entry_path(key), json.dumps(entry, indent=1).encode("utf-8"), 0o644)
+        self.evict()
+        return entry
+
+    def _link(self, src: str, dst: str, mode: int):
+        if self._reflink_supported:
+            try:
+                reflink(src, dst)
+                os.chmod(dst, mode)
+                return
+            except OSError:
+                # Not supported by the filesystem, don't try again
+                self._reflink_supported = False
+
+        shutil.copyfile(src, dst)
+        os.chmod(dst, mode)
+
+    def materialize(self, entry: Dict, replacements: Dict[bytes, bytes], destination_dir: str) -> Tuple[int, int]:
+        """
+        Create the project of an entry in destination_dir, cached files are linked from the blobs and the name
+        dependent files are written with the probe values substituted.
+
+        Args:
+            entry (Dict): The entry, as returned by `lookup`.
+            replacements (Dict[bytes, bytes]): The probe values and their replacements, see `substitutions`.
+            destination_dir (str): The project directory.
+
+        Returns:
+            Tuple[int, int]: The number of linked and written files.
+        """
+        os.makedirs(destination_dir, exist_ok=True)
+
+        for path in entry["dirs"]:
+            os.makedirs(joinpaths(destination_dir, path), exist_ok=True)
+
+        for path, blob in entry["files"].items():
+            with profile_span(path, "save_file"):
+                self._link(self.blob_path(blob["digest"]), joinpaths(destination_dir, path), blob["mode"])
+
+        for path, blob in entry["dependent"].items():
+            fullpath = joinpaths(destination_dir, path)
+
+            with profile_span(path, "save_file") as span:
+                with open(self.blob_path(blob["digest"]), "rb") as fd:
+                    data = substitute(fd.read(), replacements)
+                with open(fullpath, "xb") as fd:
+                    fd.write(data)
+                os.chmod(fullpath, blob["mode"])
+                span.update(files=1, bytes=len(data))
+        return len(entry["files"]), len(entry["dependent"])
+
+    def size(self) -> int:
+        """
+        Returns the size of the stored blobs in bytes.
+        """
+        size = 0
+        for root, _, files in os.walk(self.blobs_dir):
+            for file in files:
+                size += os.path.getsize(joinpaths(root, file))
+        return size
+
+    def evict(self, max_size: Optional[int] = None) -> int:
+        """
+        Remove least recently used entries until the blobs fit in max_size, then remove unused blobs.
+
+        Returns:
+            int: The number of evicted entries.
+        """
+        max_size = self.max_size if max_size is None else max_size
+        entries = []
+        evicted = 0
+
+        for name in os.listdir(self.entries_dir):
+            if not name.endswith(".json"):
+                continue
+            path = joinpaths(self.entries_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as fd:
+                    entry = json.load(fd)
+
+                if entry.get("format") != CACHE_FORMAT:
+                    # Entries of another layout are never found, their keys differ
+                    os.unlink(path)
+                    evicted += 1
+                    continue
+                entries.append((os.path.getmtime(path), path, entry))
+            except (OSError, ValueError):
+                continue
+
+        # Size of each blob, counted once however many entries use it
+        blob_sizes = {}
+        for _, _, entry in entries:
+            for blob in entry_blobs(entry):
+                blob_sizes[blob["digest"]] = blob["size"]
+
+        entries.sort(key=lambda e: e[0])
+        total_size = sum(blob_sizes.values())
+
+        while entries and total_size > max_size:
+            _, path, entry = entries.pop(0)
+            os.unlink(path)
+            evicted += 1
+
+            used = {blob["digest"] for _, _, e in entries for blob in entry_blobs(e)}
+            total_size = sum(size for digest, size in blob_sizes.items() if digest in used)
+
+        # Remove blobs not used by any remaining entry
+        used = {blob["digest"] for _, _, e in entries for blob in entry_blobs(e)}
+        for root, _, files in os.walk(self.blobs_dir):
+            for file in files:
+                if file not in used and not file.startswith(".tmp-"):
+                    os.unlink(joinpaths(root, file))
+        return evicted
+
+
+def generate_virtual(app_template: BaseAppTemplate, quiet: bool = False) -> VirtualProject:
+    """
+    Generate a project in memory running the steps which don't need a directory.
+
+    Args:
+        app_template (BaseAppTemplate): The app template.
+        quiet (bool): Whether to discard the step messages.
+    """
+    project = VirtualProject()
+    app_template.output = project
+
+    def run_steps():
+        if quiet:
+            set_echo_handler(lambda message: None)
+
+        for step in app_template.get_steps(update=False):
+            if step.requires_directory:
+                continue
+
+            with profile_span(step.__class__.__name__, "step"):
+                step.action()
+    try:
+        contextvars.copy_context().run(run_steps)
+    finally:
+        app_template.output = None
+    return project
+
+
+class GenerateFromCacheStep(Step):
+    """
+    Generate the project using the project cache, this replaces all the steps which don't need a directory.
+    """
+    def __init__(self, app_template, cache: ProjectCache, update: bool = False):
+        super().__init__(app_template, update=update)
+        self.cache = cache
+
+    def generate_probe(self) -> VirtualProject:
+        """
+        Generate the project in memory with the probe values of the substituted options.
+        """
+        probe = copy.copy(self.app_template)
+        for option, value in PROBE_OPTIONS.items():
+            setattr(probe, option, value)
+        probe.saved_files = []
+        return generate_virtual(probe, quiet=True)
+
+    def find_dependent_files(self, project: VirtualProject, probe: VirtualProject) -> Optional[List[str]]:
+        """
+        Returns the files of the project which change with the substituted options, or None if substituting
+        them into the probe project doesn't reproduce the project.
+        """
+        diff = project.diff(probe)
+        if diff["added"] or diff["removed"]:
+            # Paths depending on the names
+            return None
+
+        replacements = substitutions(self.app_template)
+        for path in diff["changed"]:
+            if substitute(probe[path], replacements) != project[path] or probe.mode(path) != project.mode(path):
+                return None
+        return diff["changed"]
+
+    def action(self):
+        # Main entry point
+        key = self.cache.key(self.app_template)
+        entry = self.cache.lookup(key)
+        destination_dir = self.app_template.destination_dir
+
+        if entry is not None:
+            click_echo(f"Found project in the project cache ({key[:12]})", fg="cyan")
+            linked, written = self.cache.materialize(entry, substitutions(self.app_template), destination_dir)
+            click_echo(f"Materialized {linked} files from the project cache and wrote {written} files", fg="cyan")
+            click_echo(f"Project cache size: {format_size(self.cache.size())}", fg="cyan")
+            return
+
+        project = generate_virtual(self.app_template)
+        probe = self.generate_probe()
+        dependent = self.find_dependent_files(project, probe)
+
+        if dependent is None:
+            click_echo("Skipping project cache, the names can't be substituted into the generated files.", fg="yellow")
+        else:
+            click_echo("Project not found in the project cache, storing it", fg="cyan")
+            self.cache.store(key, project, probe, dependent)
+            click_echo(f"Project cache size: {format_size(self.cache.size())}", fg="cyan")
+        project.write_to(destination_dir)
+
+
+def use_project_cache(app_template: BaseAppTemplate, steps: List[Step], cache: ProjectCache, update: bool = False) -> List[Step]:
+    """
+    Returns the steps generating the project with the project cache, or the provided steps if the project
+    can't be generated from the cache.
+    """
+    destination_dir = app_template.destination_dir
+
+    if update:
+        click_echo("Skipping project cache, projects are updated in place.", fg="yellow")
+    elif not isinstance(app_template.output, DirectoryOutput):
+        click_echo("Skipping project cache, project output is not a directory.", fg="yellow")
+    elif os.path.isdir(destination_dir) and os.listdir(destination_dir):
+        click_echo("Skipping project cache, project directory is not empty.", fg="yellow")
+    else:
+        return [GenerateFromCacheStep(app_template, cache, update=update)] + [step for step in steps if step.requires_directory]
+    return steps
@@ -0,0 +1,246 @@
+"""
+Registry of app templates.
+
+Templates are discovered through `importlib.metadata` entry points in the 'kivystart.templates' group, the
+entry point name is the template name and its value points to the `BaseAppTemplate` subclass:
+
+    [project.entry-points."kivystart.templates"]
+    navigation = "mytemplates.navigation:NavigationAppTemplate"
+
+Template metadata (flavors, options, description and version) needs the template class, so a template is
+imported once when first discovered and its metadata is kept in an index file. Later calls read the index
+and a template module is only imported when the template is selected. Index records are invalidated when
+the entry point, the version of its distribution or the modification time and size of the template module
+change, built-in templates keep the KivyStart version while they are edited.
+"""
+import os
+import json
+import tempfile
+import importlib
+import importlib.machinery
+
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple, Type
+
+from kivystart.utils.base import joinpaths
+from kivystart.version import __version__
+
+
+ENTRY_POINT_GROUP = "kivystart.templates"
+
+# Templates bundled with KivyStart, available without an installed distribution e.g. from a source checkout
+BUILTIN_TEMPLATES = {
+    "basic": "kivystart.app_template.basic:BasicAppTemplate",
+}
+
+INDEX_FILENAME = "templates-index.json"
+
+
+class TemplateNotFoundError(Exception):
+    """
+    Raised when a template is not registered.
+    """
+
+
+@dataclass
+class TemplateInfo:
+    """
+    Metadata of a registered template.
+    """
+    name: str
+    value: str  # Entry point value e.g. 'package.module:AppTemplate'
+    version: str  # Version of the distribution providing the template
+    stamp: str = ""  # Modification time and size of the template module, see module_stamp
+    description: str = ""
+    flavors: List[str] = field(default_factory=list)
+    options: List[str] = field(default_factory=list)
+
+
+def cache_dir() -> str:
+    """
+    Returns the KivyStart cache directory, KIVYSTART_CACHE_DIR or the user cache directory.
+    """
+    if os.environ.get("KIVYSTART_CACHE_DIR"):
+        return os.environ["KIVYSTART_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or joinpaths(os.path.expanduser("~"), ".cache")
+    return joinpaths(base, "kivystart")
+
+
+def iter_entry_points() -> List[Tuple[str, str, str]]:
+    """
+    Returns the name, value and distribution version of the template entry points.
+    """
+    # Imported on use, scanning the installed distributions is only needed for discovering templates
+    from importlib import metadata
+
+    entry_points = metadata.entry_points()
+
+    if hasattr(entry_points, "select"):
+        entry_points = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:
+        entry_points = entry_points.get(ENTRY_POINT_GROUP, [])
+
+    found = []
+    for entry_point in entry_points:
+        dist = getattr(entry_point, "dist", None)
+        version = dist.version if dist is not None else ""
+        found.append((entry_point.name, entry_point.value, version))
+    return found
+
+
+def module_stamp(value: str) -> str:
+    """
+    Returns the modification time and size of the module an entry point value points to, empty if the module
+    file can't be found. The module is looked up on sys.path without importing it or its parent packages.
+    """
+    path, spec = None, None
+
+    try:
+        for name in value.partition(":")[0].split("."):
+            fullname = f"{spec.name}.{name}" if spec else name
+            spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+            path = spec.submodule_search_locations
+        stat = os.stat(spec.origin)
+    except (ImportError, ValueError, AttributeError, TypeError, OSError):
+        # Missing module or parent package, or a namespace package without a file
+        return ""
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def load_object(value: str):
+    """
+    Import and return the object an entry point value points to.
+    """
+    module_name, _, attr = value.partition(":")
+    obj = importlib.import_module(module_name)
+
+    for part in filter(None, attr.split(".")):
+        obj = getattr(obj, part)
+    return obj
+
+
+class TemplateRegistry:
+    """
+    Discovers templates and imports them on demand.
+    """
+    def __init__(self, index_path: Optional[str] = None):
+        """
+        Args:
+            index_path (str): Path of the metadata index file, defaults to a file in the KivyStart cache directory.
+        """
+        self.index_path = index_path or joinpaths(cache_dir(), INDEX_FILENAME)
+        self._templates: Optional[Dict[str, TemplateInfo]] = None
+        self._loaded: Dict[str, Type] = {}
+
+    def _read_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as fd:
+                return json.load(fd)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: Dict[str, Dict]):
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.index_path), prefix=".tmp-")
+
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+                json.dump(index, tmp, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            # The index is only a cache, e.g. the cache directory may be read-only
+            pass
+
+    def info_from_class(self, name: str, value: str, version: str, stamp: str, app_template_cls: Type) -> TemplateInfo:
+        """
+        Returns the metadata of a template class.
+        """
+        return TemplateInfo(
+            name=name,
+            value=value,
+            version=version,
+            stamp=stamp,
+            description=(app_template_cls.description or "").strip(),
+            flavors=list(app_template_cls.flavors),
+            options=list(app_template_cls.options),
+        )
+
+    def discover(self) -> Dict[str, TemplateInfo]:
+        """
+        Returns the metadata of all templates keyed by name, templates missing from the index are imported
+        once for reading their metadata.
+        """
+        if self._templates is not None:
+            return self._templates
+
+        entry_points = {name: (value, __version__) for name, value in BUILTIN_TEMPLATES.items()}
+        # Installed entry points override the built-ins of the same name
+        entry_points.update((name, (value, version)) for name, value, version in iter_entry_points())
+
+        index = self._read_index()
+        templates = {}
+        changed = False
+
+        for name, (value, version) in entry_points.items():
+            record = index.get(name)
+            stamp = module_stamp(value)
+
+            if record and record.get("value") == value and record.get("version") == version and record.get("stamp") == stamp:
+                templates[name] = TemplateInfo(**record)
+                continue
+
+            try:
+                app_template_cls = load_object(value)
+            except Exception:
+                # A broken plugin shouldn't break the other templates
+                continue
+
+            self._loaded[name] = app_template_cls
+            templates[name] = self.info_from_class(name, value, version, stamp, app_template_cls)
+            index[name] = asdict(templates[name])
+            changed = True
+
+        # Forget uninstalled templates
+        for name in set(index) - set(templates):
+            del index[name]
+            changed = True
+
+        if changed:
+            self._write_index(index)
+
+        self._templates = templates
+        return templates
+
+    def names(self) -> List[str]:
+        """
+        Returns the names of the available templates.
+        """
+        return sorted(self.discover())
+
+    def get_info(self, name: str) -> TemplateInfo:
+        """
+        Returns the metadata of a template.
+
+        Raises:
+            TemplateNotFoundError: If the template is not registered.
+        """
+        templates = self.discover()
+
+        if name not in templates:
+            raise TemplateNotFoundError(f"App template '{name}' not supported, possible templates are {tuple(sorted(templates))}")
+        return templates[name]
+
+    def load(self, name: str) -> Type:
+        """
+        Returns the app template class, importing its module if needed.
+
+        Raises:
+            TemplateNotFoundError: If the template is not registered.
+        """
+        if name not in self._loaded:
+            self._loaded[name] = load_object(self.get_info(name).value)
+        return self._loaded[name]
+
+
+# Registry used by the CLI and the API
+registry = TemplateRegistry()
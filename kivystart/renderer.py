@@ -47,9 +47,30 @@ This renderer is ideal for lightweight template processing in Kivy-based project
 """
 import re
 import ast
+import functools
 
 from typing import Dict, Any
 
+from kivystart.profiler import profile_span
+
+
+# Patterns are compiled once and shared by all renderers
+PLACEHOLDER_PATTERN = re.compile(r"\[\[\s*(\w+)\s*\]\]")
+EXPRESSION_PATTERN = re.compile(r"\[\[\s*([^]]+)\s*\]\]")
+CONDITIONAL_PATTERN = re.compile(
+    r"([^\S\n]*\n)?([^\S\n]*)\[\[\s*if\s+(.+?)\s*\]\]([\s\S]*?)(?:\[\[\s*else\s*\]\]([\s\S]*?))?\[\[\s*endif\s*\]\]([^\S\n]*\n)?",
+    flags=re.DOTALL,
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(expression: str):
+    """
+    Compile a template expression, compiled expressions are cached as templates are rendered repeatedly.
+    """
+    tree = ast.parse(expression, mode='eval')
+    return compile(tree, filename="<string>", mode="eval")
+
 
 class KivyTemplateRenderer:
     """
@@ -72,21 +93,29 @@ class KivyTemplateRenderer:
         """Sets the context for rendering templates."""
         self.context = context
 
-    def render(self, template_content: str) -> str:
+    def render(self, template_content: str, context: dict = None) -> str:
         """
         Renders the template content by replacing placeholders, evaluating expressions, 
         and handling conditionals.
+        
+        If a context is provided, it is used for this render only instead of the context set
+        using `set_context`, this makes it safe to share a renderer between threads.
         """
-        template_content = self._render_conditionals(template_content)
-        template_content = self._evaluate_python_expressions(template_content)
-        template_content = self._render_placeholders(template_content)
-        template_content = self._replace_unknown_variables(template_content)
+        if context is not None:
+            renderer = KivyTemplateRenderer()
+            renderer.set_context(context)
+            return renderer.render(template_content)
+        
+        with profile_span("render", "render", template_size=len(template_content)):
+            template_content = self._render_conditionals(template_content)
+            template_content = self._evaluate_python_expressions(template_content)
+            template_content = self._render_placeholders(template_content)
+            template_content = self._replace_unknown_variables(template_content)
         return template_content
 
     def _render_placeholders(self, content: str) -> str:
         """Replaces placeholders like [[ variable ]] with context values."""
-        pattern = r"\[\[\s*(\w+)\s*\]\]"
-        matches = re.findall(pattern, content)
+        matches = PLACEHOLDER_PATTERN.findall(content)
 
         for match in matches:
             if match in self.context:
@@ -97,8 +126,7 @@ class KivyTemplateRenderer:
 
     def _evaluate_python_expressions(self, content: str) -> str:
         """Evaluates inline Python expressions inside [[ expression ]]."""
-        pattern = r"\[\[\s*([^]]+)\s*\]\]"
-        matches = re.findall(pattern, content)
+        matches = EXPRESSION_PATTERN.findall(content)
 
         for match in matches:
             try:
@@ -123,8 +151,7 @@ class KivyTemplateRenderer:
             return False
             
         try:
-            tree = ast.parse(expression, mode='eval')
-            compiled = compile(tree, filename="<string>", mode="eval")
+            compiled = compile_expression(expression)
             return eval(compiled, {"__builtins__": None}, self.context)
         except TypeError as e:
             if "'NoneType' object is not subscriptable" in str(e):
@@ -137,8 +164,6 @@ class KivyTemplateRenderer:
 
     def _render_conditionals(self, content: str) -> str:
         """Processes [[ if condition ]]...[[ else ]]...[[ endif ]] blocks."""
-        pattern = r"([^\S\n]*\n)?([^\S\n]*)\[\[\s*if\s+(.+?)\s*\]\]([\s\S]*?)(?:\[\[\s*else\s*\]\]([\s\S]*?))?\[\[\s*endif\s*\]\]([^\S\n]*\n)?"
-    
         def process_match(match):
             leading_newline, leading_whitespace, condition, true_block, false_block, trailing_whitespace = match.groups()
             leading_newline = leading_newline or ""
@@ -156,10 +181,9 @@ class KivyTemplateRenderer:
             except Exception as e:
                 raise ValueError(f"Error evaluating if condition '{condition}': {e}")
     
-        content = re.sub(pattern, lambda m: process_match(m), content, flags=re.DOTALL)
+        content = CONDITIONAL_PATTERN.sub(lambda m: process_match(m), content)
         return content
         
     def _replace_unknown_variables(self, content: str) -> str:
         """Replaces unknown variables with an empty string."""
-        pattern = r"\[\[\s*(\w+)\s*\]\]"
-        return re.sub(pattern, "", content)
+        return PLACEHOLDER_PATTERN.sub("", content)
@@ -0,0 +1,349 @@
+"""
+Generation server keeping KivyStart warm between project generations.
+
+Starting a Python process, importing KivyStart, reading templates and looking up external tools costs more
+than generating a small project. The server does all of that once and then generates projects on request
+over a unix socket, scripts generating many projects send requests instead of starting a new process for
+each project.
+
+Requests and responses are newline delimited JSON objects:
+    {"action": "generate", "options": {"name": "demo", "appname": "DemoApp", "destination": "/srv/projects"}}
+    {"action": "metrics"}
+    {"action": "ping"}
+
+Generations are queued and run by a fixed number of workers. When the queue is full, requests are rejected
+with `"busy": true` rather than piling up, clients are expected to retry later.
+
+Example Usage:
+    server = GenerationServer("/run/kivystart.sock", workers=4, max_queue=32)
+    asyncio.run(server.serve_forever())
+
+    # From another process
+    result = generate_with_server("/run/kivystart.sock", GenerationOptions(name="demo", appname="DemoApp"))
+"""
+import os
+import json
+import time
+import signal
+import socket
+import asyncio
+import collections
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+from kivystart.api import GenerationOptions, GenerationResult, create_project_async
+from kivystart.storage import warm_up_templates
+from kivystart.licenses import LICENSES
+from kivystart.registry import registry
+from kivystart.utils.base import find_executable
+
+
+# Maximum size of a request line
+MAX_REQUEST_SIZE = 1024 * 1024
+
+# Number of recent generations used for latency percentiles
+LATENCY_WINDOW = 1000
+
+
+class GenerationServerError(Exception):
+    """
+    Raised when the generation server can't be reached or rejects a request.
+    """
+    def __init__(self, message: str, busy: bool = False):
+        super().__init__(message)
+        self.busy = busy
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Returns the percentile of values using the nearest rank.
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, round(len(values) * percent / 100) - 1))
+    return values[index]
+
+
+class GenerationServer:
+    """
+    Serves project generation requests on a unix socket using a bounded pool of workers.
+    """
+    def __init__(self, socket_path: str, workers: int = 4, max_queue: int = 16):
+        """
+        Args:
+            socket_path (str): Path of the unix socket to listen on.
+            workers (int): Number of projects generated concurrently.
+            max_queue (int): Number of requests waiting for a worker before new requests are rejected, at
+                least 1 (an asyncio queue of size 0 is unbounded).
+        """
+        if workers < 1 or max_queue < 1:
+            raise ValueError(f"workers and max_queue must be at least 1, got {workers} and {max_queue}")
+
+        self.socket_path = socket_path
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kivystart-worker")
+        self.started = time.monotonic()
+
+        self.queue: Optional[asyncio.Queue] = None
+        self.stopping: Optional[asyncio.Event] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)  # Seconds from request to result
+        self.queue_waits = collections.deque(maxlen=LATENCY_WINDOW)  # Seconds waited for a worker
+
+    def warm_up(self) -> Dict:
+        """
+        Load everything a generation needs so that requests don't pay for it.
+
+        Returns:
+            Dict: Information about what was loaded.
+        """
+        tools = {name: find_executable(name) for name in ("git", "buildozer")}
+        app_templates = registry.names()
+
+        for name in app_templates:
+            registry.load(name)
+
+        return {
+            "app_templates": app_templates,
+            "templates": warm_up_templates(),
+            "licenses": len(LICENSES),
+            "tools": tools,
+        }
+
+    def metrics(self) -> Dict:
+        """
+        Returns the current server metrics.
+        """
+        latencies = list(self.latencies)
+        queue_waits = list(self.queue_waits)
+
+        return {
+            "uptime": round(time.monotonic() - self.started, 3),
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "latency_ms": {
+                f"p{p}": round(percentile(latencies, p) * 1000, 3) for p in (50, 95, 99)
+            },
+            "queue_wait_ms": {
+                f"p{p}": round(percentile(queue_waits, p) * 1000, 3) for p in (50, 95, 99)
+            },
+        }
+
+    async def generate(self, options: GenerationOptions) -> GenerationResult:
+        """
+        Queue a generation and wait for its result.
+
+        Raises:
+            GenerationServerError: If the queue is full.
+        """
+        if self.queue.full():
+            self.rejected += 1
+            raise GenerationServerError(f"Server is busy, {self.queue.qsize()} generations are queued", busy=True)
+
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((options, future, time.monotonic()))
+        return await future
+
+    async def worker(self):
+        """
+        Run queued generations one at a time.
+        """
+        while True:
+            options, future, queued_at = await self.queue.get()
+            self.queue_waits.append(time.monotonic() - queued_at)
+            self.in_flight += 1
+
+            try:
+                if future.cancelled():
+                    # Client went away whilst queued
+                    continue
+
+                result = await create_project_async(options, executor=self.executor)
+
+                if result.success:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+                if not future.cancelled():
+                    future.set_result(result)
+            except Exception as e:
+                self.failed += 1
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self.in_flight -= 1
+                self.latencies.append(time.monotonic() - queued_at)
+                self.queue.task_done()
+
+    async def handle_request(self, request: Dict) -> Dict:
+        """
+        Returns the response for a request.
+        """
+        action = request.get("action")
+
+        if action == "ping":
+            return {"ok": True}
+        elif action == "metrics":
+            return {"ok": True, "metrics": self.metrics()}
+        elif action == "generate":
+            try:
+                options = GenerationOptions(**request.get("options", {}))
+                result = await self.generate(options)
+            except GenerationServerError as e:
+                return {"ok": False, "error": str(e), "busy": e.busy}
+            except Exception as e:
+                return {"ok": False, "error": str(e)}
+            return {"ok": True, "result": asdict(result)}
+        return {"ok": False, "error": f"Unknown action '{action}', possible actions are ('generate', 'metrics', 'ping')"}
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serve the requests of a connected client, requests of a client are handled in order.
+        """
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Request line too long
+                    response = {"ok": False, "error": f"Request exceeds {MAX_REQUEST_SIZE} bytes"}
+                    writer.write(json.dumps(response).encode() + b"\n")
+                    break
+
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request must be a JSON object")
+                except ValueError as e:
+                    response = {"ok": False, "error": f"Invalid request, {e}"}
+                else:
+                    response = await self.handle_request(request)
+
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    def stop(self):
+        """
+        Stop serving, queued and running generations are abandoned.
+        """
+        if self.stopping:
+            self.stopping.set()
+
+    async def serve_forever(self, on_ready=None):
+        """
+        Warm up and serve requests until `stop` is called or SIGINT/SIGTERM is received.
+
+        Args:
+            on_ready (Callable): Called with the warm up information once the server is listening.
+        """
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.stopping = asyncio.Event()
+        warm_up = self.warm_up()
+
+        if os.path.exists(self.socket_path):
+            # Remove a stale socket left by a server which didn't exit cleanly
+            if ping(self.socket_path):
+                raise GenerationServerError(f"A server is already listening on '{self.socket_path}'")
+            os.unlink(self.socket_path)
+
+        server = await asyncio.start_unix_server(self.handle_client, path=self.socket_path, limit=MAX_REQUEST_SIZE)
+        workers = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+            except (NotImplementedError, RuntimeError):
+                # Not supported on this platform or not in the main thread
+                pass
+
+        try:
+            if on_ready:
+                on_ready(warm_up)
+            async with server:
+                await self.stopping.wait()
+        finally:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(signum)
+                except (NotImplementedError, RuntimeError):
+                    pass
+
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.executor.shutdown(wait=True)
+
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+def send_request(socket_path: str, request: Dict, timeout: Optional[float] = None) -> Dict:
+    """
+    Send a request to the generation server and return its response.
+
+    Raises:
+        GenerationServerError: If the server can't be reached.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(request).encode() + b"\n")
+
+            with sock.makefile("rb") as fd:
+                line = fd.readline()
+    except OSError as e:
+        raise GenerationServerError(f"Could not reach generation server at '{socket_path}', {e}")
+
+    if not line:
+        raise GenerationServerError("Generation server closed the connection without a response")
+    return json.loads(line)
+
+
+def ping(socket_path: str) -> bool:
+    """
+    Returns whether a generation server is listening on the socket.
+    """
+    try:
+        return send_request(socket_path, {"action": "ping"}, timeout=5).get("ok", False)
+    except GenerationServerError:
+        return False
+
+
+def generate_with_server(socket_path: str, options: GenerationOptions) -> GenerationResult:
+    """
+    Generate a project using the generation server.
+
+    Raises:
+        GenerationServerError: If the server can't be reached, is busy or rejects the options.
+    """
+    if options.destination is None:
+        # The server's working directory is not the caller's
+        options.destination = os.path.abspath(".")
+
+    response = send_request(socket_path, {"action": "generate", "options": asdict(options)})
+
+    if not response.get("ok"):
+        raise GenerationServerError(response.get("error", "Unknown error"), busy=response.get("busy", False))
+    return GenerationResult(**response["result"])
@@ -0,0 +1,188 @@
+"""
+Summaries of the start-up reports written by the generated apps, see utils/startup_profiler.py in the generated
+projects and the `kivystart profile-app` command.
+
+A report holds the import time of each tracked module, the spans of the kv loads and build() and the time of
+the first rendered frame, all in seconds since main.py started.
+
+Example Usage:
+    reports = [load_startup_report(path) for path in ("startup-1.json", "startup-2.json")]
+    print(format_startup_summary(summarize_startup_reports(reports)))
+"""
+import json
+import statistics
+
+from typing import Dict, List, Optional, Sequence
+
+
+STARTUP_REPORT_VERSION = 1
+
+# Packages reported as one row in the imports table, the app modules are reported one by one
+FRAMEWORK_PACKAGES = ("kivy", "kivymd")
+
+
+class StartupReportError(Exception):
+    """
+    Raised on a missing or invalid start-up report.
+    """
+
+
+def load_startup_report(path: str) -> Dict:
+    """
+    Load a start-up report.
+
+    Raises:
+        StartupReportError: If the report can't be read or isn't a start-up report.
+    """
+    try:
+        with open(path, encoding="utf-8") as report_file:
+            report = json.load(report_file)
+    except (OSError, ValueError) as e:
+        raise StartupReportError(f"Cannot read start-up report '{path}': {e}")
+
+    if not isinstance(report, dict) or "imports" not in report or "spans" not in report:
+        raise StartupReportError(f"'{path}' is not a start-up report")
+
+    if report.get("version") != STARTUP_REPORT_VERSION:
+        raise StartupReportError(f"Unsupported start-up report version {report.get('version')!r} in '{path}'")
+    report["path"] = path
+    return report
+
+
+def report_metrics(report: Dict) -> Dict[str, Optional[float]]:
+    """
+    Returns the main timings of a report in seconds, the first frame is None if the app exited before it.
+    """
+    def total(category: str) -> float:
+        return sum(span["seconds"] for span in report["spans"] if span["category"] == category)
+
+    return {
+        "first_frame": report.get("first_frame"),
+        "build": total("build"),
+        "kv": total("kv"),
+        # Self times add up to the time spent importing tracked modules, without counting nested imports twice
+        "imports": sum(record["self_seconds"] for record in report["imports"]),
+    }
+
+
+def import_rows(report: Dict) -> Dict[str, Dict[str, float]]:
+    """
+    Returns the import times of the app modules and of each framework package, by name.
+    """
+    rows: Dict[str, Dict[str, float]] = {}
+
+    for record in report["imports"]:
+        package = record["module"].partition(".")[0]
+
+        if package in FRAMEWORK_PACKAGES:
+            row = rows.setdefault(f"{package}.*", {"seconds": 0.0, "self_seconds": 0.0})
+            # Self times, inclusive times of nested framework modules would be counted several times
+            row["seconds"] += record["self_seconds"]
+            row["self_seconds"] += record["self_seconds"]
+        else:
+            row = rows.setdefault(record["module"], {"seconds": 0.0, "self_seconds": 0.0})
+            row["seconds"] += record["seconds"]
+            row["self_seconds"] += record["self_seconds"]
+    return rows
+
+
+def summarize_startup_reports(reports: Sequence[Dict]) -> Dict:
+    """
+    Summarize start-up reports, timings of several reports are aggregated by median.
+
+    Returns:
+        Dict: The timings of each report ('reports'), their medians ('median'), the import times by
+            module ('imports') and the kv load times by file ('kv'), slowest first.
+    """
+    metrics = [dict(report_metrics(report), path=report.get("path", "-")) for report in reports]
+    median = {}
+
+    for key in ("first_frame", "build", "kv", "imports"):
+        values = [row[key] for row in metrics if row[key] is not None]
+        median[key] = statistics.median(values) if values else None
+
+    imports: Dict[str, List[Dict[str, float]]] = {}
+    kv: Dict[str, List[float]] = {}
+
+    for report in reports:
+        for name, row in import_rows(report).items():
+            imports.setdefault(name, []).append(row)
+
+        for span in report["spans"]:
+            if span["category"] == "kv":
+                kv.setdefault(span["name"], []).append(span["seconds"])
+
+    import_summary = [
+        {
+            "module": name,
+            "seconds": statistics.median(row["seconds"] for row in rows),
+            "self_seconds": statistics.median(row["self_seconds"] for row in rows),
+            "max_seconds": max(row["seconds"] for row in rows),
+            "reports": len(rows),
+        }
+        for name, rows in imports.items()
+    ]
+    kv_summary = [
+        {"file": name, "seconds": statistics.median(values), "max_seconds": max(values), "loads": len(values)}
+        for name, values in kv.items()
+    ]
+    return {
+        "reports": metrics,
+        "median": median,
+        "imports": sorted(import_summary, key=lambda row: row["seconds"], reverse=True),
+        "kv": sorted(kv_summary, key=lambda row: row["seconds"], reverse=True),
+    }
+
+
+def format_table(header: Sequence[str], rows: Sequence[Sequence[str]]) -> str:
+    """
+    Returns rows as a text table, the first column is left aligned and the others right aligned.
+    """
+    lines = [tuple(header)] + [tuple(row) for row in rows]
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    table = []
+
+    for index, line in enumerate(lines):
+        table.append("  ".join(
+            value.ljust(width) if i == 0 else value.rjust(width)
+            for i, (value, width) in enumerate(zip(line, widths))
+        ))
+        if index == 0:
+            table.append("  ".join("-" * width for width in widths))
+    return "\n".join(table)
+
+
+def milliseconds(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def format_startup_summary(summary: Dict, top: int = 10) -> str:
+    """
+    Returns a start-up summary as text tables, with the `top` slowest imports.
+    """
+    timings = [
+        (row["path"], milliseconds(row["first_frame"]), milliseconds(row["build"]), milliseconds(row["kv"]), milliseconds(row["imports"]))
+        for row in summary["reports"]
+    ]
+
+    if len(timings) > 1:
+        median = summary["median"]
+        timings.append(("median", milliseconds(median["first_frame"]), milliseconds(median["build"]), milliseconds(median["kv"]), milliseconds(median["imports"])))
+
+    sections = [
+        format_table(("Report", "First frame (ms)", "build() (ms)", "kv (ms)", "Imports (ms)"), timings),
+        format_table(
+            ("Import", "Time (ms)", "Self (ms)", "Max (ms)", "Reports"),
+            [
+                (row["module"], milliseconds(row["seconds"]), milliseconds(row["self_seconds"]), milliseconds(row["max_seconds"]), str(row["reports"]))
+                for row in summary["imports"][:top]
+            ],
+        ),
+    ]
+
+    if summary["kv"]:
+        sections.append(format_table(
+            ("kv file", "Time (ms)", "Max (ms)", "Loads"),
+            [(row["file"], milliseconds(row["seconds"]), milliseconds(row["max_seconds"]), str(row["loads"])) for row in summary["kv"]],
+        ))
+    return "\n\n".join(sections)
@@ -1,7 +1,34 @@
 """
 Internal storage helpers module for the KivyStart package.
+
+Templates are read through a `TemplateSource`, either a template directory or a packed `.kspack` bundle (see
+`kivystart.kspack`). Paths given to a template source are relative to it and '/' separated.
+
+Templates bundled with KivyStart are addressed by their resource name relative to the 'kivystart/templates'
+directory, e.g. 'basic/base' or 'basic.kspack/kivymd', and are read through `importlib.resources` from an index
+built once per process. This works the same from a source checkout, a zip install or a zipapp, without
+extracting anything. Absolute paths are template directories or bundles on the filesystem.
+
+Templates can be layered, e.g. a base layer shared by all flavors and a flavor overlay only containing the
+files which differ. Files of later layers override the files of earlier layers with the same path.
 """
 import os
+import sys
+import fnmatch
+import pathlib
+import functools
+
+if sys.version_info >= (3, 9):
+    from importlib import resources
+else:
+    # Python 3.8, resources.files() comes from the importlib_resources backport
+    import importlib_resources as resources
+
+from abc import ABC, abstractmethod
+from typing import Dict, Sequence, Tuple
+
+from kivystart.kspack import EXTENSION as KSPACK_EXTENSION, IGNORED_DIRS, IGNORED_PATTERNS, KsPack
+from kivystart.utils.base import joinpaths, recursive_get_files
 
 
 def kivystart_storage() -> str:
@@ -12,3 +39,281 @@ def kivystart_storage() -> str:
 
 
 kivystart_storage = kivystart_storage()
+
+# Package and directory of the bundled templates
+TEMPLATES_PACKAGE = "kivystart"
+TEMPLATES_RESOURCE = "templates"
+
+
+@functools.lru_cache(maxsize=None)
+def read_template(path: str) -> str:
+    """
+    Read a template file, template files are package data so their content is cached.
+    """
+    with open(path, "r", encoding="utf-8") as fd:
+        return fd.read()
+
+
+@functools.lru_cache(maxsize=None)
+def list_template_files(path: str, pattern: str) -> Tuple[str, ...]:
+    """
+    Recursively list template files which match a certain pattern, the listing is cached.
+    """
+    return tuple(sorted(
+        file for file in recursive_get_files(path, pattern)
+        if not any(part in IGNORED_DIRS for part in file.split(os.sep))
+    ))
+
+
+class TemplateSource(ABC):
+    """
+    Read-only view of the files of a template.
+    """
+    def __init__(self):
+        self._texts = {}
+        self._listings = {}
+
+    @abstractmethod
+    def read_bytes(self, path: str) -> bytes:
+        """
+        Returns the content of a file.
+        """
+
+    @abstractmethod
+    def files(self) -> Tuple[str, ...]:
+        """
+        Returns the relative paths of all files, sorted.
+        """
+
+    def read_text(self, path: str) -> str:
+        """
+        Returns the content of a text file, the content is cached.
+        """
+        if path not in self._texts:
+            self._texts[path] = self.read_bytes(path).decode("utf-8")
+        return self._texts[path]
+
+    def list_files(self, subdir: str = "", pattern: str = "*") -> Tuple[str, ...]:
+        """
+        Recursively list the relative paths of the files under a directory whose name matches a certain
+        pattern, the listing is cached.
+        """
+        key = (subdir, pattern)
+
+        if key not in self._listings:
+            prefix = subdir.strip("/") + "/" if subdir.strip("/") else ""
+            self._listings[key] = tuple(
+                path for path in self.files()
+                if path.startswith(prefix) and fnmatch.fnmatch(path.rsplit("/", 1)[-1], pattern)
+            )
+        return self._listings[key]
+
+    def exists(self, path: str) -> bool:
+        """
+        Returns whether a file exists in the template.
+        """
+        return path in self.files()
+
+
+class DirectoryTemplateSource(TemplateSource):
+    """
+    Template files in a directory.
+    """
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._files = None
+
+    def read_bytes(self, path: str) -> bytes:
+        with open(joinpaths(self.path, path), "rb") as fd:
+            return fd.read()
+
+    def read_text(self, path: str) -> str:
+        return read_template(joinpaths(self.path, path))
+
+    def files(self) -> Tuple[str, ...]:
+        if self._files is None:
+            self._files = tuple(
+                os.path.relpath(file, self.path).replace(os.sep, "/")
+                for file in list_template_files(self.path, "*")
+            )
+        return self._files
+
+
+class ResourceTemplateSource(TemplateSource):
+    """
+    Bundled template files under a resource directory e.g. 'basic/base', read through `importlib.resources`.
+    """
+    def __init__(self, prefix: str = ""):
+        super().__init__()
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self._files = tuple(
+            name[len(self.prefix):] for name in bundled_templates_index()
+            if name.startswith(self.prefix)
+        )
+
+    def read_bytes(self, path: str) -> bytes:
+        return bundled_template_resource(self.prefix + path).read_bytes()
+
+    def read_text(self, path: str) -> str:
+        return read_bundled_template(self.prefix + path)
+
+    def files(self) -> Tuple[str, ...]:
+        return self._files
+
+
+class PackTemplateSource(TemplateSource):
+    """
+    Template files in a `.kspack` bundle, optionally under a directory of the bundle.
+    """
+    def __init__(self, pack: KsPack, prefix: str = ""):
+        super().__init__()
+        self.pack = pack
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self._files = tuple(path[len(self.prefix):] for path in pack.list(self.prefix))
+
+    def read_bytes(self, path: str) -> bytes:
+        return self.pack.read(self.prefix + path)
+
+    def files(self) -> Tuple[str, ...]:
+        return self._files
+
+
+class LayeredTemplateSource(TemplateSource):
+    """
+    Template files of several layers, files of later layers override the files of earlier layers.
+    """
+    def __init__(self, layers: Sequence[TemplateSource]):
+        super().__init__()
+        self.layers = tuple(layers)
+        self._file_map = None
+
+    @property
+    def file_map(self) -> Dict[str, TemplateSource]:
+        """
+        Returns the effective files mapped to the layer providing them, resolved once.
+        """
+        if self._file_map is None:
+            file_map = {}
+            for layer in self.layers:
+                file_map.update(dict.fromkeys(layer.files(), layer))
+            self._file_map = dict(sorted(file_map.items()))
+        return self._file_map
+
+    def layer(self, path: str) -> TemplateSource:
+        try:
+            return self.file_map[path]
+        except KeyError:
+            raise FileNotFoundError(f"Template file '{path}' doesn't exist in any layer")
+
+    def read_bytes(self, path: str) -> bytes:
+        return self.layer(path).read_bytes(path)
+
+    def read_text(self, path: str) -> str:
+        return self.layer(path).read_text(path)
+
+    def files(self) -> Tuple[str, ...]:
+        return tuple(self.file_map)
+
+
+@functools.lru_cache(maxsize=None)
+def bundled_templates_index() -> Dict[str, "resources.abc.Traversable"]:
+    """
+    Returns the bundled template files keyed by their resource name, sorted. The index is built once by
+    walking the package resources.
+    """
+    index = {}
+    directories = [("", resources.files(TEMPLATES_PACKAGE).joinpath(TEMPLATES_RESOURCE))]
+
+    while directories:
+        prefix, directory = directories.pop()
+
+        for resource in directory.iterdir():
+            if resource.is_dir():
+                if resource.name not in IGNORED_DIRS:
+                    directories.append((prefix + resource.name + "/", resource))
+            elif not any(fnmatch.fnmatch(resource.name, pattern) for pattern in IGNORED_PATTERNS):
+                index[prefix + resource.name] = resource
+    return dict(sorted(index.items()))
+
+
+def bundled_template_resource(name: str) -> "resources.abc.Traversable":
+    """
+    Returns the resource of a bundled template file.
+    """
+    try:
+        return bundled_templates_index()[name]
+    except KeyError:
+        raise FileNotFoundError(f"Bundled template file '{name}' doesn't exist")
+
+
+@functools.lru_cache(maxsize=None)
+def read_bundled_template(name: str) -> str:
+    """
+    Read a bundled template file by its resource name e.g. 'buildozer.spec.kivytemplate', the content is cached.
+    """
+    return bundled_template_resource(name).read_bytes().decode("utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def open_kspack(path: str) -> KsPack:
+    """
+    Load a template bundle once per process, a filesystem path or the resource name of a bundled bundle.
+    Bundles inside zip archives are read into memory.
+    """
+    if os.path.isabs(path):
+        return KsPack.open(path)
+
+    resource = bundled_template_resource(path)
+    if isinstance(resource, pathlib.Path):
+        return KsPack.open(str(resource))
+    return KsPack.from_bytes(resource.read_bytes(), path=path)
+
+
+@functools.lru_cache(maxsize=None)
+def open_template_source(path: str, *overlays: str) -> TemplateSource:
+    """
+    Returns the template source for a template directory, a `.kspack` bundle or a directory inside a bundle
+    e.g. 'basic.kspack/kivymd'. Relative paths are resource names of bundled templates. Sources are cached.
+
+    Args:
+        path (str): The template or base layer path.
+        *overlays (str): Paths of layers overriding the files of the previous layers.
+    """
+    if overlays:
+        return LayeredTemplateSource([open_template_source(layer) for layer in (path, *overlays)])
+
+    bundle, separator, prefix = path.partition(KSPACK_EXTENSION + "/")
+
+    if separator:
+        return PackTemplateSource(open_kspack(bundle + KSPACK_EXTENSION), prefix)
+    elif path.endswith(KSPACK_EXTENSION):
+        return PackTemplateSource(open_kspack(path))
+    elif os.path.isabs(path):
+        return DirectoryTemplateSource(path)
+    return ResourceTemplateSource(path)
+
+
+def warm_up_templates() -> int:
+    """
+    Read all template files into the cache, used by long-running processes.
+    
+    Returns:
+        int: The number of cached template files.
+    """
+    count = 0
+    for name in bundled_templates_index():
+        try:
+            if name.endswith(KSPACK_EXTENSION):
+                source = open_template_source(name)
+                for path in source.files():
+                    if source.pack.entry(path).is_template:
+                        source.read_text(path)
+                        count += 1
+            else:
+                read_bundled_template(name)
+                count += 1
+        except UnicodeDecodeError:
+            # Binary assets are copied rather than read
+            pass
+    return count
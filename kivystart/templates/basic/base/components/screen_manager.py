@@ -0,0 +1,113 @@
+"""
+MainScreenManager - This is the top-level container that manages different screens in the app.
+It handles switching between various views, allowing you to create a multi-screen interface.
+
+Screens listed in components/screens/__init__.py are registered as factories: a screen is imported and built the
+first time it is shown, e.g. `manager.current = "settings"`. Once more than `max_screens` registered screens are
+built, the least recently shown inactive ones are released. The state returned by their optional `get_state()` is
+kept as JSON and passed to `set_state(state)` when the screen is built again.
+
+Screens added directly, like the ones declared in kv files, are built eagerly and never released.
+"""
+import json
+import importlib
+
+from collections import OrderedDict
+from typing import Callable, Union
+
+from kivy.properties import NumericProperty
+from kivy.uix.screenmanager import Screen, ScreenManager
+
+from components.screens import SCREENS, MAX_SCREENS
+
+
+class MainScreenManager(ScreenManager):
+    # Maximum number of registered screens kept built, including the current screen
+    max_screens = NumericProperty(MAX_SCREENS)
+
+    def __init__(self, **kwargs):
+        self.factories = {}  # Screen names and their factories
+        self.saved_states = {}  # Screen names and the JSON state of the released screens
+        self.recent = OrderedDict()  # Names of the built registered screens, least recently shown first
+        super().__init__(**kwargs)
+
+        for name, factory in SCREENS.items():
+            self.register_screen(name, factory)
+
+    def register_screen(self, name: str, factory: Union[str, Callable[..., Screen]]):
+        """
+        Register a screen built the first time it is shown.
+
+        Args:
+            name (str): The name of the screen.
+            factory (Union[str, Callable]): The screen class or a callable returning the screen, called with
+                the screen name. Can also be a 'module:Class' path, imported when the screen is first shown.
+        """
+        self.factories[name] = factory
+
+    def has_screen(self, name: str) -> bool:
+        return name in self.factories or super().has_screen(name)
+
+    def get_screen(self, name: str) -> Screen:
+        # ScreenManager looks the screen up here whenever current changes
+        if name in self.factories and not super().has_screen(name):
+            self.build_screen(name)
+        return super().get_screen(name)
+
+    def build_screen(self, name: str) -> Screen:
+        """
+        Build a registered screen, restoring its state if it was released before.
+        """
+        factory = self.factories[name]
+
+        if isinstance(factory, str):
+            module_name, _, class_name = factory.partition(":")
+            factory = getattr(importlib.import_module(module_name), class_name)
+
+        screen = factory(name=name)
+        state = self.saved_states.pop(name, None)
+
+        if state is not None and hasattr(screen, "set_state"):
+            screen.set_state(json.loads(state))
+        self.add_widget(screen)
+        self.recent[name] = None
+        return screen
+
+    def on_current(self, instance, value):
+        super().on_current(instance, value)
+
+        if value in self.recent:
+            self.recent.move_to_end(value)
+        self.release_screens()
+
+    def release_screens(self):
+        """
+        Release the least recently shown registered screens beyond max_screens. The current screen and the
+        screen transitioning out are kept.
+        """
+        for name in list(self.recent):
+            if not super().has_screen(name):
+                # Removed with remove_widget
+                del self.recent[name]
+
+        keep = {self.current}
+        if self.transition.is_active and self.transition.screen_out:
+            keep.add(self.transition.screen_out.name)
+
+        for name in list(self.recent):
+            if len(self.recent) <= self.max_screens:
+                break
+
+            if name not in keep:
+                self.release_screen(name)
+
+    def release_screen(self, name: str):
+        """
+        Remove a built registered screen so its widgets can be garbage collected, its state is saved first.
+        """
+        screen = super().get_screen(name)
+
+        if hasattr(screen, "get_state"):
+            self.saved_states[name] = json.dumps(screen.get_state())
+        self.remove_widget(screen)
+        self.recent.pop(name, None)
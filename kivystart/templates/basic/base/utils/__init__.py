@@ -0,0 +1 @@
+# Helpers and utilities for the app
@@ -0,0 +1,54 @@
+"""
+References to the regions of the texture atlases built from assets/images with `kivystart assets build`.
+
+Each sub directory of assets/images is packed into an atlas named after it, the images directly in
+assets/images into the 'images' atlas. Regions are named after their image files without extension, e.g.
+assets/images/buttons/play.png is the 'play' region of the 'buttons' atlas:
+
+    Image(source=atlas_source("buttons", "play"))
+    texture = region("buttons", "play")
+
+Using regions of one atlas instead of separate images means fewer texture uploads and draw calls.
+"""
+from typing import List
+
+from kivy.atlas import Atlas
+from kivy.cache import Cache
+from kivy.resources import resource_find
+
+
+ATLAS_DIR = "assets/atlas"
+
+
+def atlas_source(atlas: str, name: str) -> str:
+    """
+    Returns the source of an atlas region, usable as the source of an Image or the background of a Button.
+    """
+    return f"atlas://{ATLAS_DIR}/{atlas}/{name}"
+
+
+def load_atlas(atlas: str) -> Atlas:
+    """
+    Returns a loaded atlas. Atlases are cached like Kivy does for atlas:// sources, so each atlas is loaded once.
+    """
+    path = f"{ATLAS_DIR}/{atlas}"
+    loaded = Cache.get("kv.atlas", path)
+
+    if loaded is None:
+        loaded = Atlas(resource_find(f"{path}.atlas") or f"{path}.atlas")
+        Cache.append("kv.atlas", path, loaded)
+    return loaded
+
+
+def region(atlas: str, name: str):
+    """
+    Returns the texture of an atlas region.
+    """
+    return load_atlas(atlas)[name]
+
+
+def region_names(atlas: str) -> List[str]:
+    """
+    Returns the names of the regions of an atlas.
+    """
+    return sorted(load_atlas(atlas).textures)
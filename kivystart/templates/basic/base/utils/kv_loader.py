@@ -0,0 +1,141 @@
+"""
+Loads the kv files of the app, each kv file is loaded once however many modules ask for it.
+
+If kv_files/bundle.kv exists (generated with the --kv-bundle option), the first load_kv call loads the
+whole bundle, the kv files of all components combined in load order, and later calls do nothing. This
+replaces a read and parse per kv file with a single one at start-up. The bundle is only used while it is
+newer than the kv files, so edits to kv files are picked up; run `python -m utils.kv_loader` to rebuild it.
+
+If utils/kv_compiled.py exists (generated with the --kv-compile option), the kv rules compiled into Python are
+applied to widgets as they are created and no kv file is parsed. The compiled rules are only used while the
+kv files are the ones they were compiled from.
+"""
+import os
+import pathlib
+import hashlib
+import importlib
+import functools
+
+from kivy.lang import Builder
+
+from utils import startup_profiler
+
+
+KV_DIR = pathlib.Path(__file__).resolve().parent.parent / "kv_files"
+KV_BUNDLE = KV_DIR / "bundle.kv"
+KV_COMPILED_MODULE = "utils.kv_compiled"
+
+# The kv files in the bundle, rules used by other rules come first
+KV_FILES = [
+    "main_container.kv",
+    "main_toolbar.kv",
+    "root_container.kv",
+]
+
+_loaded = set()
+
+
+@functools.lru_cache(maxsize=None)
+def bundle_is_fresh() -> bool:
+    """
+    Returns whether the bundle exists and is not older than the bundled kv files, checked once.
+    """
+    try:
+        bundle_mtime = os.stat(KV_BUNDLE).st_mtime
+    except OSError:
+        return False
+    
+    for name in KV_FILES:
+        try:
+            if os.stat(KV_DIR / name).st_mtime > bundle_mtime:
+                return False
+        except OSError:
+            pass
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_rules():
+    """
+    Returns the module of the compiled kv rules with its rules installed, or None if it doesn't exist or the
+    kv files changed since they were compiled.
+    """
+    try:
+        module = importlib.import_module(KV_COMPILED_MODULE)
+    except ModuleNotFoundError as e:
+        if e.name != KV_COMPILED_MODULE:
+            raise
+        return None
+    
+    for name, digest in module.SOURCES.items():
+        try:
+            with open(KV_DIR / name, "rb") as kv_file:
+                if hashlib.sha256(kv_file.read()).hexdigest() != digest:
+                    return None
+        except OSError:
+            # The kv files don't have to be packaged with the compiled rules
+            pass
+    
+    module.install()
+    return module
+
+
+def load_file(path: pathlib.Path):
+    """
+    Load a kv file unless it has already been loaded.
+    """
+    path = str(path)
+    if path in _loaded or path in Builder.files:
+        return
+    
+    Builder.load_file(path)
+    _loaded.add(path)
+
+
+def load_kv(name: str):
+    """
+    Load a kv file of kv_files e.g. 'main_container.kv', or the bundle containing it.
+    """
+    with startup_profiler.span(name, "kv"):
+        if name in KV_FILES and compiled_rules() is not None:
+            # The compiled rules are applied as widgets are created
+            return
+        
+        if name in KV_FILES and bundle_is_fresh():
+            load_file(KV_BUNDLE)
+        else:
+            load_file(KV_DIR / name)
+
+
+def build_bundle() -> str:
+    """
+    Combine the kv files into the bundle, `#:` directives are moved to the top once.
+    
+    Returns:
+        str: The bundle path.
+    """
+    directives, rules = [], []
+    
+    for name in KV_FILES:
+        with open(KV_DIR / name, encoding="utf-8") as kv_file:
+            lines = kv_file.read().splitlines()
+        
+        rules.append(f"# {name}")
+        for line in lines:
+            if line.lstrip().startswith("#:"):
+                directive = " ".join(line.split())
+                if directive not in directives:
+                    directives.append(directive)
+            else:
+                rules.append(line)
+        rules.append("")
+    
+    with open(KV_BUNDLE, "w", encoding="utf-8") as bundle:
+        bundle.write("\n".join(directives + [""] + rules))
+    
+    bundle_is_fresh.cache_clear()
+    return str(KV_BUNDLE)
+
+
+if __name__ == "__main__":
+    print(f"Bundle written to {build_bundle()}")
@@ -0,0 +1,186 @@
+"""
+Opt-in start-up profiler of the app, enabled by the KIVYSTART_STARTUP_PROFILE environment variable:
+
+    KIVYSTART_STARTUP_PROFILE=startup.json python main.py
+
+It records the import time of the app modules and of kivy/kivymd modules, the load time of each kv file, the
+duration of build() and the time of the first rendered frame, all in seconds since main.py started. The JSON
+report is written once the first frame is drawn (or at exit), set the variable to 1 to write it to
+startup-<date>.json in the current directory. Summarize one or more reports with:
+
+    kivystart profile-app startup.json
+
+Nothing is recorded while the variable is not set.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import datetime
+import platform
+
+from contextlib import contextmanager
+
+
+ENV_VAR = "KIVYSTART_STARTUP_PROFILE"
+REPORT_VERSION = 1
+
+# Top level packages and modules whose imports are timed
+TRACKED_PACKAGES = ("components", "controllers", "models", "utils", "theme", "kivy", "kivymd")
+
+_start = time.perf_counter()
+_report = None  # The report being recorded, None while profiling is disabled
+_path = None
+_import_stack = []  # Time spent in nested tracked imports, per import in progress
+
+
+def enabled() -> bool:
+    """
+    Returns whether the start-up is being profiled.
+    """
+    return _report is not None
+
+
+def elapsed() -> float:
+    """
+    Returns the seconds since main.py started.
+    """
+    return time.perf_counter() - _start
+
+
+class ImportTimer:
+    """
+    Meta path finder timing the execution of the tracked modules, the modules are found by the other finders.
+    """
+    def find_spec(self, name, path=None, target=None):
+        if name.partition(".")[0] not in TRACKED_PACKAGES:
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                # Builtin and frozen loaders are classes shared by all their modules, these are not timed
+                if spec.loader is not None and not isinstance(spec.loader, type) and hasattr(spec.loader, "exec_module"):
+                    spec.loader.exec_module = timed_exec_module(name, spec.loader.exec_module)
+                return spec
+        return None
+
+
+def timed_exec_module(name: str, exec_module):
+    """
+    Wraps the exec_module method of a module loader to record the import time of the module.
+    """
+    def wrapper(module):
+        start = elapsed()
+        _import_stack.append(0.0)
+
+        try:
+            exec_module(module)
+        finally:
+            seconds = elapsed() - start
+            nested = _import_stack.pop()
+
+            if _import_stack:
+                _import_stack[-1] += seconds
+
+            if _report is not None:
+                _report["imports"].append({
+                    "module": name,
+                    "start": round(start, 6),
+                    "seconds": round(seconds, 6),
+                    "self_seconds": round(seconds - nested, 6),
+                })
+    return wrapper
+
+
+@contextmanager
+def span(name: str, category: str):
+    """
+    Record the duration of a block e.g. span("root_container.kv", "kv"), this does nothing while profiling is
+    disabled.
+    """
+    if _report is None:
+        yield
+        return
+
+    start = elapsed()
+    try:
+        yield
+    finally:
+        _report["spans"].append({
+            "name": name,
+            "category": category,
+            "start": round(start, 6),
+            "seconds": round(elapsed() - start, 6),
+        })
+
+
+def record_first_frame():
+    """
+    Record the time of the first rendered frame, the report is written then. Call it from build().
+    """
+    if _report is None:
+        return
+
+    from kivy.clock import Clock
+
+    def on_first_tick(dt):
+        # The window exists from the first tick and the first frame is drawn at the end of it
+        from kivy.core.window import Window
+
+        def on_flip(*args):
+            Window.unbind(on_flip=on_flip)
+            _report["first_frame"] = round(elapsed(), 6)
+            write_report()
+
+        Window.bind(on_flip=on_flip)
+
+    Clock.schedule_once(on_first_tick, 0)
+
+
+def write_report():
+    """
+    Write the report and stop profiling.
+    """
+    global _report
+
+    if _report is None:
+        return
+
+    report, _report = _report, None
+    sys.meta_path[:] = [finder for finder in sys.meta_path if not isinstance(finder, ImportTimer)]
+
+    with open(_path, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=1)
+    print(f"[StartupProfiler] Report written to {_path}", file=sys.stderr)
+
+
+def install():
+    """
+    Start profiling if the KIVYSTART_STARTUP_PROFILE environment variable is set. Call it before the other
+    imports of main.py.
+    """
+    global _report, _path
+
+    path = os.environ.get(ENV_VAR)
+    if not path or _report is not None:
+        return
+
+    now = datetime.datetime.now()
+    _path = f"startup-{now:%Y%m%d-%H%M%S}.json" if path == "1" else path
+    _report = {
+        "version": REPORT_VERSION,
+        "script": os.path.basename(sys.argv[0]),
+        "created": now.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "imports": [],
+        "spans": [],
+        "first_frame": None,
+    }
+    sys.meta_path.insert(0, ImportTimer())
+    atexit.register(write_report)
@@ -1,11 +0,0 @@
-"""
-MainScreenManager - This is the top-level container that manages different screens in the app.
-It handles switching between various views, allowing you to create a multi-screen interface.
-"""
-
-from kivy.uix.screenmanager import ScreenManager
-
-
-class MainScreenManager(ScreenManager):
-    # Another empty class
-    pass
@@ -1 +0,0 @@
-import kivystart.utils as utils
@@ -1 +0,0 @@
-# Implement your app controller logic
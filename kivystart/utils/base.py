@@ -3,10 +3,22 @@ Utilities and helpers module.
 """
 import os
 import click
+import shutil
 import fnmatch
+import functools
 import traceback
+import subprocess
+import contextvars
 
-from typing import List
+from typing import Callable, List, Optional
+
+from kivystart.profiler import profile_span
+
+
+# Optional handlers replacing printing and subprocess calls for the current context, see `set_echo_handler`
+# and `set_command_runner`.
+_echo_handler = contextvars.ContextVar("kivystart_echo_handler", default=None)
+_command_runner = contextvars.ContextVar("kivystart_command_runner", default=None)
 
 
 def joinpaths(path1: str, path2: str, *more):
@@ -47,7 +59,70 @@ def click_echo(data: str, prefix: str = "* ", **kwargs):
         prefix (str): Prefix to add to message before printing.
         **kwargs: Keyword arguments for styling to parse to click.style
     """
-    click.echo(click.style(prefix + data, **kwargs))
+    handler = _echo_handler.get()
+    
+    if handler:
+        handler(prefix + data)
+    else:
+        click.echo(click.style(prefix + data, **kwargs))
+
+
+def set_echo_handler(handler: Optional[Callable[[str], None]]) -> contextvars.Token:
+    """
+    Set a handler receiving messages instead of printing them with `click_echo`, for the current context.
+    
+    Returns:
+        contextvars.Token: Token for restoring the previous handler.
+    """
+    return _echo_handler.set(handler)
+
+
+def run_command(cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """
+    Runs a command using subprocess.run, the call is recorded when profiling.
+    
+    Args:
+        cmd (List[str]): The command to run.
+        **kwargs: Keyword arguments to parse to subprocess.run
+    """
+    runner = _command_runner.get() or subprocess.run
+    
+    with profile_span(" ".join(cmd), "subprocess", cwd=kwargs.get("cwd") or os.getcwd()):
+        return runner(cmd, **kwargs)
+
+
+def set_command_runner(runner: Optional[Callable[..., subprocess.CompletedProcess]]) -> contextvars.Token:
+    """
+    Set a replacement for subprocess.run used by `run_command`, for the current context.
+    
+    Returns:
+        contextvars.Token: Token for restoring the previous runner.
+    """
+    return _command_runner.set(runner)
+
+
+@functools.lru_cache(maxsize=None)
+def _which(name: str, path: Optional[str]) -> Optional[str]:
+    return shutil.which(name, path=path)
+
+
+def find_executable(name: str) -> Optional[str]:
+    """
+    Returns the path of an executable on the PATH or None if it is not installed, lookups are cached
+    per PATH value so repeated generations don't search the PATH again.
+    """
+    return _which(name, os.environ.get("PATH"))
+
+
+def format_size(size: int) -> str:
+    """
+    Returns a human readable representation of a size in bytes e.g. '1.5 KB'.
+    """
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
 
 
 def recursive_get_files(path, pattern) -> List[str]:
@@ -5,8 +5,22 @@ Provides utility functions for working with dates and times, including formattin
 parsing, calculating time differences, and handling time zones. It also provides functions to get the current time in different formats,
 including local time and Greenwich Mean Time (GMT).
 """
+import re
+import sys
 import time
+import operator
+import calendar
 import datetime
+import functools
+import itertools
+
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+try:
+    import zoneinfo
+except ImportError:
+    # Python 3.8, pytz is used if installed
+    zoneinfo = None
 
 
 def seconds_to_minutes(secs):
@@ -165,11 +179,59 @@ def years_to_seconds(yrs):
     return yrs * 3.154e7
 
 
+# Units of the difference breakdowns, largest first
+DIFFERENCE_UNITS = ("years", "months", "weeks", "days", "hours", "minutes", "seconds")
+
+
+def add_months(date: datetime.datetime, months: int) -> datetime.datetime:
+    """
+    Add a number of calendar months to a datetime, the day is clamped to the last day of the resulting month
+    e.g. 31 January + 1 month is 28 (or 29) February.
+
+    Args:
+        date (datetime.datetime): The datetime.
+        months (int): The number of months to add, may be negative.
+
+    Returns:
+        datetime.datetime: The resulting datetime.
+    """
+    year, month = divmod(date.year * 12 + date.month - 1 + months, 12)
+    month += 1
+    return date.replace(year=year, month=month, day=min(date.day, calendar.monthrange(year, month)[1]))
+
+
+def _difference(later: datetime.datetime, earlier: datetime.datetime) -> tuple:
+    """
+    Returns the exact breakdown of later - earlier (later >= earlier) as a tuple in DIFFERENCE_UNITS order.
+    """
+    if later.tzinfo is not earlier.tzinfo and later.tzinfo is not None and earlier.tzinfo is not None:
+        # Count calendar months on the same wall clock
+        later = later.astimezone(earlier.tzinfo)
+
+    months = (later.year - earlier.year) * 12 + later.month - earlier.month
+    anchor = add_months(earlier, months) if months else earlier
+
+    if anchor > later:
+        months -= 1
+        anchor = add_months(earlier, months)
+
+    remainder = later - anchor
+    years, months = divmod(months, 12)
+    weeks, days = divmod(remainder.days, 7)
+    hours, seconds = divmod(remainder.seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return years, months, weeks, days, hours, minutes, seconds
+
+
 def datetime_difference(date_x: datetime.datetime,
                         date_y: datetime.datetime) -> dict:
     """
     Get the difference between two datetime objects (date_x and date_y).
 
+    The difference is calendar exact, years and months are counted on the calendar (e.g. 31 January to
+    28 February is 1 month), every unit is truncated and fractions of seconds are dropped. The breakdown is
+    of the absolute difference, whichever of the datetimes is the latest.
+
     Args:
         date_x (datetime.datetime): The first datetime object.
         date_y (datetime.datetime): The second datetime object.
@@ -190,70 +252,95 @@ def datetime_difference(date_x: datetime.datetime,
             "Argument date_y to 'datetime_difference' function should be an instance of datetime.datetime"
         )
 
-    _diff = date_x - date_y
-    try:
-        s = _diff.total_seconds()
-    except AttributeError:
-        s = days_to_seconds(_diff.days)
-
-    dt = {
-        "years": 0,
-        "months": 0,
-        "weeks": 0,
-        "days": 0,
-        "hours": 0,
-        "minutes": 0,
-        "seconds": 0,
-    }
+    if date_x >= date_y:
+        return dict(zip(DIFFERENCE_UNITS, _difference(date_x, date_y)))
+    return dict(zip(DIFFERENCE_UNITS, _difference(date_y, date_x)))
 
-    def convert(secs):
-        """
-        Convert seconds to a dictionary of time units.
 
-        Args:
-            secs (float): The number of seconds.
-        """
-        real_t = seconds_to_years(secs)
-        if real_t >= 0.99:
-            t = round(real_t)
-            dt["years"] = t
-            secs = years_to_seconds(real_t - t)
-
-        real_t = seconds_to_months(secs)
-        if real_t >= 1:
-            t = round(real_t)
-            dt["months"] = t
-            secs = months_to_seconds(real_t - t)
-
-        real_t = seconds_to_weeks(secs)
-        if real_t >= 1:
-            t = round(real_t)
-            dt["weeks"] = t
-            secs = weeks_to_seconds(real_t - t)
-
-        real_t = seconds_to_days(secs)
-        if real_t >= 1:
-            t = round(real_t)
-            dt["days"] = t
-            secs = days_to_seconds(real_t - t)
-
-        real_t = seconds_to_hours(secs)
-        if real_t >= 1:
-            t = round(real_t)
-            dt["hours"] = t
-            secs = hours_to_seconds(real_t - t)
-
-        real_t = seconds_to_minutes(secs)
-        if real_t >= 1:
-            t = round(real_t)
-            dt["minutes"] = t
-            secs = minutes_to_seconds(real_t - t)
-
-        if secs >= 1:
-            dt["seconds"] = round(secs)
-
-    convert(s)
-    return dt
+def _is_datetime64_array(value) -> bool:
+    """
+    Returns whether value is a NumPy datetime64 array, without importing NumPy.
+    """
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(value, numpy.ndarray) and value.dtype.kind == "M"
+
+
+def _numpy_differences(dates_x, dates_y) -> dict:
+    """
+    Vectorized `datetime_differences` for NumPy datetime64 arrays, see `datetime_differences`.
+    """
+    import numpy
+
+    dates_x = numpy.asarray(dates_x, dtype="datetime64[us]")
+    dates_y = numpy.asarray(dates_y, dtype="datetime64[us]")
+    later = numpy.maximum(dates_x, dates_y)
+    earlier = numpy.minimum(dates_x, dates_y)
+
+    earlier_month = earlier.astype("datetime64[M]")
+    earlier_day = earlier.astype("datetime64[D]")
+    day_of_month = earlier_day - earlier_month.astype("datetime64[D]")
+    time_of_day = earlier - earlier_day
+
+    def add_months(months):
+        # Same as `add_months`, the day is clamped to the last day of the month
+        month = earlier_month + months
+        month_start = month.astype("datetime64[D]")
+        month_length = (month + 1).astype("datetime64[D]") - month_start
+        return month_start + numpy.minimum(day_of_month, month_length - 1) + time_of_day
+
+    months = later.astype("datetime64[M]").astype("int64") - earlier_month.astype("int64")
+    months = months - (add_months(months) > later)
+    remainder = (later - add_months(months)) // numpy.timedelta64(1, "s")
+
+    years, months = numpy.divmod(months, 12)
+    days, seconds = numpy.divmod(remainder, 86400)
+    weeks, days = numpy.divmod(days, 7)
+    hours, seconds = numpy.divmod(seconds, 3600)
+    minutes, seconds = numpy.divmod(seconds, 60)
+    return dict(zip(DIFFERENCE_UNITS, (years, months, weeks, days, hours, minutes, seconds)))
+
+
+def datetime_differences(dates_x, dates_y) -> dict:
+    """
+    Get the differences between pairs of datetimes, the bulk version of `datetime_difference`.
+
+    NumPy datetime64 arrays are computed in vectorized form (NumPy isn't required otherwise), sequences of
+    datetime objects are computed pair by pair. Either argument may be a single datetime, which is compared
+    with every datetime of the other argument e.g. the current time.
+
+    Args:
+        dates_x (Sequence[datetime.datetime] | numpy.ndarray | datetime.datetime): The first datetimes.
+        dates_y (Sequence[datetime.datetime] | numpy.ndarray | datetime.datetime): The second datetimes.
+
+    Returns:
+        dict: The differences in years, months, weeks, days, hours, minutes, and seconds, each a list of
+            ints in the order of the datetimes or an int64 array for NumPy inputs.
+
+    Raises:
+        ValueError: If the sequences have different lengths.
+    """
+    if _is_datetime64_array(dates_x) or _is_datetime64_array(dates_y):
+        return _numpy_differences(dates_x, dates_y)
+
+    if isinstance(dates_x, datetime.datetime) and isinstance(dates_y, datetime.datetime):
+        return {unit: [value] for unit, value in datetime_difference(dates_x, dates_y).items()}
+
+    if isinstance(dates_x, datetime.datetime):
+        dates_x = itertools.repeat(dates_x, len(dates_y))
+    elif isinstance(dates_y, datetime.datetime):
+        dates_y = itertools.repeat(dates_y, len(dates_x))
+    elif len(dates_x) != len(dates_y):
+        raise ValueError(
+            f"Arguments to 'datetime_differences' function should have the same length, got {len(dates_x)} and {len(dates_y)}"
+        )
+
+    rows = [
+        _difference(date_x, date_y) if date_x >= date_y else _difference(date_y, date_x)
+        for date_x, date_y in zip(dates_x, dates_y)
+    ]
+    if not rows:
+        return {unit: [] for unit in DIFFERENCE_UNITS}
+    return {unit: list(values) for unit, values in zip(DIFFERENCE_UNITS, zip(*rows))}
 
 
 def datetime_difference_upto_now(previous_datetime: datetime.datetime) -> dict:
@@ -360,18 +447,356 @@ def build_readable_date(date_: dict, one_date=False) -> str:
         )
 
 
+# Fixed length units of differences shorter than 28 days (the shortest month)
+_FIXED_UNITS = (("weeks", 604800), ("days", 86400), ("hours", 3600), ("minutes", 60), ("seconds", 1))
+
+
+class RelativeTimeFormatter:
+    """
+    Formats datetimes relative to now e.g. '5 minutes ago', meant for refreshing the labels of large lists.
+
+    A label only depends on its bucket, the first (or first two) non-zero units of the difference e.g.
+    (5, 'minutes'), so the label of every bucket is built once and memoized with an LRU. Differences shorter
+    than 28 days are split with integer arithmetic, only longer ones need calendar exact months and years.
+    Sequences are formatted against a single snapshot of now.
+
+    Example Usage:
+        formatter = RelativeTimeFormatter()
+        labels = formatter.format_many(message.created_at for message in messages)
+    """
+    def __init__(
+        self,
+        one_date: bool = True,
+        suffix: str = " ago",
+        future_prefix: str = "in ",
+        just_now: str = "Just now",
+        just_now_seconds: int = 1,
+        cache_size: int = 1024,
+    ):
+        """
+        Args:
+            one_date (bool): If True, labels only have the first non-zero unit e.g. '2 hours ago' rather than
+                '2 hours 5 minutes ago', like `build_readable_date`.
+            suffix (str): Appended to labels of past datetimes.
+            future_prefix (str): Prepended to labels of future datetimes.
+            just_now (str): The label of differences shorter than just_now_seconds.
+            just_now_seconds (int): Differences shorter than this number of seconds are labelled just_now.
+            cache_size (int): Maximum number of memoized labels.
+        """
+        self.units = 1 if one_date else 2
+        self.suffix = suffix
+        self.future_prefix = future_prefix
+        self.just_now = just_now
+        self.just_now_seconds = just_now_seconds
+        self.label = functools.lru_cache(maxsize=cache_size)(self._build_label)
+
+    def _build_label(self, bucket: tuple, future: bool) -> str:
+        """
+        Returns the label of a bucket, a tuple of (count, unit) pairs.
+        """
+        text = " ".join(f"{count} {unit[:-1] if count == 1 else unit}" for count, unit in bucket)
+        return f"{self.future_prefix}{text}" if future else f"{text}{self.suffix}"
+
+    def bucket(self, value, now) -> tuple:
+        """
+        Returns the bucket of a datetime (or a timestamp in seconds) relative to now, a tuple of (count, unit)
+        pairs, empty for just now.
+        """
+        if isinstance(value, datetime.datetime):
+            delta = now - value
+        else:
+            delta = datetime.timedelta(seconds=now.timestamp() - value)
+
+        future = delta.days < 0
+        if future:
+            delta = -delta
+
+        seconds = delta.days * 86400 + delta.seconds
+        if seconds < self.just_now_seconds:
+            return (), future
+
+        bucket = []
+        if delta.days < 28:
+            for unit, unit_seconds in _FIXED_UNITS:
+                count, seconds = divmod(seconds, unit_seconds)
+                if count:
+                    bucket.append((count, unit))
+                    if len(bucket) == self.units:
+                        break
+        else:
+            if not isinstance(value, datetime.datetime):
+                value = datetime.datetime.fromtimestamp(value, now.tzinfo)
+            later, earlier = (value, now) if future else (now, value)
+
+            for count, unit in zip(_difference(later, earlier), DIFFERENCE_UNITS):
+                if count:
+                    bucket.append((count, unit))
+                    if len(bucket) == self.units:
+                        break
+        return tuple(bucket), future
+
+    def now(self, value=None) -> datetime.datetime:
+        """
+        Returns the current datetime, in the timezone of value if it is an aware datetime.
+        """
+        return datetime.datetime.now(getattr(value, "tzinfo", None))
+
+    def format(self, value, now: Optional[datetime.datetime] = None) -> str:
+        """
+        Returns the label of a datetime or a timestamp in seconds.
+
+        Args:
+            value (datetime.datetime | float): The datetime to format.
+            now (datetime.datetime): The datetime value is relative to, defaults to the current datetime.
+        """
+        bucket, future = self.bucket(value, now or self.now(value))
+        return self.label(bucket, future) if bucket else self.just_now
+
+    def format_many(self, values, now: Optional[datetime.datetime] = None) -> List[str]:
+        """
+        Returns the labels of many datetimes, all relative to the same now.
+
+        Args:
+            values (Iterable[datetime.datetime | float] | numpy.ndarray): The datetimes or timestamps in seconds
+                to format, NumPy datetime64 arrays are bucketed in vectorized form.
+            now (datetime.datetime): The datetime values are relative to, defaults to the current datetime.
+        """
+        if _is_datetime64_array(values):
+            return self._format_array(values, now)
+
+        values = values if isinstance(values, (list, tuple)) else list(values)
+        if not values:
+            return []
+
+        now = now or self.now(values[0])
+        bucket, label, just_now = self.bucket, self.label, self.just_now
+        labels = []
+
+        for value in values:
+            buckets, future = bucket(value, now)
+            labels.append(label(buckets, future) if buckets else just_now)
+        return labels
+
+    def _format_array(self, values, now: Optional[datetime.datetime]) -> List[str]:
+        """
+        `format_many` for NumPy datetime64 arrays (naive, as NumPy has no timezones).
+        """
+        import numpy
+
+        now = numpy.datetime64(now or datetime.datetime.now(), "us")
+        differences = datetime_differences(now, values)
+        total_seconds = numpy.abs((values - now) // numpy.timedelta64(1, "s"))
+        future = values > now
+
+        # Only the unique rows are bucketed in Python
+        rows = numpy.column_stack([differences[unit] for unit in DIFFERENCE_UNITS] + [future, total_seconds < self.just_now_seconds])
+        unique_rows, inverse = numpy.unique(rows, axis=0, return_inverse=True)
+        unique_labels = []
+
+        for row in unique_rows.tolist():
+            if row[-1]:
+                unique_labels.append(self.just_now)
+                continue
+            bucket = tuple((count, unit) for count, unit in zip(row, DIFFERENCE_UNITS) if count)[:self.units]
+            unique_labels.append(self.label(bucket, bool(row[-2])) if bucket else self.just_now)
+        return [unique_labels[index] for index in inverse.reshape(-1).tolist()]
+
+
+# Format of ISO 8601 strings for `compile_format`, parsed with datetime.fromisoformat
+ISO_8601 = "iso8601"
+
+# Fixed width strftime directives supported by compiled formats, directive -> (datetime attribute, width)
+_FIXED_DIRECTIVES = {
+    "Y": ("year", 4),
+    "m": ("month", 2),
+    "d": ("day", 2),
+    "H": ("hour", 2),
+    "M": ("minute", 2),
+    "S": ("second", 2),
+}
+
+# Formats whose strings are also ISO 8601 strings
+_ISO_FORMATS = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+
+
+def parse_iso_date(date_str: str) -> datetime.datetime:
+    """
+    Parses an ISO 8601 date string e.g. "2024-05-01T10:00:00Z" into a datetime object.
+
+    Args:
+        date_str (str): The date string to parse.
+
+    Returns:
+        datetime: The parsed datetime object.
+    """
+    if date_str.endswith(("Z", "z")):
+        # Only supported by fromisoformat from Python 3.11
+        date_str = date_str[:-1] + "+00:00"
+    return datetime.datetime.fromisoformat(date_str)
+
+
+if sys.version_info >= (3, 11):
+    # Handles the 'Z' suffix itself
+    _parse_iso_date = datetime.datetime.fromisoformat
+else:
+    _parse_iso_date = parse_iso_date
+
+
+def _compile_layout(format_str: str) -> Optional[list]:
+    """
+    Returns the layout of a format made only of fixed width numeric directives and literals, a list of
+    (attribute, width) for directives and (None, text) for literals, or None for other formats.
+    """
+    layout = []
+    index = 0
+
+    while index < len(format_str):
+        if format_str[index] != "%":
+            layout.append((None, format_str[index]))
+            index += 1
+            continue
+
+        directive = format_str[index + 1:index + 2]
+        index += 2
+
+        if directive == "%":
+            layout.append((None, "%"))
+        elif directive in _FIXED_DIRECTIVES and _FIXED_DIRECTIVES[directive] not in layout:
+            layout.append(_FIXED_DIRECTIVES[directive])
+        else:
+            return None
+    return layout
+
+
+def _compile_parser(format_str: str, layout: list) -> Callable[[str], datetime.datetime]:
+    """
+    Returns a parser for a fixed layout, strings not matching the layout are handed to strptime.
+    """
+    pattern = re.compile(
+        "".join(f"(\\d{{{value}}})" if attribute else re.escape(value) for attribute, value in layout),
+        re.ASCII,
+    )
+    attributes = [attribute for attribute, _ in layout if attribute]
+    defaults = {"year": "1900", "month": "1", "day": "1", "hour": "0", "minute": "0", "second": "0"}
+    arguments = ", ".join(
+        f"int(groups[{attributes.index(name)}])" if name in attributes else defaults[name]
+        for name in ("year", "month", "day", "hour", "minute", "second")
+    )
+
+    if format_str in _ISO_FORMATS:
+        # Validated by the pattern, fromisoformat is faster than building the datetime in Python
+        body = "return fromisoformat(date_str)"
+    else:
+        body = f"groups = match.groups()\n            return datetime({arguments})"
+
+    source = (
+        "def parse(date_str):\n"
+        "    match = fullmatch(date_str)\n"
+        "    if match is not None:\n"
+        "        try:\n"
+        f"            {body}\n"
+        "        except ValueError:\n"
+        "            pass\n"
+        "    return strptime(date_str, format_str)\n"
+    )
+    namespace = {
+        "fullmatch": pattern.fullmatch,
+        "fromisoformat": datetime.datetime.fromisoformat,
+        "datetime": datetime.datetime,
+        "strptime": datetime.datetime.strptime,
+        "format_str": format_str,
+    }
+    exec(compile(source, f"<format {format_str!r}>", "exec"), namespace)
+    return namespace["parse"]
+
+
+def _compile_formatter(format_str: str, layout: list) -> Callable[[datetime.datetime], str]:
+    """
+    Returns a formatter for a fixed layout using an f-string, dates before year 1000 are handed to strftime
+    as it doesn't zero pad them on all platforms.
+    """
+    template = "".join(
+        f"{{date.{attribute}:0{value}d}}" if attribute else value.replace("{", "{{").replace("}", "}}")
+        for attribute, value in layout
+    )
+
+    fallback = "date.year < 1000"
+    if any(attribute in ("hour", "minute", "second") for attribute, _ in layout):
+        # datetime.date objects have no time
+        fallback += " or not isinstance(date, datetime)"
+
+    source = (
+        "def format(date):\n"
+        f"    if {fallback}:\n"
+        "        return date.strftime(format_str)\n"
+        f"    return f{template!r}\n"
+    )
+    namespace = {"datetime": datetime.datetime, "format_str": format_str}
+    exec(compile(source, f"<format {format_str!r}>", "exec"), namespace)
+    return namespace["format"]
+
+
+class CompiledFormat:
+    """
+    A strptime/strftime format string compiled into a parser and a formatter.
+
+    Formats made only of fixed width numeric directives (%Y, %m, %d, %H, %M, %S, %%) and literals are compiled
+    into a regular expression parser (using datetime.fromisoformat for ISO 8601 shaped formats) and an
+    f-string formatter. Other formats and strings which don't match the fixed layout are handed to
+    strptime/strftime, so results and errors are the same as with strptime/strftime.
+    """
+    __slots__ = ("format_str", "parse", "format")
+
+    def __init__(self, format_str: str):
+        """
+        Args:
+            format_str (str): The format string or ISO_8601.
+        """
+        self.format_str = format_str
+        layout = None if format_str == ISO_8601 else _compile_layout(format_str)
+
+        if format_str == ISO_8601:
+            self.parse = _parse_iso_date
+            self.format = operator.methodcaller("isoformat")
+        elif layout is not None:
+            self.parse = _compile_parser(format_str, layout)
+            self.format = _compile_formatter(format_str, layout)
+        else:
+            self.parse = functools.partial(_strptime, format_str=format_str)
+            self.format = functools.partial(_strftime, format_str=format_str)
+
+
+def _strptime(date_str: str, format_str: str) -> datetime.datetime:
+    return datetime.datetime.strptime(date_str, format_str)
+
+
+def _strftime(date: datetime.datetime, format_str: str) -> str:
+    return date.strftime(format_str)
+
+
+@functools.lru_cache(maxsize=128)
+def compile_format(format_str: str) -> CompiledFormat:
+    """
+    Returns the compiled parser and formatter for a format string, compiled formats are cached.
+
+    Args:
+        format_str (str): The format string (e.g., "%d/%m/%Y %H:%M") or ISO_8601.
+    """
+    return CompiledFormat(format_str)
+
+
 def format_date(date: datetime, format_str: str = "%Y-%m-%d %H:%M:%S") -> str:
     """
     Formats a given datetime object into a string with the specified format.
 
     Args:
         date (datetime): The datetime object to format.
-        format_str (str): The format string.
+        format_str (str): The format string or ISO_8601.
 
     Returns:
         str: The formatted date string.
     """
-    return date.strftime(format_str)
+    return compile_format(format_str).format(date)
 
 
 def parse_date(date_str: str, format_str: str = "%Y-%m-%d %H:%M:%S") -> datetime.datetime:
@@ -380,12 +805,40 @@ def parse_date(date_str: str, format_str: str = "%Y-%m-%d %H:%M:%S") -> datetime
 
     Args:
         date_str (str): The date string to parse.
-        format_str (str): The format string.
+        format_str (str): The format string or ISO_8601.
 
     Returns:
         datetime: The parsed datetime object.
     """
-    return datetime.datetime.strptime(date_str, format_str)
+    return compile_format(format_str).parse(date_str)
+
+
+def format_many(dates: Iterable[datetime.datetime], format_str: str = "%Y-%m-%d %H:%M:%S") -> Iterator[str]:
+    """
+    Formats many datetime objects with the specified format, the format is compiled once.
+
+    Args:
+        dates (Iterable[datetime]): The datetime objects to format.
+        format_str (str): The format string or ISO_8601.
+
+    Yields:
+        str: The formatted date strings, in order.
+    """
+    yield from map(compile_format(format_str).format, dates)
+
+
+def parse_many(date_strs: Iterable[str], format_str: str = "%Y-%m-%d %H:%M:%S") -> Iterator[datetime.datetime]:
+    """
+    Parses many date strings using the given format, the format is compiled once.
+
+    Args:
+        date_strs (Iterable[str]): The date strings to parse e.g. the lines of a column.
+        format_str (str): The format string or ISO_8601.
+
+    Yields:
+        datetime: The parsed datetime objects, in order.
+    """
+    yield from map(compile_format(format_str).parse, date_strs)
 
 
 def calculate_date_diff(start_date: datetime, end_date: datetime) -> datetime.timedelta:
@@ -402,31 +855,132 @@ def calculate_date_diff(start_date: datetime, end_date: datetime) -> datetime.ti
     return end_date - start_date
 
 
+@functools.lru_cache(maxsize=256)
+def get_timezone(name: str) -> datetime.tzinfo:
+    """
+    Returns the timezone object for a timezone name e.g. "Africa/Harare", timezone objects are cached.
+
+    The standard library zoneinfo is used, pytz is only used if it is installed and zoneinfo is unavailable
+    (Python 3.8) or doesn't know the timezone e.g. without the tzdata package on Windows.
+
+    Args:
+        name (str): The timezone name.
+
+    Returns:
+        datetime.tzinfo: The timezone.
+
+    Raises:
+        ValueError: If the timezone is unknown.
+    """
+    if name.upper() in ("UTC", "GMT"):
+        return datetime.timezone.utc
+
+    if zoneinfo is not None:
+        try:
+            return zoneinfo.ZoneInfo(name)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            pass
+
+    try:
+        import pytz
+    except ImportError:
+        raise ValueError(f"Unknown time zone '{name}'")
+
+    try:
+        return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError:
+        raise ValueError(f"Unknown time zone '{name}'")
+
+
+def _timezone(timezone: Union[str, datetime.tzinfo]) -> datetime.tzinfo:
+    """
+    Returns the timezone object for a timezone name or object.
+    """
+    return get_timezone(timezone) if isinstance(timezone, str) else timezone
+
+
+def _attach_timezone(timezone: datetime.tzinfo) -> Callable[[datetime.datetime], datetime.datetime]:
+    """
+    Returns a function setting the timezone of naive datetimes.
+    """
+    if hasattr(timezone, "localize"):
+        # pytz timezones need localizing for the right offset
+        return timezone.localize
+    return lambda date: date.replace(tzinfo=timezone)
+
+
 def convert_timezone(date: datetime, from_timezone: str, to_timezone: str) -> datetime.datetime:
     """
     Converts a datetime object from one time zone to another.
 
     Args:
-        date (datetime): The datetime to convert.
+        date (datetime): The datetime to convert, aware datetimes are converted from their own time zone.
         from_timezone (str): The original time zone (e.g., "UTC").
         to_timezone (str): The target time zone (e.g., "US/Eastern").
 
     Returns:
         datetime: The converted datetime object.
     """
-    import pytz
-    
-    from_zone = pytz.timezone(from_timezone)
-    to_zone = pytz.timezone(to_timezone)
-
-    # Set the time zone for the original date
-    date = from_zone.localize(date)
+    if date.tzinfo is None:
+        # Set the time zone for the original date
+        date = _attach_timezone(_timezone(from_timezone))(date)
 
     # Convert to the target time zone
-    return date.astimezone(to_zone)
+    return date.astimezone(_timezone(to_timezone))
 
 
-def local_date() -> str:
+def convert_many(
+    datetimes: Iterable[datetime.datetime],
+    from_timezone: Union[str, datetime.tzinfo],
+    to_timezone: Union[str, datetime.tzinfo],
+) -> List[datetime.datetime]:
+    """
+    Converts many datetime objects from one time zone to another, the time zones are resolved once.
+
+    Args:
+        datetimes (Iterable[datetime]): The datetimes to convert, aware datetimes are converted from their own
+            time zone.
+        from_timezone (str | tzinfo): The original time zone (e.g., "UTC").
+        to_timezone (str | tzinfo): The target time zone (e.g., "US/Eastern").
+
+    Returns:
+        List[datetime]: The converted datetime objects, in order.
+    """
+    attach = _attach_timezone(_timezone(from_timezone))
+    to_zone = _timezone(to_timezone)
+    return [
+        (attach(date) if date.tzinfo is None else date).astimezone(to_zone)
+        for date in datetimes
+    ]
+
+
+# Names used by `local_date` and `gmt_date`, independent of the locale
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTH_NAMES = (None, "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def memoize_per_second(func: Callable[[int], str]) -> Callable[[], str]:
+    """
+    Memoize a function of the current time for the current second, the function receives the timestamp
+    in whole seconds.
+    """
+    cached = [(None, None)]
+
+    @functools.wraps(func)
+    def wrapper() -> str:
+        second = int(time.time())
+        cached_second, value = cached[0]
+
+        if cached_second != second:
+            value = func(second)
+            # One tuple so that concurrent callers never see a value of another second
+            cached[0] = (second, value)
+        return value
+    return wrapper
+
+
+@memoize_per_second
+def local_date(timestamp: int) -> str:
     """
     Returns the current local date and time in a formatted string.
 
@@ -435,28 +989,11 @@ def local_date() -> str:
     Returns:
         str: The formatted local date and time.
     """
-    timestamp = time.time()
-    weekdayname = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    monthname = [
-        None,
-        "Jan",
-        "Feb",
-        "Mar",
-        "Apr",
-        "May",
-        "Jun",
-        "Jul",
-        "Aug",
-        "Sep",
-        "Oct",
-        "Nov",
-        "Dec",
-    ]
     year, month, day, hh, mm, ss, wd, y, z = time.localtime(timestamp)
     localtime = "%s, %02d %3s %04d %02d:%02d:%02d" % (
-        weekdayname[wd],
+        WEEKDAY_NAMES[wd],
         day,
-        monthname[month],
+        MONTH_NAMES[month],
         year,
         hh,
         mm,
@@ -465,7 +1002,8 @@ def local_date() -> str:
     return localtime
 
 
-def short_local_date() -> str:
+@memoize_per_second
+def short_local_date(timestamp: int) -> str:
     """
     Returns the current local date and time in a short formatted string.
 
@@ -474,10 +1012,11 @@ def short_local_date() -> str:
     Returns:
         str: The formatted local date and time.
     """
-    return time.strftime("%d/%m/%Y %H:%M:%S")
+    return time.strftime("%d/%m/%Y %H:%M:%S", time.localtime(timestamp))
 
 
-def django_short_local_date() -> str:
+@memoize_per_second
+def django_short_local_date(timestamp: int) -> str:
     """
     Returns the current local date and time in a short django formatted string.
 
@@ -486,10 +1025,11 @@ def django_short_local_date() -> str:
     Returns:
         str: The formatted local date and time.
     """
-    return time.strftime("%d/%b/%Y %H:%M:%S")
+    return time.strftime("%d/%b/%Y %H:%M:%S", time.localtime(timestamp))
 
 
-def gmt_date() -> str:
+@memoize_per_second
+def gmt_date(timestamp: int) -> str:
     """
     Returns the current Greenwich Mean Time (GMT) in a formatted string.
 
@@ -498,23 +1038,6 @@ def gmt_date() -> str:
     Returns:
         str: The formatted GMT date and time.
     """
-    timestamp = time.time()
-    weekdayname = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    monthname = [
-        None,
-        "Jan",
-        "Feb",
-        "Mar",
-        "Apr",
-        "May",
-        "Jun",
-        "Jul",
-        "Aug",
-        "Sep",
-        "Oct",
-        "Nov",
-        "Dec",
-    ]
     year, month, day, hh, mm, ss, wd, y, z = time.gmtime(timestamp)
-    gmt_time_str = f"{weekdayname[wd]}, {day:02d} {monthname[month]} {year:04d} {hh:02d}:{mm:02d}:{ss:02d} GMT"
+    gmt_time_str = f"{WEEKDAY_NAMES[wd]}, {day:02d} {MONTH_NAMES[month]} {year:04d} {hh:02d}:{mm:02d}:{ss:02d} GMT"
     return gmt_time_str
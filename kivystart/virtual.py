@@ -0,0 +1,262 @@
+"""
+In-memory projects.
+
+A `VirtualProject` is an output backend keeping the generated files in memory, as a mapping of relative
+path to bytes plus file modes. It is meant for embedding KivyStart and for test suites asserting on
+generated contents without writing thousands of projects to disk.
+
+Identical file contents are shared between files and projects, so the static files of many generated
+projects are stored once.
+
+Example Usage:
+    project = create_virtual_project(GenerationOptions(name="demo", appname="DemoApp"))
+
+    print(project.text("main.py"))
+    print(project.digest())
+    project.write_to("/tmp/demo")
+"""
+import os
+import base64
+import difflib
+import hashlib
+import threading
+import collections
+
+from typing import Dict, Iterator, List, Optional
+
+from kivystart.output import (
+    FILE_MODE,
+    ProjectOutput,
+    ArchiveOutput,
+    normalize_path,
+)
+
+
+# Maximum number of distinct contents kept for sharing between projects
+SHARED_BUFFERS_SIZE = 4096
+
+_shared_buffers = collections.OrderedDict()
+# Projects are generated concurrently by the server workers
+_shared_buffers_lock = threading.Lock()
+
+
+def share_buffer(data: bytes) -> bytes:
+    """
+    Returns a shared bytes object equal to data, so that identical contents are stored once.
+    """
+    key = hashlib.blake2b(data, digest_size=16).digest()
+
+    with _shared_buffers_lock:
+        shared = _shared_buffers.get(key)
+
+        if shared is not None and shared == data:
+            _shared_buffers.move_to_end(key)
+            return shared
+
+        _shared_buffers[key] = data
+        if len(_shared_buffers) > SHARED_BUFFERS_SIZE:
+            _shared_buffers.popitem(last=False)
+    return data
+
+
+class VirtualFile:
+    """
+    A file of a virtual project.
+    """
+    __slots__ = ("data", "mode")
+
+    def __init__(self, data: bytes, mode: int = FILE_MODE):
+        """
+        Args:
+            data (bytes): The file content.
+            mode (int): The file permission bits e.g. 0o644.
+        """
+        self.data = data
+        self.mode = mode
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, VirtualFile) and self.mode == other.mode and self.data == other.data
+
+    def __repr__(self) -> str:
+        return f"<VirtualFile {len(self.data)} bytes mode={oct(self.mode)}>"
+
+
+class VirtualProject(ProjectOutput):
+    """
+    Generated project kept in memory, files are keyed by their path relative to the project root.
+    """
+    def __init__(self):
+        self.files: Dict[str, VirtualFile] = {}
+        self.dirs = set()
+
+    def exists(self, path: str) -> bool:
+        path = normalize_path(path)
+        return path in self.files or path in self.dirs
+
+    def isdir(self, path: str) -> bool:
+        return normalize_path(path) in self.dirs
+
+    def read(self, path: str) -> bytes:
+        try:
+            return self.files[normalize_path(path)].data
+        except KeyError:
+            raise FileNotFoundError(f"File '{path}' doesn't exist")
+
+    def write(self, path: str, data: bytes, mode: str = "x", makedirs: bool = True, file_mode: int = FILE_MODE):
+        path = normalize_path(path)
+
+        if mode == "x" and path in self.files:
+            raise FileExistsError(f"File '{path}' already exists")
+
+        parent = path.rsplit("/", 1)[0] if "/" in path else ""
+        if parent and parent not in self.dirs:
+            if not makedirs:
+                raise FileNotFoundError(f"Directory '{parent}' doesn't exist")
+            self.makedirs(parent)
+
+        self.files[path] = VirtualFile(share_buffer(bytes(data)), file_mode)
+
+    def makedirs(self, path: str):
+        path = normalize_path(path)
+
+        while path and path not in self.dirs:
+            self.dirs.add(path)
+            path = path.rsplit("/", 1)[0] if "/" in path else ""
+
+    def __getitem__(self, path: str) -> bytes:
+        return self.read(path)
+
+    def __contains__(self, path: str) -> bool:
+        return normalize_path(path) in self.files
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self.files))
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, VirtualProject) and self.files == other.files and self.dirs == other.dirs
+
+    def __repr__(self) -> str:
+        return f"<VirtualProject {len(self.files)} files {self.size} bytes>"
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the total size of the files in bytes.
+        """
+        return sum(len(file.data) for file in self.files.values())
+
+    def text(self, path: str, encoding: str = "utf-8") -> str:
+        """
+        Returns the content of a file as text.
+        """
+        return self.read(path).decode(encoding)
+
+    def mode(self, path: str) -> int:
+        """
+        Returns the permission bits of a file.
+        """
+        try:
+            return self.files[normalize_path(path)].mode
+        except KeyError:
+            raise FileNotFoundError(f"File '{path}' doesn't exist")
+
+    def digest(self) -> str:
+        """
+        Returns a SHA-256 hex digest of the paths, modes and contents of all files, equal projects have equal
+        digests.
+        """
+        sha = hashlib.sha256()
+
+        for path in self:
+            file = self.files[path]
+            sha.update(path.encode("utf-8") + b"\0")
+            sha.update(file.mode.to_bytes(4, "big"))
+            sha.update(len(file.data).to_bytes(8, "big"))
+            sha.update(file.data)
+        return sha.hexdigest()
+
+    def diff(self, other: "VirtualProject") -> Dict[str, List[str]]:
+        """
+        Returns the paths added, removed and changed (content or mode) in other compared to this project.
+        """
+        paths, other_paths = set(self.files), set(other.files)
+        return {
+            "added": sorted(other_paths - paths),
+            "removed": sorted(paths - other_paths),
+            "changed": sorted(path for path in paths & other_paths if self.files[path] != other.files[path]),
+        }
+
+    def unified_diff(self, other: "VirtualProject", path: str) -> str:
+        """
+        Returns a unified diff of a text file between this project and other.
+        """
+        path = normalize_path(path)
+        before = self.text(path).splitlines(keepends=True) if path in self else []
+        after = other.text(path).splitlines(keepends=True) if path in other else []
+        return "".join(difflib.unified_diff(before, after, fromfile=f"a/{path}", tofile=f"b/{path}"))
+
+    def to_dict(self) -> Dict:
+        """
+        Returns the project as a JSON serializable dict, binary contents are base64 encoded.
+        """
+        files = {}
+
+        for path in self:
+            file = self.files[path]
+            try:
+                files[path] = {"text": file.data.decode("utf-8"), "mode": file.mode}
+            except UnicodeDecodeError:
+                files[path] = {"base64": base64.b64encode(file.data).decode("ascii"), "mode": file.mode}
+        return {"files": files, "dirs": sorted(self.dirs)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "VirtualProject":
+        """
+        Returns a project from a dict created by `to_dict`.
+        """
+        project = cls()
+
+        for path in data.get("dirs", []):
+            project.makedirs(path)
+
+        for path, file in data["files"].items():
+            if "base64" in file:
+                content = base64.b64decode(file["base64"])
+            else:
+                content = file["text"].encode("utf-8")
+            project.write(path, content, mode="w", file_mode=file.get("mode", FILE_MODE))
+        return project
+
+    def write_to(self, destination_dir: str, overwrite: bool = False):
+        """
+        Write the project into a directory.
+
+        Args:
+            destination_dir (str): The directory to write the project into.
+            overwrite (bool): Whether to overwrite existing files.
+        """
+        for path in sorted(self.dirs):
+            os.makedirs(os.path.join(destination_dir, path), exist_ok=True)
+        os.makedirs(destination_dir, exist_ok=True)
+
+        for path in self:
+            file = self.files[path]
+            fullpath = os.path.join(destination_dir, path)
+
+            with open(fullpath, "wb" if overwrite else "xb") as fd:
+                fd.write(file.data)
+            os.chmod(fullpath, file.mode)
+
+    def write_archive(self, target, root: Optional[str] = None, format: Optional[str] = None):
+        """
+        Write the project into a zip or tar.gz archive, see `ArchiveOutput` for the arguments.
+        """
+        with ArchiveOutput(target, root=root, format=format) as output:
+            for path in sorted(self.dirs):
+                output.makedirs(path)
+
+            for path in self:
+                output.write(path, self.files[path].data)
@@ -0,0 +1,49 @@
+"""
+Tests for the texture atlases built with `kivystart assets build`.
+"""
+from kivystart.atlas import atlas_spec_fields, build_atlases
+from kivystart.buildozer import BuildozerSpec
+from kivystart.png import Image, write_png
+
+
+def write_image(path, width: int = 4, height: int = 4):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_png(str(path), Image(width, height, bytearray(b"\xff\x00\x00\xff" * width * height)))
+
+
+def test_build_atlases(tmp_path):
+    write_image(tmp_path / "assets" / "images" / "buttons" / "play.png")
+    write_image(tmp_path / "assets" / "images" / "logo.png")
+
+    result = build_atlases(str(tmp_path), workers=1)
+
+    assert result.built == ["buttons", "images"]
+    assert (tmp_path / "assets" / "atlas" / "buttons.atlas").is_file()
+    assert build_atlases(str(tmp_path), workers=1).skipped == ["buttons", "images"]
+
+
+def test_spec_fields_package_the_atlases(tmp_path):
+    write_image(tmp_path / "assets" / "images" / "buttons" / "play.png")
+    build_atlases(str(tmp_path), workers=1)
+    spec = BuildozerSpec.parse("[app]\nsource.include_exts = py,kv\nsource.exclude_dirs = tests, bin\n")
+
+    fields = atlas_spec_fields(str(tmp_path), spec)
+
+    assert fields == {
+        "source.include_exts": ["py", "kv", "atlas", "png"],
+        "source.exclude_dirs": ["tests", "bin", "assets/images"],
+    }
+
+    spec.update(fields)
+    assert atlas_spec_fields(str(tmp_path), spec) == {}
+
+
+def test_spec_fields_keep_images_not_in_an_atlas(tmp_path):
+    write_image(tmp_path / "assets" / "images" / "buttons" / "play.png")
+    (tmp_path / "assets" / "images" / "notes.txt").write_text("not an image")
+    build_atlases(str(tmp_path), workers=1)
+
+    # Every extension is packaged when source.include_exts is empty
+    fields = atlas_spec_fields(str(tmp_path), BuildozerSpec.parse("[app]\ntitle = Demo\n"))
+
+    assert fields == {}
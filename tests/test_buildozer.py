@@ -0,0 +1,75 @@
+"""
+Tests for the buildozer.spec fields emitted by KivyStart.
+"""
+import os
+
+from kivystart.api import GenerationOptions, create_virtual_project
+from kivystart.buildozer import (
+    BuildozerSpec,
+    build_cache_spec_fields,
+    release_profile_spec_fields,
+)
+
+
+def generate_spec(**options) -> BuildozerSpec:
+    project = create_virtual_project(GenerationOptions(name="demo", appname="DemoApp", no_venv=True, **options))
+    content = project["buildozer.spec"]
+    return BuildozerSpec.parse(content if isinstance(content, str) else content.decode("utf-8"))
+
+
+def test_build_cache_fields_share_sdk_and_ndk(tmp_path):
+    first = build_cache_spec_fields(str(tmp_path), "org.test.first")
+    second = build_cache_spec_fields(str(tmp_path), "org.test.second")
+
+    assert first["android.sdk_path"] == second["android.sdk_path"] == os.path.join(str(tmp_path), "android", "sdk")
+    assert first["android.ndk_path"] == second["android.ndk_path"] == os.path.join(str(tmp_path), "android", "ndk")
+    assert first["android.skip_update"] is True
+    assert first["android.accept_sdk_license"] is True
+
+
+def test_build_cache_fields_use_a_build_dir_per_app(tmp_path):
+    first = build_cache_spec_fields(str(tmp_path), "org.test.first")
+    second = build_cache_spec_fields(str(tmp_path), "org.test.second")
+
+    assert first["build_dir"] == os.path.join(str(tmp_path), "build", "org.test.first")
+    assert first["build_dir"] != second["build_dir"]
+
+
+def test_build_cache_fields_expand_user_and_sanitize_app_id():
+    fields = build_cache_spec_fields("~/cache", "org/test app")
+
+    assert fields["build_dir"] == os.path.join(os.path.expanduser("~/cache"), "build", "org_test_app")
+
+
+def test_generated_spec_build_cache_fields(tmp_path):
+    spec = generate_spec(build_cache=str(tmp_path))
+
+    assert spec.get("build_dir", section="buildozer") == os.path.join(str(tmp_path), "build", "org.test.demoapp")
+    assert spec.get("android.sdk_path") == os.path.join(str(tmp_path), "android", "sdk")
+    assert spec.get("android.ndk_path") == os.path.join(str(tmp_path), "android", "ndk")
+    assert spec.get("android.skip_update") == "True"
+
+
+def test_generated_spec_without_build_cache():
+    spec = generate_spec()
+
+    assert spec.get("build_dir", section="buildozer") is None
+    assert spec.get("android.sdk_path") is None
+
+
+def test_release_profile_includes_assets_added_later(tmp_path):
+    (tmp_path / "main.py").write_text("")
+    fields = release_profile_spec_fields(str(tmp_path))
+
+    for ext in ("py", "kv", "png", "jpg", "atlas", "ttf"):
+        assert ext in fields["source.include_exts"]
+    assert "android.no-byte-compile-python" not in fields
+
+
+def test_release_profile_includes_extensions_found_in_tree(tmp_path):
+    (tmp_path / "data.csv").write_text("")
+    (tmp_path / "README.md").write_text("")
+    fields = release_profile_spec_fields(str(tmp_path))
+
+    assert "csv" in fields["source.include_exts"]
+    assert "md" not in fields["source.include_exts"]
@@ -0,0 +1,75 @@
+"""
+Tests for the bytecode precompilation of generated projects.
+"""
+import os
+import importlib.util
+
+from kivystart.api import GenerationOptions, create_virtual_project
+from kivystart.buildozer import BuildozerSpec
+from kivystart.bytecode import bytecode_is_current, bytecode_spec_fields, compile_project
+
+
+def write(path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def test_compile_project_emits_bytecode_at_each_level(tmp_path):
+    write(tmp_path / "main.py", "print('main')\n")
+    write(tmp_path / "components" / "screen.py", "SCREEN = 1\n")
+
+    result = compile_project(str(tmp_path), optimize_levels=(0, 2), workers=1)
+
+    assert sorted(result.sources) == ["components/screen.py", "main.py"]
+    assert len(result.compiled) == 4
+    assert result.failed == []
+
+    for level in ("", 2):
+        bytecode_path = importlib.util.cache_from_source(str(tmp_path / "main.py"), optimization=level)
+        assert bytecode_is_current(str(tmp_path / "main.py"), bytecode_path)
+
+
+def test_compile_project_skips_excluded_and_hidden_dirs(tmp_path):
+    write(tmp_path / "main.py", "print('main')\n")
+    write(tmp_path / "venv" / "lib" / "module.py", "MODULE = 1\n")
+    write(tmp_path / ".buildozer" / "module.py", "MODULE = 1\n")
+
+    result = compile_project(str(tmp_path), workers=1)
+
+    assert result.sources == ["main.py"]
+    assert not os.path.exists(importlib.util.cache_from_source(str(tmp_path / "venv" / "lib" / "module.py")))
+    assert not os.path.exists(importlib.util.cache_from_source(str(tmp_path / ".buildozer" / "module.py")))
+
+
+def test_compile_project_reports_failures(tmp_path):
+    write(tmp_path / "main.py", "print('main')\n")
+    write(tmp_path / "broken.py", "def broken(:\n")
+
+    result = compile_project(str(tmp_path), workers=1)
+
+    assert result.sources == ["main.py"]
+    assert result.failed == ["broken.py"]
+    assert "broken.py" in result.output
+
+
+def test_bytecode_spec_fields_exclude_host_bytecode_once():
+    spec = BuildozerSpec.parse("[app]\nsource.exclude_exts = spec,pyc\n")
+
+    fields = bytecode_spec_fields(spec)
+
+    assert fields == {
+        "source.exclude_exts": ["spec", "pyc", "pyo"],
+        "source.exclude_dirs": ["__pycache__"],
+    }
+
+    spec.update(fields)
+    assert bytecode_spec_fields(spec) == {}
+
+    # Only the listed extensions are packaged, the bytecode isn't
+    assert bytecode_spec_fields(BuildozerSpec.parse("[app]\nsource.include_exts = py,kv,png\n")) == {}
+
+
+def test_virtual_projects_are_not_compiled():
+    project = create_virtual_project(GenerationOptions(name="demo", appname="DemoApp", no_venv=True, no_buildozer=True, compile_bytecode=True))
+
+    assert not any(path.endswith(".pyc") for path in project.files)
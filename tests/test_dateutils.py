@@ -0,0 +1,76 @@
+"""
+Tests for the date utilities.
+"""
+import datetime
+
+import pytest
+
+from kivystart.utils.dateutils import (
+    DIFFERENCE_UNITS,
+    add_months,
+    datetime_difference,
+    datetime_differences,
+)
+
+
+PAIRS = [
+    (datetime.datetime(2023, 1, 31), datetime.datetime(2023, 2, 28)),
+    (datetime.datetime(2024, 1, 31), datetime.datetime(2024, 2, 29)),
+    (datetime.datetime(2023, 1, 31), datetime.datetime(2023, 3, 1)),
+    (datetime.datetime(2023, 3, 31, 12, 30), datetime.datetime(2023, 2, 28, 6, 15, 10)),
+    (datetime.datetime(2020, 2, 29), datetime.datetime(2023, 2, 28, 23, 59, 59)),
+    (datetime.datetime(2023, 5, 15, 8), datetime.datetime(2023, 5, 15, 8)),
+]
+
+
+def difference(**units) -> dict:
+    return {unit: units.get(unit, 0) for unit in DIFFERENCE_UNITS}
+
+
+@pytest.mark.parametrize("date, months, expected", [
+    (datetime.datetime(2023, 1, 31), 1, datetime.datetime(2023, 2, 28)),
+    (datetime.datetime(2024, 1, 31), 1, datetime.datetime(2024, 2, 29)),
+    (datetime.datetime(2023, 3, 31), -1, datetime.datetime(2023, 2, 28)),
+    (datetime.datetime(2023, 12, 31), 2, datetime.datetime(2024, 2, 29)),
+])
+def test_add_months_clamps_to_the_month_end(date, months, expected):
+    assert add_months(date, months) == expected
+
+
+def test_difference_counts_clamped_months():
+    assert datetime_difference(*PAIRS[0]) == difference(months=1)
+    assert datetime_difference(*PAIRS[1]) == difference(months=1)
+    assert datetime_difference(*PAIRS[2]) == difference(months=1, days=1)
+    assert datetime_difference(*PAIRS[4]) == difference(years=3, hours=23, minutes=59, seconds=59)
+
+
+def test_difference_is_absolute():
+    for date_x, date_y in PAIRS:
+        assert datetime_difference(date_x, date_y) == datetime_difference(date_y, date_x)
+
+
+def test_differences_of_sequences_match_each_difference():
+    dates_x, dates_y = zip(*PAIRS)
+    differences = datetime_differences(list(dates_x), list(dates_y))
+
+    for index, (date_x, date_y) in enumerate(PAIRS):
+        assert {unit: values[index] for unit, values in differences.items()} == datetime_difference(date_x, date_y)
+
+
+def test_differences_of_datetime64_arrays_match_sequences():
+    numpy = pytest.importorskip("numpy")
+    dates_x, dates_y = zip(*PAIRS)
+    expected = datetime_differences(list(dates_x), list(dates_y))
+    differences = datetime_differences(
+        numpy.array(dates_x, dtype="datetime64[us]"),
+        numpy.array(dates_y, dtype="datetime64[us]"),
+    )
+
+    assert {unit: values.tolist() for unit, values in differences.items()} == expected
+
+
+def test_differences_compare_a_single_datetime_with_every_datetime():
+    now = datetime.datetime(2023, 3, 31)
+    dates = [date for date, _ in PAIRS]
+
+    assert datetime_differences(now, dates) == datetime_differences([now] * len(dates), dates)
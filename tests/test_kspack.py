@@ -0,0 +1,45 @@
+"""
+Tests for the .kspack template bundles.
+"""
+import gc
+import weakref
+
+import pytest
+
+from kivystart.kspack import KsPack, pack_directory
+
+
+@pytest.fixture
+def bundle_path(tmp_path):
+    source_dir = tmp_path / "template"
+    (source_dir / "kv_files").mkdir(parents=True)
+    (source_dir / "main.py.kivytemplate").write_text("print('main')\n")
+    (source_dir / "kv_files" / "main.kv").write_text("<Root>:\n")
+    path = tmp_path / "basic.kspack"
+    pack_directory(str(source_dir), str(path))
+    return str(path)
+
+
+def test_read_files(bundle_path):
+    with KsPack.open(bundle_path) as kspack:
+        assert kspack.read_text("main.py.kivytemplate") == "print('main')\n"
+        assert kspack.read("kv_files/main.kv") == b"<Root>:\n"
+        assert kspack.verify() == []
+
+
+def test_close_with_live_views(bundle_path):
+    kspack = KsPack.open(bundle_path)
+    view = kspack.read_view("main.py.kivytemplate")
+    mapping = weakref.ref(kspack._mmap)
+
+    kspack.close()
+    kspack.close()
+
+    # Views outlive the bundle, the mapping is closed once they are released
+    assert bytes(view) == b"print('main')\n"
+    with pytest.raises(ValueError):
+        kspack.read("main.py.kivytemplate")
+
+    view.release()
+    gc.collect()
+    assert mapping() is None
@@ -0,0 +1,68 @@
+"""
+Tests for the project cache.
+"""
+import os
+
+import pytest
+
+from kivystart.api import GenerationOptions
+from kivystart.commands import MakeProjectCommand
+from kivystart.renderer import KivyTemplateRenderer
+from kivystart.project_cache import GenerateFromCacheStep, ProjectCache, generate_virtual
+
+
+def make_app_template(name: str, appname: str, destination_dir: str):
+    options = GenerationOptions(name=name, appname=appname, no_venv=True, license="MIT")
+    app_template = MakeProjectCommand.create_app_template(options.template, **options.template_options())
+    app_template.destination_dir = destination_dir
+    return app_template
+
+
+def test_hardlink_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ProjectCache(str(tmp_path / "cache"), link_mode="hardlink")
+
+
+@pytest.mark.parametrize("link_mode", ["reflink", "copy"])
+def test_materialized_files_dont_share_the_blobs(tmp_path, link_mode):
+    cache = ProjectCache(str(tmp_path / "cache"), link_mode=link_mode)
+    blob = tmp_path / "blob"
+    blob.write_bytes(b"cached")
+    os.chmod(str(blob), 0o444)
+    target = tmp_path / "main.py"
+
+    cache._link(str(blob), str(target), 0o644)
+    target.write_bytes(b"edited")
+
+    assert os.stat(str(target)).st_nlink == 1
+    assert blob.read_bytes() == b"cached"
+
+
+def test_cache_hits_substitute_the_names_without_rendering(tmp_path, monkeypatch):
+    cache = ProjectCache(str(tmp_path / "cache"), link_mode="copy")
+    GenerateFromCacheStep(make_app_template("first", "FirstApp", str(tmp_path / "first")), cache).action()
+
+    renders = []
+    render = KivyTemplateRenderer.render
+
+    def counting_render(self, template_content, context=None):
+        renders.append(template_content)
+        return render(self, template_content, context=context)
+
+    monkeypatch.setattr(KivyTemplateRenderer, "render", counting_render)
+    app_template = make_app_template("demo", "DemoApp", str(tmp_path / "demo"))
+    GenerateFromCacheStep(app_template, cache).action()
+
+    assert renders == []
+
+    monkeypatch.setattr(KivyTemplateRenderer, "render", render)
+    expected = generate_virtual(app_template)
+    generated = sorted(
+        os.path.relpath(os.path.join(root, file), app_template.destination_dir).replace(os.sep, "/")
+        for root, _, files in os.walk(app_template.destination_dir) for file in files
+    )
+
+    assert generated == sorted(expected)
+    for path in expected:
+        with open(os.path.join(app_template.destination_dir, path), "rb") as fd:
+            assert fd.read() == expected[path], path
@@ -0,0 +1,80 @@
+"""
+Tests for the app template registry.
+"""
+import os
+import sys
+import textwrap
+
+from kivystart import registry as registry_module
+from kivystart.registry import TemplateRegistry
+
+
+TEMPLATE_MODULE = """
+class PluginAppTemplate:
+    description = "A plugin template"
+    flavors = ("kivy",)
+    options = {options!r}
+"""
+
+
+def write_template_module(path, options):
+    path.write_text(textwrap.dedent(TEMPLATE_MODULE.format(options=tuple(options))))
+
+
+def test_builtin_template_lists_current_options(tmp_path):
+    templates = TemplateRegistry(index_path=str(tmp_path / "index.json")).discover()
+
+    for option in ("screens", "kv_bundle", "kv_compile", "compile_bytecode"):
+        assert option in templates["basic"].options
+
+
+def test_index_records_are_invalidated_when_the_module_changes(tmp_path, monkeypatch):
+    module_path = tmp_path / "plugin_template.py"
+    write_template_module(module_path, ["theme"])
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(registry_module, "BUILTIN_TEMPLATES", {"plugin": "plugin_template:PluginAppTemplate"})
+    monkeypatch.setattr(registry_module, "iter_entry_points", lambda: [])
+    index_path = str(tmp_path / "index.json")
+
+    assert TemplateRegistry(index_path=index_path).discover()["plugin"].options == ["theme"]
+
+    # Same version, edited in place e.g. an editable install
+    write_template_module(module_path, ["theme", "screens"])
+    os.utime(str(module_path), ns=(0, 0))
+    sys.modules.pop("plugin_template", None)
+
+    assert TemplateRegistry(index_path=index_path).discover()["plugin"].options == ["theme", "screens"]
+
+
+def test_index_records_are_reused_while_the_module_is_unchanged(tmp_path, monkeypatch):
+    module_path = tmp_path / "plugin_template.py"
+    write_template_module(module_path, ["theme"])
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(registry_module, "BUILTIN_TEMPLATES", {"plugin": "plugin_template:PluginAppTemplate"})
+    monkeypatch.setattr(registry_module, "iter_entry_points", lambda: [])
+    index_path = str(tmp_path / "index.json")
+
+    TemplateRegistry(index_path=index_path).discover()
+    second = TemplateRegistry(index_path=index_path)
+    second.discover()
+
+    # Read from the index, the template module isn't imported again
+    assert "plugin" not in second._loaded
+
+
+def test_warm_discover_doesnt_import_the_plugin_package(tmp_path, monkeypatch):
+    package_dir = tmp_path / "plugin_package"
+    package_dir.mkdir()
+    (package_dir / "__init__.py").write_text("")
+    write_template_module(package_dir / "templates.py", ["theme"])
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(registry_module, "BUILTIN_TEMPLATES", {"plugin": "plugin_package.templates:PluginAppTemplate"})
+    monkeypatch.setattr(registry_module, "iter_entry_points", lambda: [])
+    index_path = str(tmp_path / "index.json")
+
+    TemplateRegistry(index_path=index_path).discover()
+    sys.modules.pop("plugin_package.templates", None)
+    sys.modules.pop("plugin_package", None)
+
+    assert TemplateRegistry(index_path=index_path).discover()["plugin"].options == ["theme"]
+    assert "plugin_package" not in sys.modules
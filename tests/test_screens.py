@@ -0,0 +1,60 @@
+"""
+Tests for the screens scaffolded with --screens.
+"""
+from kivystart.api import GenerationOptions, create_virtual_project
+from kivystart.app_template.basic.steps.create_screens import merge_screens_registry
+
+
+def registry_screens(content: str) -> dict:
+    namespace = {}
+    exec(compile(content, "__init__.py", "exec"), namespace)
+    return namespace["SCREENS"]
+
+
+def test_generated_registry_lists_the_screens():
+    project = create_virtual_project(GenerationOptions(name="demo", appname="DemoApp", no_venv=True, no_buildozer=True, screens="settings,user_profile"))
+    screens = registry_screens(project.text("components/screens/__init__.py"))
+
+    assert screens == {
+        "settings": "components.screens.settings_screen:SettingsScreen",
+        "user_profile": "components.screens.user_profile_screen:UserProfileScreen",
+    }
+    assert "class UserProfileScreen" in project.text("components/screens/user_profile_screen.py")
+
+
+def test_merge_keeps_existing_entries_and_settings():
+    content = (
+        'SCREENS = {\n'
+        '    "settings": "components.screens.settings_screen:SettingsScreen",\n'
+        '    "custom": "app.custom:CustomScreen"  # Added by hand\n'
+        '}\n'
+        '\n'
+        'MAX_SCREENS = 5\n'
+    )
+    merged = merge_screens_registry(content, {"settings": "SettingsScreen", "home": "HomeScreen"})
+    namespace = {}
+    exec(compile(merged, "__init__.py", "exec"), namespace)
+
+    assert namespace["SCREENS"] == {
+        "settings": "components.screens.settings_screen:SettingsScreen",
+        "custom": "app.custom:CustomScreen",
+        "home": "components.screens.home_screen:HomeScreen",
+    }
+    assert namespace["MAX_SCREENS"] == 5
+    assert "# Added by hand" in merged
+
+
+def test_merge_inline_and_empty_registries():
+    inline = merge_screens_registry('SCREENS = {"a": "m:A",}\n', {"b": "BScreen"})
+    empty = merge_screens_registry("SCREENS = {}\n", {"b": "BScreen"})
+
+    assert registry_screens(inline) == {"a": "m:A", "b": "components.screens.b_screen:BScreen"}
+    assert registry_screens(empty) == {"b": "components.screens.b_screen:BScreen"}
+
+
+def test_merge_without_missing_screens_or_dict_literal():
+    content = 'SCREENS = {"a": "m:A"}\n'
+
+    assert merge_screens_registry(content, {"a": "AScreen"}) == content
+    assert merge_screens_registry("SCREENS = dict(a='m:A')\n", {"b": "BScreen"}) is None
+    assert merge_screens_registry("SCREENS = {\n", {"b": "BScreen"}) is None
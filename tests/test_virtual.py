@@ -0,0 +1,36 @@
+"""
+Tests for the in-memory projects.
+"""
+import threading
+
+from kivystart import virtual
+from kivystart.virtual import share_buffer
+
+
+def test_share_buffer_returns_the_shared_content():
+    first = share_buffer(b"shared content")
+    second = share_buffer(bytes(bytearray(b"shared content")))
+
+    assert second is first
+
+
+def test_share_buffer_is_thread_safe(monkeypatch):
+    # A small pool so that threads keep evicting the entries others are moving
+    monkeypatch.setattr(virtual, "SHARED_BUFFERS_SIZE", 8)
+    errors = []
+
+    def share(offset: int):
+        try:
+            for i in range(2000):
+                data = b"%d" % ((i + offset) % 16)
+                assert share_buffer(data) == data
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=share, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []